@@ -1,25 +1,56 @@
 # app/ai_generator.py
 import os
+import re
 import json
-import google.generativeai as genai
+import time
+import random
+import queue
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
 from dotenv import load_dotenv
 
+from . import clients, metrics, rate_limit
+from .json_stream import ArrayObjectParser
+from .text_extractor import PAGE_BREAK
+
 load_dotenv()
 
-# Configura a API do Google
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+# Tamanho máximo (em caracteres) de cada pedaço de texto enviado ao modelo
+CHUNK_MAX_CHARS = int(os.getenv("FLASHCARD_CHUNK_MAX_CHARS", 12000))
+# Número máximo de chamadas simultâneas ao Gemini por documento
+MAX_CONCURRENT_REQUESTS = int(os.getenv("GEMINI_MAX_CONCURRENCY", 4))
 
-def generate_flashcards_from_text(text: str) -> list[dict]:
-    """
-    Usa o modelo Gemini do Google para gerar flashcards a partir de um texto.
-    """
-    if not text or text.isspace():
-        print("Texto de entrada está vazio. Pulando a geração de flashcards.")
-        return []
+# Tentativas de cada chamada ao Gemini em erros temporários (429, 5xx), com
+# backoff exponencial e jitter; esgotadas, o erro sobe para a tarefa do Celery.
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 5))
+GEMINI_RETRY_BASE_SECONDS = float(os.getenv("GEMINI_RETRY_BASE_SECONDS", 2))
+GEMINI_RETRY_MAX_SECONDS = float(os.getenv("GEMINI_RETRY_MAX_SECONDS", 60))
+# Tokens de resposta reservados no limite de uso antes de cada chamada (o valor
+# real, informado pela resposta, corrige a reserva depois)
+GEMINI_EXPECTED_OUTPUT_TOKENS = int(os.getenv("GEMINI_EXPECTED_OUTPUT_TOKENS", 1024))
+
+# Com streaming, cada flashcard é lido assim que chega na resposta. O primeiro
+# cartão de cada resposta é entregue (e gravado) sozinho; os demais, em lotes de
+# até FLASHCARD_STREAM_BATCH_SIZE, ou quando o mais antigo do lote espera
+# FLASHCARD_STREAM_MAX_DELAY segundos.
+GEMINI_STREAM = os.getenv("GEMINI_STREAM", "true").lower() == "true"
+FLASHCARD_STREAM_BATCH_SIZE = int(os.getenv("FLASHCARD_STREAM_BATCH_SIZE", 5))
+FLASHCARD_STREAM_MAX_DELAY = float(os.getenv("FLASHCARD_STREAM_MAX_DELAY", 0.5))
+# Saída estruturada: o modelo responde só o JSON, sem cercas de markdown
+GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+RATE_LIMITED = 429
+# Erros do servidor que valem uma nova tentativa
+_RETRYABLE_STATUS = {RATE_LIMITED, 500, 502, 503, 504}
 
-    # Prompt adaptado para o Gemini, pedindo JSON.
-    prompt = f"""
+# Separadores usados para quebrar um trecho grande demais, do mais "natural"
+# (parágrafo) para o mais bruto (palavra).
+_SPLIT_SEPARATORS = ("\n\n", "\n", " ")
+
+PROMPT_TEMPLATE = """
     Você é um assistente especialista em criar materiais de estudo.
     Sua tarefa é ler o texto fornecido e gerar um conjunto de flashcards.
     Para cada flashcard, crie uma pergunta (frente) e uma resposta direta (verso).
@@ -35,22 +66,292 @@ def generate_flashcards_from_text(text: str) -> list[dict]:
 
     Texto para análise:
     ---
-    {text[:15000]}
+    {text}
+    """
+
+# Identifica a combinação de prompt/modelo/divisão em trechos usada para gerar os
+# flashcards. Qualquer mudança nesses parâmetros invalida os resultados em cache.
+GENERATOR_VERSION = hashlib.sha256(
+    f"{MODEL_NAME}|{CHUNK_MAX_CHARS}|{PROMPT_TEMPLATE}|{sorted(GENERATION_CONFIG.items())}".encode("utf-8")
+).hexdigest()[:16]
+
+
+def _split_oversized(text: str, max_chars: int, separators=_SPLIT_SEPARATORS) -> list[str]:
+    """Quebra um trecho maior que `max_chars` no separador mais natural disponível."""
+    if len(text) <= max_chars:
+        return [text]
+    if not separators:
+        # Sem separador possível: corta no tamanho máximo.
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+    separator, remaining = separators[0], separators[1:]
+    pieces = []
+    for part in text.split(separator):
+        pieces.extend(_split_oversized(part, max_chars, remaining))
+    return _pack(pieces, max_chars, separator)
+
+
+def _pack(pieces: list[str], max_chars: int, separator: str) -> list[str]:
+    """Agrupa pedaços consecutivos enquanto couberem em `max_chars`."""
+    chunks, current = [], ""
+    for piece in pieces:
+        if not piece.strip():
+            continue
+        candidate = f"{current}{separator}{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            if current:
+                chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_text_into_chunks(text: str, max_chars: int = CHUNK_MAX_CHARS) -> list[str]:
+    """
+    Divide o texto em pedaços de até `max_chars` caracteres, respeitando
+    primeiro as quebras de página e depois as de parágrafo.
     """
+    pages = []
+    for page in text.split(PAGE_BREAK):
+        pages.extend(_split_oversized(page, max_chars))
+    return _pack(pages, max_chars, "\n\n")
+
+
+def _normalize(value: str) -> str:
+    return re.sub(r"\W+", " ", value).strip().casefold()
+
+
+def _dedupe(batch: list[dict], seen: set) -> list[dict]:
+    """Valida os flashcards de um pedaço, descartando perguntas já vistas em `seen`."""
+    unique = []
+    for card in batch:
+        if not isinstance(card, dict):
+            continue
+        front, back = card.get("front"), card.get("back")
+        if not isinstance(front, str) or not isinstance(back, str):
+            continue
+        key = _normalize(front)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        unique.append({"front": front.strip(), "back": back.strip()})
+    return unique
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """Código HTTP de um erro da API do Google (`google.api_core.exceptions`), se houver."""
+    code = getattr(error, "code", None)
+    return int(code) if isinstance(code, int) else None
+
+
+def _estimate_tokens(prompt: str) -> int:
+    # ~4 caracteres por token, mais a resposta esperada
+    return len(prompt) // 4 + GEMINI_EXPECTED_OUTPUT_TOKENS
+
+
+def _used_tokens(response) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    return (getattr(usage, "prompt_token_count", 0) or 0) + (getattr(usage, "candidates_token_count", 0) or 0)
+
 
+def _backoff(attempt: int) -> float:
+    """Backoff exponencial com jitter completo."""
+    return random.uniform(0, min(GEMINI_RETRY_MAX_SECONDS, GEMINI_RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+def _call_model(model, prompt: str, priority: str, stream: bool = False, consume: Optional[Callable] = None):
+    """
+    Chama o modelo dentro do limite de uso compartilhado, repetindo os erros
+    temporários. Um 429 pausa todos os workers, não só esta chamada.
+
+    `consume(resposta)` lê a resposta dentro da mesma tentativa: com `stream`,
+    um erro no meio do streaming também é repetido.
+    """
+    limiter = rate_limit.get_limiter("gemini")
+    estimated = _estimate_tokens(prompt)
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        limiter.acquire(estimated, priority)
+        try:
+            with metrics.external_call("gemini"):
+                if stream:
+                    response = model.generate_content(prompt, stream=True, generation_config=GENERATION_CONFIG)
+                else:
+                    response = model.generate_content(prompt, generation_config=GENERATION_CONFIG)
+                if consume is not None:
+                    consume(response)
+        except Exception as e:
+            status = _status_code(e)
+            if status not in _RETRYABLE_STATUS or attempt == GEMINI_MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+            reason = "rate_limited" if status == RATE_LIMITED else "unavailable"
+            metrics.EXTERNAL_CALL_RETRIES.labels(service="gemini", reason=reason).inc()
+            print(f"Gemini respondeu {status}; nova tentativa em {delay:.1f}s ({attempt + 1}/{GEMINI_MAX_RETRIES}).")
+            if status == RATE_LIMITED:
+                limiter.penalize(delay)
+            else:
+                time.sleep(delay)
+            continue
+
+        # No streaming, o uso de tokens só é conhecido depois de ler a resposta
+        metrics.record_gemini_usage(response)
+        used = _used_tokens(response)
+        if used is not None:
+            limiter.settle(estimated, used)
+        return response
+
+
+def _generate_for_chunk(
+    model,
+    chunk: str,
+    emit: Callable[[list[dict]], None],
+    priority: str = rate_limit.PRIORITY_INTERACTIVE,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """
+    Faz uma chamada ao modelo para um pedaço do texto e entrega os flashcards a
+    `emit` em lotes pequenos, à medida que a resposta chega. Os cartões já lidos
+    são entregues mesmo que a chamada falhe; erros da API que persistem depois
+    das tentativas sobem para quem chamou.
+    """
+    pending = []
+    pending_since = 0.0
+    batch_size = 1
+
+    def flush():
+        nonlocal batch_size
+        if pending:
+            emit(pending.copy())
+            pending.clear()
+            batch_size = FLASHCARD_STREAM_BATCH_SIZE
+
+    def consume(response):
+        nonlocal pending_since
+        parser = ArrayObjectParser()
+        try:
+            for part in response if GEMINI_STREAM else (response,):
+                if stop is not None and stop.is_set():
+                    return
+                try:
+                    text = part.text
+                except (ValueError, AttributeError) as e:
+                    # Resposta bloqueada pelo filtro de segurança: repetir não ajuda
+                    print(f"Resposta inválida da API do Google Gemini: {e}")
+                    return
+                for card in parser.feed(text):
+                    if not pending:
+                        pending_since = time.monotonic()
+                    pending.append(card)
+                    if len(pending) >= batch_size:
+                        flush()
+                if pending and time.monotonic() - pending_since >= FLASHCARD_STREAM_MAX_DELAY:
+                    flush()
+        finally:
+            # Os cartões lidos antes de um erro não se perdem
+            flush()
+        if not parser.found_array:
+            print("Resposta inválida da API do Google Gemini: nenhuma lista de flashcards.")
+        elif parser.invalid:
+            print(f"{parser.invalid} flashcard(s) malformado(s) descartado(s) da resposta do Gemini.")
+
+    _call_model(model, PROMPT_TEMPLATE.format(text=chunk), priority, stream=GEMINI_STREAM, consume=consume)
+
+
+def iter_flashcard_batches(
+    text: str,
+    model=None,
+    max_workers: int = MAX_CONCURRENT_REQUESTS,
+    on_chunk: Optional[Callable[[int, int], None]] = None,
+    priority: str = rate_limit.PRIORITY_INTERACTIVE,
+    existing_fronts: Iterable[str] = (),
+) -> Iterator[list[dict]]:
+    """
+    Gera os flashcards em lotes pequenos, à medida que as respostas do modelo
+    chegam, para que possam ser gravados sem esperar o documento inteiro.
+    Perguntas repetidas (inclusive as de `existing_fronts`) já vêm descartadas.
+
+    `on_chunk(concluídos, total)` é chamado antes da primeira chamada, com zero,
+    e depois que os lotes de cada pedaço são consumidos (ou seja, já gravados
+    por quem itera). `priority` define a ordem no limite de uso compartilhado
+    do Gemini (ver `rate_limit.py`).
+
+    Se um pedaço falhar, os que estão na fila são cancelados, mas os cartões
+    dos que já estavam em andamento ainda são entregues antes do erro subir.
+    """
+    if not text or text.isspace():
+        print("Texto de entrada está vazio. Pulando a geração de flashcards.")
+        return
+
+    chunks = split_text_into_chunks(text)
+    if model is None:
+        model = clients.get_gemini_model(MODEL_NAME)
+
+    print(f"Enviando {len(chunks)} trecho(s) para a API do Google Gemini...")
+    if on_chunk is not None:
+        on_chunk(0, len(chunks))
+
+    seen = {_normalize(front) for front in existing_fronts}
+    # Cada thread publica ("cards", lote), e no fim ("done", None) ou ("failed", erro)
+    results: queue.Queue = queue.Queue()
+    stop = threading.Event()
+
+    def run(chunk: str) -> None:
+        try:
+            _generate_for_chunk(model, chunk, lambda batch: results.put(("cards", batch)), priority, stop)
+        except Exception as e:
+            results.put(("failed", e))
+        else:
+            results.put(("done", None))
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks))))
+    error = None
     try:
-        print("Enviando texto para a API do Google Gemini...")
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        # O Gemini pode retornar o JSON diretamente com essa configuração
-        response = model.generate_content(prompt)
+        futures = [executor.submit(run, chunk) for chunk in chunks]
+        outstanding, done = len(futures), 0
+        while outstanding:
+            kind, payload = results.get()
+            if kind == "cards":
+                batch = _dedupe(payload, seen)
+                if batch:
+                    yield batch
+                continue
+            outstanding -= 1
+            if kind == "failed":
+                if error is None:
+                    error = payload
+                    # Os pedaços que ainda estão na fila não gastam cota à toa
+                    outstanding -= sum(future.cancel() for future in futures)
+                continue
+            done += 1
+            if on_chunk is not None:
+                on_chunk(done, len(chunks))
+    finally:
+        # Se quem itera desistir, as respostas em andamento param de ser lidas
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+    if error is not None:
+        raise error
 
-        # Limpa a resposta para extrair apenas o JSON
-        json_text = response.text.strip().replace("```json", "").replace("```", "")
-        data = json.loads(json_text)
 
-        print("Flashcards gerados com sucesso pelo Gemini.")
-        return data.get("flashcards", [])
+def generate_flashcards_from_text(
+    text: str, model=None, max_workers: int = MAX_CONCURRENT_REQUESTS
+) -> list[dict]:
+    """
+    Usa o modelo Gemini do Google para gerar flashcards a partir de um texto.
 
-    except Exception as e:
-        print(f"Ocorreu um erro ao chamar a API do Google Gemini: {e}")
-        return []
\ No newline at end of file
+    O texto é dividido em pedaços que são enviados ao modelo em paralelo, com no
+    máximo `max_workers` chamadas simultâneas. `model` pode ser qualquer objeto
+    com um método `generate_content(prompt, stream=..., generation_config=...)`
+    (útil para testes com um modelo falso).
+    """
+    flashcards = []
+    for batch in iter_flashcard_batches(text, model=model, max_workers=max_workers):
+        flashcards.extend(batch)
+    if flashcards:
+        print(f"{len(flashcards)} flashcards gerados com sucesso pelo Gemini.")
+    return flashcards
@@ -0,0 +1,135 @@
+# app/cache.py
+"""
+Cache de resultados (texto extraído e flashcards) endereçado pelo conteúdo do arquivo.
+
+A fonte da verdade é a tabela `ProcessingCache` no banco. Se `CACHE_REDIS_URL`
+estiver definida, o Redis é usado como uma camada mais rápida na frente do banco,
+com TTL em cada chave (a política de despejo LRU é configurada no próprio Redis).
+
+No banco, entradas gravadas há mais de `CACHE_DB_TTL_DAYS` dias contam como
+ausentes e são apagadas por `evict_expired` (`python -m app.cache`, num cron).
+"""
+import os
+import json
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import redis
+from dotenv import load_dotenv
+from sqlmodel import Session
+
+from . import clients, crud
+
+load_dotenv()
+
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 7 * 24 * 60 * 60))
+CACHE_DB_TTL_DAYS = int(os.getenv("CACHE_DB_TTL_DAYS", 90))
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def compute_file_hash(file_path: str) -> str:
+    """Calcula o SHA-256 de um arquivo lendo-o em blocos."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _get_redis():
+    return clients.get_redis(CACHE_REDIS_URL)
+
+
+def _text_key(content_hash: str, version: str) -> str:
+    return f"flashify:cache:text:{version}:{content_hash}"
+
+
+def _flashcards_key(content_hash: str, version: str) -> str:
+    return f"flashify:cache:flashcards:{version}:{content_hash}"
+
+
+def _redis_get(key: str) -> Optional[str]:
+    client = _get_redis()
+    if client is None:
+        return None
+    try:
+        return client.get(key)
+    except redis.RedisError as e:
+        print(f"Cache Redis indisponível: {e}")
+        return None
+
+
+def _redis_set(key: str, value: str) -> None:
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        client.set(key, value, ex=CACHE_TTL_SECONDS)
+    except redis.RedisError as e:
+        print(f"Cache Redis indisponível: {e}")
+
+
+def _fresh_since() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=CACHE_DB_TTL_DAYS)
+
+
+def get_extracted_text(session: Session, content_hash: str, version: str) -> Optional[str]:
+    """
+    Retorna o texto já extraído de um arquivo com o mesmo conteúdo, desde que
+    tenha sido extraído pela mesma versão da extração (`version`). Texto vazio
+    é um resultado válido (ex.: imagem sem texto) e não um cache ausente.
+    """
+    text = _redis_get(_text_key(content_hash, version))
+    if text is not None:
+        return text
+
+    db_cache = crud.get_processing_cache(session, content_hash, updated_since=_fresh_since())
+    if db_cache is None or db_cache.extracted_text is None or db_cache.extractor_version != version:
+        return None
+    _redis_set(_text_key(content_hash, version), db_cache.extracted_text)
+    return db_cache.extracted_text
+
+
+def store_extracted_text(session: Session, content_hash: str, version: str, text: str) -> None:
+    crud.upsert_processing_cache(session, content_hash, extracted_text=text, extractor_version=version)
+    _redis_set(_text_key(content_hash, version), text)
+
+
+def get_flashcards(session: Session, content_hash: str, version: str) -> Optional[list[dict]]:
+    """
+    Retorna os flashcards gerados para o mesmo conteúdo, desde que tenham sido
+    gerados pela mesma versão de prompt/modelo (`version`).
+    """
+    cached = _redis_get(_flashcards_key(content_hash, version))
+    if cached is not None:
+        return json.loads(cached)
+
+    db_cache = crud.get_processing_cache(session, content_hash, updated_since=_fresh_since())
+    if db_cache is None or db_cache.flashcards is None or db_cache.generator_version != version:
+        return None
+    _redis_set(_flashcards_key(content_hash, version), db_cache.flashcards)
+    return json.loads(db_cache.flashcards)
+
+
+def store_flashcards(
+    session: Session, content_hash: str, version: str, flashcards: list[dict]
+) -> None:
+    payload = json.dumps(flashcards, ensure_ascii=False)
+    crud.upsert_processing_cache(
+        session, content_hash, flashcards=payload, generator_version=version
+    )
+    _redis_set(_flashcards_key(content_hash, version), payload)
+
+
+def evict_expired(session: Session) -> int:
+    """Apaga do banco as entradas gravadas há mais de `CACHE_DB_TTL_DAYS` dias."""
+    return crud.delete_processing_cache_before(session, _fresh_since())
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    with Session(engine) as session:
+        print(f"{evict_expired(session)} entradas de cache removidas.")
@@ -0,0 +1,93 @@
+# app/clients.py
+"""
+Instâncias reutilizáveis dos clientes do Google (Vision e Gemini) e do Redis
+por processo.
+
+Os clientes são criados sob demanda na primeira chamada e reaproveitados pelas
+tarefas seguintes, evitando abrir um canal gRPC e autenticar a cada documento.
+Como canais gRPC não sobrevivem a um fork, `reset_clients()` é chamado quando o
+Celery cria cada processo filho (ver `worker.py`).
+"""
+import os
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+
+_lock = threading.Lock()
+_vision_client = None
+_gemini_models: dict[str, object] = {}
+_genai_configured = False
+_redis_clients: dict[str, object] = {}
+
+
+def get_vision_client():
+    """Retorna o `ImageAnnotatorClient` do processo atual, criando-o se necessário."""
+    global _vision_client
+    if _vision_client is None:
+        with _lock:
+            if _vision_client is None:
+                from google.cloud import vision
+                _vision_client = vision.ImageAnnotatorClient()
+    return _vision_client
+
+
+def get_gemini_model(model_name: str):
+    """Retorna o `GenerativeModel` do processo atual para `model_name`."""
+    global _genai_configured
+    model = _gemini_models.get(model_name)
+    if model is None:
+        with _lock:
+            model = _gemini_models.get(model_name)
+            if model is None:
+                import google.generativeai as genai
+                if not _genai_configured:
+                    genai.configure(api_key=GOOGLE_API_KEY)
+                    _genai_configured = True
+                model = genai.GenerativeModel(model_name)
+                _gemini_models[model_name] = model
+    return model
+
+
+def get_redis(url: Optional[str]):
+    """
+    Retorna o cliente Redis síncrono (respostas em `str`) do processo atual
+    para `url`, ou None se a URL não estiver configurada. Caches e limites que
+    apontam para o mesmo Redis compartilham o mesmo pool de conexões.
+    """
+    if not url:
+        return None
+    client = _redis_clients.get(url)
+    if client is None:
+        with _lock:
+            client = _redis_clients.get(url)
+            if client is None:
+                import redis
+                client = redis.Redis.from_url(url, decode_responses=True)
+                _redis_clients[url] = client
+    return client
+
+
+def set_vision_client(client) -> None:
+    """Substitui o cliente do Vision (ex.: por um stub local em testes e benchmarks)."""
+    global _vision_client
+    _vision_client = client
+
+
+def set_gemini_model(model_name: str, model) -> None:
+    """Substitui o modelo Gemini usado para `model_name`."""
+    _gemini_models[model_name] = model
+
+
+def reset_clients() -> None:
+    """Descarta os clientes herdados do processo pai; serão recriados sob demanda."""
+    global _vision_client, _genai_configured
+    with _lock:
+        _vision_client = None
+        _gemini_models.clear()
+        _genai_configured = False
+        _redis_clients.clear()
@@ -1,13 +1,19 @@
+from sqlalchemy import delete, func, insert, update
 from sqlmodel import Session, select
-from . import models, schemas, security
-from typing import Optional 
+from . import models, scheduler, schemas, search, security
+from typing import Iterator, Optional 
+from datetime import datetime, timezone
 
 def get_user_by_email(session: Session, email: str) -> models.User | None:
     statement = select(models.User).where(models.User.email == email)
     return session.exec(statement).first()
 
-def create_user(session: Session, user_create: schemas.UserCreate) -> models.User:
-    hashed_password = security.get_password_hash(user_create.password)
+def create_user(
+    session: Session, user_create: schemas.UserCreate, hashed_password: Optional[str] = None
+) -> models.User:
+    # O hash pode vir pronto (calculado fora da thread da requisição)
+    if hashed_password is None:
+        hashed_password = security.get_password_hash(user_create.password)
 
     db_user = models.User(
         username=user_create.username,
@@ -20,6 +26,21 @@ def create_user(session: Session, user_create: schemas.UserCreate) -> models.Use
     session.refresh(db_user)
     return db_user
 
+def update_user_password_hash(session: Session, db_user: models.User, hashed_password: str) -> models.User:
+    db_user.hashed_password = hashed_password
+    session.add(db_user)
+    session.commit()
+    return db_user
+
+def set_user_active(session: Session, db_user: models.User, is_active: bool) -> models.User:
+    """Ativa ou desativa um usuário, descartando as credenciais em cache."""
+    db_user.is_active = is_active
+    session.add(db_user)
+    session.commit()
+    session.refresh(db_user)
+    security.invalidate_user_cache(db_user.email)
+    return db_user
+
 def create_folder_for_user(
     session: Session, folder_create: schemas.FolderCreate, user_id: int
 ) -> models.Folder:
@@ -29,59 +50,550 @@ def create_folder_for_user(
     session.refresh(db_folder)
     return db_folder
 
+def user_owns_folder(session: Session, folder_id: int, user_id: int) -> bool:
+    statement = select(models.Folder.id).where(
+        models.Folder.id == folder_id, models.Folder.user_id == user_id
+    )
+    return session.exec(statement).first() is not None
 
-def get_folders_by_user(session: Session, user_id: int) -> list[models.Folder]:
-    statement = select(models.Folder).where(models.Folder.user_id == user_id)
-    return session.exec(statement).all()
+def get_folder_summaries_by_user(
+    session: Session, user_id: int, cursor: Optional[int] = None, limit: int = 50
+) -> list[dict]:
+    """
+    Lista as pastas do usuário com a contagem de documentos e flashcards, em uma
+    única consulta. As contagens são subconsultas correlacionadas, avaliadas só
+    para as pastas da página (e atendidas pelos índices das chaves estrangeiras).
+    """
+    document_count = (
+        select(func.count(models.Document.id))
+        .where(models.Document.folder_id == models.Folder.id)
+        .scalar_subquery()
+    )
+    flashcard_count = (
+        select(func.count(models.Flashcard.id))
+        .join(models.Document, models.Flashcard.document_id == models.Document.id)
+        .where(models.Document.folder_id == models.Folder.id)
+        .scalar_subquery()
+    )
+    statement = (
+        select(
+            models.Folder.id,
+            models.Folder.name,
+            document_count.label("document_count"),
+            flashcard_count.label("flashcard_count"),
+        )
+        .where(models.Folder.user_id == user_id)
+        .order_by(models.Folder.id)
+        .limit(limit)
+    )
+    if cursor is not None:
+        statement = statement.where(models.Folder.id > cursor)
+    return [dict(row._mapping) for row in session.exec(statement)]
 
 def get_document(session: Session, document_id: int) -> models.Document | None:
     """Busca um documento pelo seu ID."""
     return session.get(models.Document, document_id)
 
+def get_documents_by_ids(session: Session, document_ids: list[int]) -> list[models.Document]:
+    """Busca vários documentos de uma vez (ex.: os de um lote)."""
+    if not document_ids:
+        return []
+    return session.exec(select(models.Document).where(models.Document.id.in_(document_ids))).all()
+
+def user_owns_document(session: Session, document_id: int, user_id: int) -> bool:
+    """Verifica a posse do documento sem carregar o texto extraído."""
+    statement = select(models.Document.id).where(
+        models.Document.id == document_id, models.Document.user_id == user_id
+    )
+    return session.exec(statement).first() is not None
+
+def get_documents_by_user(
+    session: Session,
+    user_id: int,
+    folder_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = 50,
+) -> list[dict]:
+    """Lista os documentos do usuário, sem as colunas pesadas (ex.: texto extraído)."""
+    statement = (
+        select(models.Document.id, models.Document.status, models.Document.folder_id)
+        .where(models.Document.user_id == user_id)
+        .order_by(models.Document.id)
+        .limit(limit)
+    )
+    if folder_id is not None:
+        statement = statement.where(models.Document.folder_id == folder_id)
+    if cursor is not None:
+        statement = statement.where(models.Document.id > cursor)
+    return [dict(row._mapping) for row in session.exec(statement)]
+
 def update_document_after_processing(
-    session: Session, db_document: models.Document, text: str
+    session: Session,
+    db_document: models.Document,
+    text: str,
+    status: models.DocumentStatus = models.DocumentStatus.COMPLETED,
 ) -> models.Document:
-    """Atualiza o texto extraído e o status do documento."""
+    """Atualiza o texto extraído e o status do documento (e o índice de busca)."""
     db_document.extracted_text = text
-    db_document.status = models.DocumentStatus.COMPLETED
+    db_document.status = status
     session.add(db_document)
+    session.flush()
+    search.index_document(session, db_document.id, text)
     session.commit()
     session.refresh(db_document)
     return db_document
 
+def update_document_status(
+    session: Session, db_document: models.Document, status: models.DocumentStatus
+) -> models.Document:
+    """Registra a etapa do pipeline em que o documento se encontra."""
+    db_document.status = status
+    session.add(db_document)
+    session.commit()
+    return db_document
+
 def create_document_for_user(
-    session: Session, user_id: int, file_path: str, folder_id: Optional[int] = None
+    session: Session,
+    user_id: int,
+    file_path: str,
+    folder_id: Optional[int] = None,
+    content_hash: Optional[str] = None,
 ) -> models.Document:
     db_document = models.Document(
-        user_id=user_id, file_path=file_path, folder_id=folder_id
+        user_id=user_id, file_path=file_path, folder_id=folder_id, content_hash=content_hash
     )
     session.add(db_document)
     session.commit()
     session.refresh(db_document)
     return db_document
 
+def create_batch_documents(
+    session: Session,
+    user_id: int,
+    files: list[tuple[str, Optional[str]]],
+    folder_id: Optional[int] = None,
+) -> tuple[models.UploadBatch, list[models.Document]]:
+    """
+    Cria o lote e um documento para cada `(file_path, content_hash)` com um
+    único INSERT ... RETURNING de várias linhas.
+    """
+    db_batch = models.UploadBatch(user_id=user_id, folder_id=folder_id, total=len(files))
+    session.add(db_batch)
+    session.flush()
+
+    rows = [
+        {
+            "user_id": user_id,
+            "folder_id": folder_id,
+            "batch_id": db_batch.id,
+            "file_path": file_path,
+            "content_hash": content_hash,
+            "status": models.DocumentStatus.PROCESSING,
+        }
+        for file_path, content_hash in files
+    ]
+    # Sem exigir a ordem das linhas devolvidas (no SQLite, isso faria um INSERT
+    # por linha): os documentos são ordenados pelo ID depois.
+    result = session.execute(
+        insert(models.Document).returning(
+            models.Document.id, models.Document.status, models.Document.folder_id
+        ),
+        rows,
+    )
+    db_documents = sorted((models.Document(**row._mapping) for row in result), key=lambda d: d.id)
+    session.commit()
+    session.refresh(db_batch)
+    return db_batch, db_documents
+
+def get_batch_progress(session: Session, batch_id: int, user_id: int) -> Optional[dict]:
+    """Total do lote e quantos documentos estão em cada status, ou None se o lote não for do usuário."""
+    db_batch = session.get(models.UploadBatch, batch_id)
+    if db_batch is None or db_batch.user_id != user_id:
+        return None
+    counts = session.exec(
+        select(models.Document.status, func.count())
+        .where(models.Document.batch_id == batch_id)
+        .group_by(models.Document.status)
+    ).all()
+    return {"id": db_batch.id, "total": db_batch.total, "counts": {status.value: count for status, count in counts}}
+
 def create_flashcards_for_document(
-    session: Session, flashcards_data: list[dict], document_id: int
+    session: Session, flashcards_data: list[dict], document_id: int, user_id: Optional[int] = None
 ) -> list[models.Flashcard]:
-    
-    db_flashcards = []
-    for fc_data in flashcards_data:
-        if "front" in fc_data and "back" in fc_data: # Validação mínima
-            db_flashcard = models.Flashcard(
-                front=fc_data["front"],
-                back=fc_data["back"],
-                document_id=document_id
+    """
+    Insere os flashcards com um único INSERT ... RETURNING de várias linhas,
+    recebendo os IDs gerados sem um SELECT por flashcard. `user_id` é o dono
+    do documento; quem chama normalmente já o tem, e só se for omitido ele é
+    buscado no banco.
+
+    A detecção de duplicatas não roda aqui: quem grava o documento em lotes
+    chama `duplicates.index_document` uma vez, no fim.
+    """
+    rows = [
+        {"front": fc_data["front"], "back": fc_data["back"], "document_id": document_id}
+        for fc_data in flashcards_data
+        if "front" in fc_data and "back" in fc_data # Validação mínima
+    ]
+    if not rows:
+        return []
+    if user_id is None:
+        user_id = session.exec(
+            select(models.Document.user_id).where(models.Document.id == document_id)
+        ).one()
+
+    # O RETURNING traz as colunas junto com o ID, então a ordem das linhas
+    # devolvidas não importa e o banco pode inserir tudo em lotes.
+    result = session.execute(
+        insert(models.Flashcard).returning(
+            models.Flashcard.id,
+            models.Flashcard.front,
+            models.Flashcard.back,
+            models.Flashcard.document_id,
+        ),
+        rows,
+    )
+    db_flashcards = [models.Flashcard(**row._mapping) for row in result]
+
+    # Cria o estado de revisão de cada cartão (vencido desde já) no mesmo commit
+    now = datetime.now(timezone.utc)
+    session.execute(insert(models.ReviewState), [
+        {
+            "flashcard_id": fc.id,
+            "user_id": user_id,
+            "ease_factor": 2.5,
+            "interval_days": 0,
+            "repetitions": 0,
+            "lapses": 0,
+            "due_at": now,
+        }
+        for fc in db_flashcards
+    ])
+    search.index_flashcards(session, [fc.model_dump() for fc in db_flashcards])
+    session.commit()
+    return db_flashcards
+
+def _delete_flashcards(session: Session, flashcard_ids: list[int]) -> None:
+    """Apaga flashcards e tudo o que depende deles (sem commit)."""
+    if not flashcard_ids:
+        return
+
+    # Grupos de duplicatas cujo primeiro cartão será apagado passam a ser
+    # identificados pelo menor ID restante
+    orphans: dict[int, list[int]] = {}
+    for flashcard_id, duplicate_of in session.exec(
+        select(models.Flashcard.id, models.Flashcard.duplicate_of).where(
+            models.Flashcard.duplicate_of.in_(flashcard_ids),
+            models.Flashcard.id.not_in(flashcard_ids),
+        )
+    ):
+        orphans.setdefault(duplicate_of, []).append(flashcard_id)
+    regrouped = []
+    for members in orphans.values():
+        canonical_id = min(members)
+        regrouped += [
+            {"id": member, "duplicate_of": canonical_id if member != canonical_id else None}
+            for member in members
+        ]
+    if regrouped:
+        session.execute(update(models.Flashcard), regrouped)
+
+    search.remove_flashcards(session, flashcard_ids)
+    for model in (models.ReviewState, models.FlashcardBand, models.FlashcardSignature):
+        session.exec(delete(model).where(model.flashcard_id.in_(flashcard_ids)))
+    session.exec(delete(models.Flashcard).where(models.Flashcard.id.in_(flashcard_ids)))
+
+def delete_flashcards_for_document(session: Session, document_id: int) -> None:
+    flashcard_ids = session.exec(
+        select(models.Flashcard.id).where(models.Flashcard.document_id == document_id)
+    ).all()
+    _delete_flashcards(session, list(flashcard_ids))
+    session.commit()
+
+def get_duplicate_clusters(
+    session: Session, user_id: int, cursor: Optional[int] = None, limit: int = 50
+) -> list[dict]:
+    """
+    Lista os grupos de flashcards quase idênticos do usuário, identificados pelo
+    primeiro cartão de cada grupo (paginação por esse ID).
+    """
+    statement = (
+        select(models.Flashcard.duplicate_of)
+        .join(models.Document, models.Flashcard.document_id == models.Document.id)
+        .where(models.Document.user_id == user_id, models.Flashcard.duplicate_of.is_not(None))
+        .distinct()
+        .order_by(models.Flashcard.duplicate_of)
+        .limit(limit)
+    )
+    if cursor is not None:
+        statement = statement.where(models.Flashcard.duplicate_of > cursor)
+    cluster_ids = session.exec(statement).all()
+    if not cluster_ids:
+        return []
+
+    members = session.exec(
+        select(
+            models.Flashcard.id,
+            models.Flashcard.document_id,
+            models.Flashcard.front,
+            models.Flashcard.back,
+            models.Flashcard.duplicate_of,
+        )
+        .where(
+            models.Flashcard.id.in_(cluster_ids) | models.Flashcard.duplicate_of.in_(cluster_ids)
+        )
+        .order_by(models.Flashcard.id)
+    )
+    clusters = {cluster_id: {"id": cluster_id, "flashcards": []} for cluster_id in cluster_ids}
+    for row in members:
+        card = dict(row._mapping)
+        clusters[card.pop("duplicate_of") or card["id"]]["flashcards"].append(card)
+    return list(clusters.values())
+
+def merge_duplicate_cluster(
+    session: Session, user_id: int, cluster_id: int, keep_id: Optional[int] = None
+) -> Optional[tuple[int, list[int]]]:
+    """
+    Mantém um cartão do grupo (o primeiro, por padrão) e apaga os demais. O
+    cartão mantido herda o estado de revisão mais avançado do grupo.
+    Retorna (ID mantido, IDs removidos), ou None se o grupo não for do usuário
+    ou `keep_id` não fizer parte dele.
+    """
+    member_ids = session.exec(
+        select(models.Flashcard.id)
+        .join(models.Document, models.Flashcard.document_id == models.Document.id)
+        .where(
+            models.Document.user_id == user_id,
+            (models.Flashcard.id == cluster_id) | (models.Flashcard.duplicate_of == cluster_id),
+        )
+    ).all()
+    if len(member_ids) < 2 or cluster_id not in member_ids:
+        return None
+    keep_id = cluster_id if keep_id is None else keep_id
+    if keep_id not in member_ids:
+        return None
+    removed = sorted(set(member_ids) - {keep_id})
+
+    # Preserva o progresso: o cartão mantido recebe o estado com mais repetições
+    best = session.exec(
+        select(models.ReviewState)
+        .where(models.ReviewState.flashcard_id.in_(member_ids))
+        .order_by(models.ReviewState.repetitions.desc(), models.ReviewState.due_at)
+    ).first()
+    if best is not None and best.flashcard_id != keep_id:
+        progress = best.model_dump(exclude={"flashcard_id", "user_id"})
+        session.expunge_all()
+        session.exec(
+            update(models.ReviewState)
+            .where(models.ReviewState.flashcard_id == keep_id)
+            .values(**progress)
+        )
+
+    _delete_flashcards(session, removed)
+    session.exec(
+        update(models.Flashcard).where(models.Flashcard.id == keep_id).values(duplicate_of=None)
+    )
+    session.commit()
+    return keep_id, removed
+
+def get_due_flashcards(
+    session: Session, user_id: int, now: datetime, limit: int = 20
+) -> list[dict]:
+    """
+    Busca os próximos `limit` cartões vencidos do usuário, do mais atrasado para
+    o mais recente, percorrendo o índice (user_id, due_at).
+    """
+    statement = (
+        select(
+            models.ReviewState.flashcard_id,
+            models.Flashcard.document_id,
+            models.Flashcard.front,
+            models.Flashcard.back,
+            models.ReviewState.due_at,
+            models.ReviewState.interval_days,
+            models.ReviewState.repetitions,
+        )
+        .join(models.Flashcard, models.Flashcard.id == models.ReviewState.flashcard_id)
+        .where(models.ReviewState.user_id == user_id, models.ReviewState.due_at <= now)
+        .order_by(models.ReviewState.due_at)
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in session.exec(statement)]
+
+def apply_reviews(
+    session: Session, user_id: int, reviews: list[schemas.ReviewSubmit], now: datetime
+) -> tuple[list[int], list[int]]:
+    """
+    Aplica um lote de notas em uma única transação: um SELECT para carregar os
+    estados e um UPDATE em lote (por chave primária) para gravá-los.
+    Retorna os IDs atualizados e os que não pertencem ao usuário.
+    """
+    flashcard_ids = {review.flashcard_id for review in reviews}
+    states = {
+        state.flashcard_id: state
+        for state in session.exec(
+            select(models.ReviewState).where(
+                models.ReviewState.user_id == user_id,
+                models.ReviewState.flashcard_id.in_(flashcard_ids),
             )
-            db_flashcards.append(db_flashcard)
+        )
+    }
 
-    if db_flashcards:
-        session.add_all(db_flashcards)
+    updates: dict[int, dict] = {}
+    # Revisões do mesmo cartão no lote são aplicadas em ordem cronológica
+    for review in sorted(reviews, key=lambda r: r.reviewed_at or now):
+        state = states.get(review.flashcard_id)
+        if state is None:
+            continue
+        current = updates.get(review.flashcard_id) or {
+            "ease_factor": state.ease_factor,
+            "interval_days": state.interval_days,
+            "repetitions": state.repetitions,
+            "lapses": state.lapses,
+        }
+        result = scheduler.schedule_review(
+            ease_factor=current["ease_factor"],
+            interval_days=current["interval_days"],
+            repetitions=current["repetitions"],
+            lapses=current["lapses"],
+            grade=review.grade,
+            reviewed_at=review.reviewed_at or now,
+        )
+        updates[review.flashcard_id] = {"flashcard_id": review.flashcard_id, **vars(result)}
+
+    if updates:
+        # Os objetos carregados acima ficariam desatualizados: o UPDATE em lote
+        # grava direto no banco, sem passar pela unidade de trabalho da sessão.
+        session.expunge_all()
+        session.execute(update(models.ReviewState), list(updates.values()))
         session.commit()
-        # Refresca cada objeto para obter o ID gerado pelo banco
-        for db_fc in db_flashcards:
-            session.refresh(db_fc)
-            
-    return db_flashcards
+    return sorted(updates), sorted(flashcard_ids - set(updates))
 
 def get_flashcards_by_document(session: Session, document_id: int) -> list[models.Flashcard]:
-    return session.exec(select(models.Flashcard).where(models.Flashcard.document_id == document_id)).all()
\ No newline at end of file
+    return session.exec(select(models.Flashcard).where(models.Flashcard.document_id == document_id)).all()
+
+FLASHCARD_FIELDS = ("id", "document_id", "front", "back")
+
+def get_flashcards_page(
+    session: Session,
+    document_id: int,
+    cursor: Optional[int] = None,
+    limit: int = 50,
+    fields: Optional[list[str]] = None,
+) -> list[dict]:
+    """
+    Busca uma página de flashcards do documento (paginação por ID), lendo do
+    banco apenas as colunas pedidas em `fields`. O ID sempre é incluído.
+    """
+    selected = ["id"] + [name for name in (fields or FLASHCARD_FIELDS) if name != "id"]
+    statement = (
+        select(*(getattr(models.Flashcard, name) for name in selected))
+        .where(models.Flashcard.document_id == document_id)
+        .order_by(models.Flashcard.id)
+        .limit(limit)
+    )
+    if cursor is not None:
+        statement = statement.where(models.Flashcard.id > cursor)
+    return [dict(row._mapping) for row in session.exec(statement)]
+
+def iter_flashcards_for_export(
+    session: Session,
+    user_id: int,
+    document_id: Optional[int] = None,
+    folder_id: Optional[int] = None,
+    batch_size: int = 1000,
+) -> Iterator[list[dict]]:
+    """
+    Percorre os flashcards do usuário (ou de um documento/pasta) em lotes, por
+    um cursor do lado do servidor: a memória não cresce com o tamanho do baralho.
+    """
+    statement = (
+        select(
+            models.Flashcard.id,
+            models.Flashcard.document_id,
+            models.Flashcard.front,
+            models.Flashcard.back,
+        )
+        .join(models.Document, models.Flashcard.document_id == models.Document.id)
+        .where(models.Document.user_id == user_id)
+        .order_by(models.Flashcard.id)
+    )
+    if document_id is not None:
+        statement = statement.where(models.Flashcard.document_id == document_id)
+    if folder_id is not None:
+        statement = statement.where(models.Document.folder_id == folder_id)
+    # stream_results: cursor nomeado no PostgreSQL (psycopg2), em vez de
+    # carregar o resultado inteiro no cliente
+    result = session.execute(
+        statement, execution_options={"stream_results": True, "yield_per": batch_size}
+    )
+    for rows in result.partitions():
+        yield [dict(row._mapping) for row in rows]
+
+def create_imported_document(
+    session: Session,
+    user_id: int,
+    file_path: str,
+    folder_id: Optional[int] = None,
+    content_hash: Optional[str] = None,
+) -> models.Document:
+    """Registra um baralho importado: já nasce concluído, sem passar pelo pipeline."""
+    db_document = models.Document(
+        user_id=user_id,
+        file_path=file_path,
+        folder_id=folder_id,
+        content_hash=content_hash,
+        status=models.DocumentStatus.COMPLETED,
+    )
+    session.add(db_document)
+    session.commit()
+    session.refresh(db_document)
+    return db_document
+
+def delete_document(session: Session, document_id: int) -> None:
+    """
+    Desfaz a criação de um documento (importação ou envio interrompido): apaga
+    os cartões já gravados e o documento.
+    """
+    session.rollback()
+    flashcard_ids = session.exec(
+        select(models.Flashcard.id).where(models.Flashcard.document_id == document_id)
+    ).all()
+    _delete_flashcards(session, list(flashcard_ids))
+    session.exec(delete(models.Document).where(models.Document.id == document_id))
+    session.commit()
+
+def get_processing_cache(
+    session: Session, content_hash: str, updated_since: Optional[datetime] = None
+) -> models.ProcessingCache | None:
+    """
+    Busca os resultados em cache para um arquivo pelo hash do seu conteúdo.
+    Com `updated_since`, entradas mais antigas contam como ausentes.
+    """
+    if updated_since is None:
+        return session.get(models.ProcessingCache, content_hash)
+    return session.exec(
+        select(models.ProcessingCache).where(
+            models.ProcessingCache.content_hash == content_hash,
+            models.ProcessingCache.updated_at >= updated_since,
+        )
+    ).first()
+
+def upsert_processing_cache(session: Session, content_hash: str, **values) -> models.ProcessingCache:
+    """Cria ou atualiza a entrada de cache de um arquivo."""
+    db_cache = session.get(models.ProcessingCache, content_hash)
+    if db_cache is None:
+        db_cache = models.ProcessingCache(content_hash=content_hash)
+    for key, value in values.items():
+        setattr(db_cache, key, value)
+    db_cache.updated_at = datetime.now(timezone.utc)
+    session.add(db_cache)
+    session.commit()
+    return db_cache
+
+def delete_processing_cache_before(session: Session, updated_before: datetime) -> int:
+    """Apaga as entradas de cache atualizadas antes de `updated_before`."""
+    result = session.exec(
+        delete(models.ProcessingCache).where(models.ProcessingCache.updated_at < updated_before)
+    )
+    session.commit()
+    return result.rowcount
@@ -9,8 +9,35 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL não foi definida no ambiente.")
 
-engine = create_engine(DATABASE_URL, echo=True) # echo=True mostra os comandos SQL no terminal
+def _env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+# SQL_ECHO=true mostra os comandos SQL no terminal (apenas para desenvolvimento)
+SQL_ECHO = _env_flag("SQL_ECHO", False)
+
+# Configuração do pool de conexões. Cada processo (worker do uvicorn ou do Celery)
+# tem o seu próprio pool, então o total de conexões no Postgres é de até
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW) x número de processos.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = _env_flag("DB_POOL_PRE_PING", True)
+
+def _engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        # O SQLite usa o pool padrão do SQLAlchemy, sem limites de conexões
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(DATABASE_URL, echo=SQL_ECHO, **_engine_options(DATABASE_URL))
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
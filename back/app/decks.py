@@ -0,0 +1,374 @@
+# app/decks.py
+"""
+Exportação e importação de baralhos em CSV, NDJSON (JSON Lines) e Anki (.apkg).
+
+A exportação é feita por geradores que leem os flashcards em lotes (cursor do
+lado do servidor, ver `crud.iter_flashcards_for_export`) e devolvem o arquivo
+em pedaços para uma `StreamingResponse`: a memória fica estável com 100 ou
+1.000.000 de cartões. O `.apkg` é montado em disco (SQLite + zip) e então
+enviado em blocos.
+
+A importação lê o arquivo já gravado em disco da mesma forma, em lotes de
+`IMPORT_BATCH_SIZE` cartões, cada lote gravado com um único INSERT.
+"""
+import io
+import os
+import re
+import csv
+import html
+import json
+import time
+import shutil
+import sqlite3
+import zlib
+import hashlib
+import zipfile
+import tempfile
+import itertools
+from typing import Iterable, Iterator, Optional
+
+from sqlmodel import Session
+
+from . import crud, duplicates
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 500))
+# Tamanho dos blocos do .apkg enviados na resposta
+FILE_CHUNK_SIZE = 64 * 1024
+
+# Formato -> (media type, extensão)
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", ".csv"),
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+    "apkg": ("application/octet-stream", ".apkg"),
+}
+
+CSV_FIELDS = ("id", "document_id", "front", "back")
+
+
+class DeckImportError(ValueError):
+    """Arquivo de importação ilegível ou fora do formato esperado."""
+
+
+# Erros dos leitores (campo grande demais no CSV, .apkg corrompido...) que
+# indicam um arquivo inválido, e não uma falha do servidor
+READ_ERRORS = (csv.Error, sqlite3.DatabaseError, zipfile.BadZipFile, zlib.error, EOFError)
+
+
+# --- Exportação ---------------------------------------------------------------
+
+def iter_csv(batches: Iterable[list[dict]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # Baralho vazio: ainda envia o cabeçalho
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_ndjson(batches: Iterable[list[dict]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch).encode("utf-8")
+
+
+# Esquema da coleção do Anki 2.1 no formato legado (collection.anki2, versão
+# 11), que todas as versões do Anki importam
+_ANKI_SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null,
+    scm integer not null, ver integer not null, dty integer not null,
+    usn integer not null, ls integer not null, conf text not null,
+    models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null,
+    mod integer not null, usn integer not null, tags text not null,
+    flds text not null, sfld integer not null, csum integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null,
+    ord integer not null, mod integer not null, usn integer not null,
+    type integer not null, queue integer not null, due integer not null,
+    ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null,
+    odid integer not null, flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null,
+    ease integer not null, ivl integer not null, lastIvl integer not null,
+    factor integer not null, time integer not null, type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn on notes (usn);
+CREATE INDEX ix_cards_usn on cards (usn);
+CREATE INDEX ix_revlog_usn on revlog (usn);
+CREATE INDEX ix_cards_nid on cards (nid);
+CREATE INDEX ix_cards_sched on cards (did, queue, due);
+CREATE INDEX ix_revlog_cid on revlog (cid);
+CREATE INDEX ix_notes_csum on notes (csum);
+"""
+
+# IDs fixos do tipo de nota e do baralho: reimportar o mesmo export atualiza
+# o baralho no Anki em vez de criar outro
+_ANKI_MODEL_ID = 1607392319
+_ANKI_DECK_ID_BASE = 1700000000000
+
+
+def _anki_deck(deck_id: int, name: str, now: int) -> dict:
+    return {
+        "id": deck_id, "name": name, "desc": "", "mod": now, "usn": -1, "dyn": 0, "conf": 1,
+        "collapsed": False, "browserCollapsed": False, "extendNew": 0, "extendRev": 0,
+        "newToday": [0, 0], "revToday": [0, 0], "lrnToday": [0, 0], "timeToday": [0, 0],
+    }
+
+
+def _anki_collection(deck_id: int, deck_name: str, now: int) -> tuple:
+    field = {"ord": 0, "sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []}
+    model = {
+        "id": _ANKI_MODEL_ID, "name": "Flashify", "type": 0, "mod": now, "usn": -1,
+        "sortf": 0, "did": deck_id, "tags": [], "vers": [], "req": [[0, "any", [0]]],
+        "flds": [{**field, "name": "Front"}, {**field, "name": "Back", "ord": 1}],
+        "tmpls": [{
+            "name": "Card 1", "ord": 0, "did": None, "bqfmt": "", "bafmt": "",
+            "qfmt": "{{Front}}", "afmt": "{{FrontSide}}\n\n<hr id=answer>\n\n{{Back}}",
+        }],
+        "css": ".card { font-family: arial; font-size: 20px; text-align: center; }",
+        "latexPre": "\\documentclass[12pt]{article}\n\\begin{document}\n",
+        "latexPost": "\\end{document}",
+    }
+    dconf = {
+        "id": 1, "name": "Default", "mod": 0, "usn": 0, "maxTaken": 60, "autoplay": True,
+        "timer": 0, "replayq": True, "dyn": False,
+        "new": {"bury": True, "delays": [1, 10], "initialFactor": 2500, "ints": [1, 4, 7],
+                "order": 1, "perDay": 20, "separate": True},
+        "lapse": {"delays": [10], "leechAction": 0, "leechFails": 8, "minInt": 1, "mult": 0},
+        "rev": {"bury": True, "ease4": 1.3, "fuzz": 0.05, "ivlFct": 1, "maxIvl": 36500,
+                "minSpace": 1, "perDay": 100},
+    }
+    conf = {"activeDecks": [1], "curDeck": 1, "newSpread": 0, "collapseTime": 1200,
+            "timeLim": 0, "estTimes": True, "dueCounts": True, "curModel": None,
+            "nextPos": 1, "sortType": "noteFld", "sortBackwards": False, "addToCur": True}
+    decks = {"1": _anki_deck(1, "Default", now), str(deck_id): _anki_deck(deck_id, deck_name, now)}
+    return (
+        1, now, now * 1000, now * 1000, 11, 0, 0, 0,
+        json.dumps(conf), json.dumps({str(_ANKI_MODEL_ID): model}), json.dumps(decks),
+        json.dumps({"1": dconf}), "{}",
+    )
+
+
+def _anki_checksum(text: str) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def build_apkg(batches: Iterable[list[dict]], deck_name: str, path: str) -> None:
+    """Monta o `.apkg` em `path`, gravando a coleção em disco lote a lote."""
+    now = int(time.time())
+    # O ID do baralho é derivado do nome, estável entre exportações
+    deck_id = _ANKI_DECK_ID_BASE + _anki_checksum(deck_name)
+    collection_path = f"{path}.anki2"
+    connection = sqlite3.connect(collection_path)
+    try:
+        connection.executescript(_ANKI_SCHEMA)
+        connection.execute(
+            "INSERT INTO col VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            _anki_collection(deck_id, deck_name, now),
+        )
+        position = 0
+        for batch in batches:
+            notes, cards = [], []
+            for row in batch:
+                position += 1
+                # IDs do Anki são timestamps em ms; o deslocamento garante unicidade
+                note_id = now * 1000 + position
+                front, back = html.escape(row["front"], quote=False), html.escape(row["back"], quote=False)
+                notes.append((
+                    note_id, f"flashify-{row['id']}", _ANKI_MODEL_ID, now, -1, "",
+                    f"{front}\x1f{back}", front, _anki_checksum(row["front"]), 0, "",
+                ))
+                # Cartões novos, na ordem do baralho
+                cards.append((note_id, note_id, deck_id, 0, now, -1, 0, 0, position, 0, 0, 0, 0, 0, 0, 0, 0, ""))
+            connection.executemany("INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", notes)
+            connection.executemany(
+                "INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", cards
+            )
+            connection.commit()
+    finally:
+        connection.close()
+
+    try:
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as package:
+            package.write(collection_path, "collection.anki2")
+            package.writestr("media", "{}")
+    finally:
+        os.unlink(collection_path)
+
+
+def iter_apkg(batches: Iterable[list[dict]], deck_name: str) -> Iterator[bytes]:
+    directory = tempfile.mkdtemp(prefix="flashify-apkg-")
+    try:
+        path = os.path.join(directory, "deck.apkg")
+        build_apkg(batches, deck_name, path)
+        with open(path, "rb") as f:
+            while chunk := f.read(FILE_CHUNK_SIZE):
+                yield chunk
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def iter_export(
+    session_factory,
+    export_format: str,
+    user_id: int,
+    deck_name: str,
+    document_id: Optional[int] = None,
+    folder_id: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Gera o arquivo exportado em pedaços. A sessão é aberta aqui (e não recebida
+    da requisição) porque o corpo da resposta é gerado depois que as
+    dependências da rota já foram encerradas.
+    """
+    with session_factory() as session:
+        batches = crud.iter_flashcards_for_export(
+            session, user_id, document_id=document_id, folder_id=folder_id, batch_size=EXPORT_BATCH_SIZE
+        )
+        if export_format == "csv":
+            yield from iter_csv(batches)
+        elif export_format == "ndjson":
+            yield from iter_ndjson(batches)
+        else:
+            yield from iter_apkg(batches, deck_name)
+
+
+# --- Importação ---------------------------------------------------------------
+
+def _clean(value) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    return value or None
+
+
+def iter_csv_rows(path: str) -> Iterator[dict]:
+    # utf-8-sig: aceita o BOM que o Excel grava
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or ()}
+        if "front" not in fields or "back" not in fields:
+            raise DeckImportError("O CSV precisa de um cabeçalho com as colunas 'front' e 'back'.")
+        for row in reader:
+            yield {"front": row.get(fields["front"]), "back": row.get(fields["back"])}
+
+
+def iter_ndjson_rows(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8-sig", errors="replace") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None  # Linha inválida: contada como ignorada
+            yield row if isinstance(row, dict) else {}
+
+
+_HTML_BREAK = re.compile(r"<br\s*/?>|</div>|</p>", re.IGNORECASE)
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def _from_anki_html(value: str) -> str:
+    return html.unescape(_HTML_TAG.sub("", _HTML_BREAK.sub("\n", value)))
+
+
+def iter_apkg_rows(path: str) -> Iterator[dict]:
+    """Lê as notas de um `.apkg` (os dois primeiros campos viram frente e verso)."""
+    try:
+        package = zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        raise DeckImportError("O arquivo não é um pacote .apkg válido.")
+    with package:
+        names = set(package.namelist())
+        # collection.anki21b (zstd, Anki 2.1.50+) exige "Compatibilidade com versões antigas" na exportação
+        name = next((n for n in ("collection.anki21", "collection.anki2") if n in names), None)
+        if name is None:
+            raise DeckImportError(
+                "Pacote .apkg sem coleção legível: exporte do Anki marcando o suporte a versões antigas."
+            )
+        with tempfile.TemporaryDirectory(prefix="flashify-apkg-") as directory:
+            collection_path = os.path.join(directory, "collection.anki2")
+            with package.open(name) as source, open(collection_path, "wb") as target:
+                shutil.copyfileobj(source, target, FILE_CHUNK_SIZE)
+            connection = sqlite3.connect(collection_path)
+            try:
+                cursor = connection.execute("SELECT flds FROM notes ORDER BY id")
+                while rows := cursor.fetchmany(IMPORT_BATCH_SIZE):
+                    for (fields,) in rows:
+                        values = fields.split("\x1f")
+                        yield {
+                            "front": _from_anki_html(values[0]),
+                            "back": _from_anki_html(values[1]) if len(values) > 1 else None,
+                        }
+            except sqlite3.DatabaseError:
+                raise DeckImportError("Coleção do Anki ilegível.")
+            finally:
+                connection.close()
+
+
+ROW_READERS = {"csv": iter_csv_rows, "ndjson": iter_ndjson_rows, "apkg": iter_apkg_rows}
+
+
+def iter_rows(import_format: str, path: str) -> Iterator[dict]:
+    """Lê as linhas do arquivo no formato dado, convertendo erros de leitura em `DeckImportError`."""
+    try:
+        yield from ROW_READERS[import_format](path)
+    except READ_ERRORS as e:
+        raise DeckImportError(f"Arquivo ilegível: {e}")
+
+
+def import_flashcards(
+    session: Session,
+    user_id: int,
+    import_format: str,
+    path: str,
+    folder_id: Optional[int] = None,
+    content_hash: Optional[str] = None,
+) -> dict:
+    """
+    Cria um documento para o baralho importado e grava os cartões do arquivo
+    nele, em lotes. Linhas sem frente ou verso são ignoradas e contadas em
+    `skipped`. Um arquivo ilegível levanta `DeckImportError`; se o erro
+    aparecer no meio do arquivo, o documento e os cartões já gravados são
+    apagados, e nada fica importado pela metade.
+    """
+    rows = iter_rows(import_format, path)
+    # Lê a primeira linha já aqui: erros de formato aparecem antes de gravar algo
+    first = next(rows, None)
+    document_id = crud.create_imported_document(
+        session, user_id=user_id, file_path=path, folder_id=folder_id, content_hash=content_hash
+    ).id
+
+    imported = skipped = 0
+    batch = []
+    try:
+        for row in itertools.chain([first] if first is not None else [], rows):
+            front, back = _clean(row.get("front")), _clean(row.get("back"))
+            if front is None or back is None:
+                skipped += 1
+                continue
+            batch.append({"front": front, "back": back})
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                imported += len(crud.create_flashcards_for_document(session, batch, document_id, user_id))
+                batch = []
+        if batch:
+            imported += len(crud.create_flashcards_for_document(session, batch, document_id, user_id))
+        duplicates.index_document(session, document_id, user_id)
+    except BaseException:
+        crud.delete_document(session, document_id)
+        raise
+    return {"document_id": document_id, "imported": imported, "skipped": skipped}
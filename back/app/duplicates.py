@@ -0,0 +1,211 @@
+# app/duplicates.py
+"""
+Detecção de flashcards quase idênticos entre os documentos de um usuário.
+
+Cada cartão recebe uma assinatura MinHash (sobre os 5-gramas de caracteres do
+texto normalizado de frente + verso), e a assinatura é dividida em faixas (LSH).
+Cada faixa vira um "balde" gravado na tabela `flashcardband`, com índice em
+(user_id, bucket): os candidatos a duplicata de um cartão novo são só os
+cartões que caem em algum dos mesmos baldes, buscados pelo índice em vez de
+comparados com todos os cartões do usuário. A similaridade dos candidatos é
+então estimada pelas assinaturas.
+
+Tudo roda localmente, sem serviços externos. Cartões considerados duplicatas
+apontam para o primeiro cartão do grupo (`Flashcard.duplicate_of`).
+"""
+import os
+import re
+import random
+import hashlib
+import operator
+from array import array
+from typing import Optional
+
+from sqlalchemy import insert, update
+from sqlmodel import Session, select
+
+from . import models
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 5
+# Similaridade de Jaccard estimada a partir da qual dois cartões são duplicatas
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", 0.7))
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Semente fixa: as assinaturas precisam ser iguais em todos os processos
+_rng = random.Random(20240917)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def _shingles(text: str) -> set[str]:
+    normalized = re.sub(r"\W+", " ", text).strip().casefold()
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> list[int]:
+    """Assinatura MinHash de `NUM_PERMUTATIONS` valores de 32 bits."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+        for shingle in _shingles(text)
+    ]
+    if not hashes:
+        return [_MAX_HASH] * NUM_PERMUTATIONS
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def lsh_buckets(signature: list[int]) -> list[int]:
+    """Um balde (inteiro de 64 bits com sinal) por faixa da assinatura."""
+    buckets = []
+    for band in range(LSH_BANDS):
+        values = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(
+            f"{band}:{','.join(map(str, values))}".encode(), digest_size=8
+        ).digest()
+        buckets.append(int.from_bytes(digest, "big", signed=True))
+    return buckets
+
+
+def similarity(a: list[int], b: list[int]) -> float:
+    """Estimativa da similaridade de Jaccard entre dois textos a partir das assinaturas."""
+    return sum(map(operator.eq, a, b)) / NUM_PERMUTATIONS
+
+
+def _card_text(front: str, back: str) -> str:
+    return f"{front} {back}"
+
+
+def _pack(signature: list[int]) -> bytes:
+    return array("I", signature).tobytes()
+
+
+def _unpack(data: bytes) -> list[int]:
+    return array("I", data).tolist()
+
+
+def index_flashcards(session: Session, user_id: int, flashcards: list[models.Flashcard]) -> dict[int, int]:
+    """
+    Indexa cartões recém-inseridos (sem commit) e marca os que duplicam cartões
+    já existentes do usuário (ou anteriores do mesmo lote).
+    Retorna {id do cartão: id do primeiro cartão do grupo} para os duplicados.
+
+    Os candidatos são comparados por grupo, e não cartão a cartão: um balde com
+    vários membros do mesmo grupo custa uma única comparação, com a assinatura
+    do primeiro cartão do grupo. Sem isso, um documento com muitos cartões
+    parecidos compara cada cartão novo com todos os anteriores.
+    """
+    if not flashcards:
+        return {}
+
+    signatures = {fc.id: minhash(_card_text(fc.front, fc.back)) for fc in flashcards}
+    buckets = {fc_id: lsh_buckets(signature) for fc_id, signature in signatures.items()}
+
+    # Uma única consulta pelo índice (user_id, bucket) traz todos os candidatos do lote
+    all_buckets = {bucket for card_buckets in buckets.values() for bucket in card_buckets}
+    rows = session.exec(
+        select(
+            models.FlashcardBand.bucket,
+            models.FlashcardBand.flashcard_id,
+            models.FlashcardSignature.minhash,
+            models.Flashcard.duplicate_of,
+        )
+        .join(models.FlashcardSignature, models.FlashcardSignature.flashcard_id == models.FlashcardBand.flashcard_id)
+        .join(models.Flashcard, models.Flashcard.id == models.FlashcardBand.flashcard_id)
+        .where(models.FlashcardBand.user_id == user_id, models.FlashcardBand.bucket.in_(all_buckets))
+    ).all()
+
+    # Balde -> grupos (identificados pelo primeiro cartão) com algum membro nele
+    by_bucket: dict[int, set[int]] = {}
+    group_signatures: dict[int, list[int]] = {}
+    for bucket, flashcard_id, packed, duplicate_of in rows:
+        group_id = duplicate_of or flashcard_id
+        by_bucket.setdefault(bucket, set()).add(group_id)
+        if group_id == flashcard_id or group_id not in group_signatures:
+            # O primeiro cartão representa o grupo; sem ele nos baldes, vale um membro
+            group_signatures[group_id] = _unpack(packed)
+
+    duplicates: dict[int, int] = {}
+    for fc in sorted(flashcards, key=lambda fc: fc.id):
+        signature = signatures[fc.id]
+        best_id, best_score = None, DUPLICATE_THRESHOLD
+        for group_id in set().union(*(by_bucket.get(b, ()) for b in buckets[fc.id])):
+            score = similarity(signature, group_signatures[group_id])
+            if score >= best_score:
+                best_id, best_score = group_id, score
+        if best_id is not None:
+            duplicates[fc.id] = best_id
+        else:
+            group_signatures[fc.id] = signature
+        # Os cartões do lote também são candidatos para os seguintes
+        group_id = duplicates.get(fc.id, fc.id)
+        for bucket in buckets[fc.id]:
+            by_bucket.setdefault(bucket, set()).add(group_id)
+
+    session.execute(insert(models.FlashcardSignature), [
+        {"flashcard_id": fc_id, "user_id": user_id, "minhash": _pack(signature)}
+        for fc_id, signature in signatures.items()
+    ])
+    session.execute(insert(models.FlashcardBand), [
+        {"flashcard_id": fc_id, "band": band, "user_id": user_id, "bucket": bucket}
+        for fc_id, card_buckets in buckets.items()
+        for band, bucket in enumerate(card_buckets)
+    ])
+    if duplicates:
+        session.execute(update(models.Flashcard), [
+            {"id": fc_id, "duplicate_of": canonical_id} for fc_id, canonical_id in duplicates.items()
+        ])
+        for fc in flashcards:
+            fc.duplicate_of = duplicates.get(fc.id)
+    return duplicates
+
+
+def index_document(session: Session, document_id: int, user_id: Optional[int] = None) -> int:
+    """
+    Indexa, em uma passada, os cartões do documento que ainda não têm
+    assinatura, e faz o commit. Roda depois que os cartões foram gravados (fim
+    do pipeline ou da importação), e não a cada lote inserido: o MinHash é a
+    parte cara da gravação. Retorna quantos cartões foram indexados.
+    """
+    if user_id is None:
+        user_id = session.exec(
+            select(models.Document.user_id).where(models.Document.id == document_id)
+        ).one()
+    flashcards = session.exec(
+        select(models.Flashcard)
+        .outerjoin(models.FlashcardSignature, models.FlashcardSignature.flashcard_id == models.Flashcard.id)
+        .where(models.Flashcard.document_id == document_id, models.FlashcardSignature.flashcard_id.is_(None))
+        .order_by(models.Flashcard.id)
+    ).all()
+    session.expunge_all()
+    index_flashcards(session, user_id, flashcards)
+    session.commit()
+    return len(flashcards)
+
+
+def index_missing(session: Session) -> int:
+    """Indexa os cartões que ainda não têm assinatura (ex.: criados antes da migração 0006)."""
+    document_ids = session.exec(
+        select(models.Flashcard.document_id)
+        .outerjoin(models.FlashcardSignature, models.FlashcardSignature.flashcard_id == models.Flashcard.id)
+        .where(models.FlashcardSignature.flashcard_id.is_(None))
+        .distinct()
+        .order_by(models.Flashcard.document_id)
+    ).all()
+    return sum(index_document(session, document_id) for document_id in document_ids)
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    with Session(engine) as session:
+        print(f"{index_missing(session)} flashcards indexados.")
@@ -0,0 +1,184 @@
+# app/events.py
+"""
+Eventos de progresso do processamento de documentos.
+
+As tarefas do Celery publicam cada mudança de etapa (e o avanço por página e
+por trecho) no canal do documento; a API repassa esses eventos aos clientes
+conectados por SSE ou WebSocket, que deixam de consultar o status em loop.
+
+- `redis` (padrão): Redis pub/sub. Cada processo da API mantém uma única
+  conexão de assinatura e distribui as mensagens para as filas locais.
+- `memory`: barramento no próprio processo, para testes e para o modo eager do
+  Celery (as tarefas rodam no mesmo processo da API).
+"""
+import os
+import json
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import redis
+import redis.asyncio
+
+from .worker import celery_app
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Sem valor, usa a memória com o Celery em modo eager: não há outro processo publicando
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND")
+
+CHANNEL_PREFIX = "flashify:events:document:"
+TERMINAL_STATUSES = ("COMPLETED", "FAILED")
+
+
+class EventStreamClosed(Exception):
+    """O barramento perdeu a conexão; o cliente deve se reconectar."""
+
+
+class Subscription:
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+
+    def _put(self, event: Optional[dict]) -> None:
+        # Chamado de qualquer thread (ex.: tarefa eager rodando no threadpool)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Aguarda o próximo evento; devolve None se `timeout` expirar antes."""
+        try:
+            event = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is None:
+            raise EventStreamClosed()
+        return event
+
+
+class InMemoryEventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+
+    def publish(self, document_id: int, event: dict) -> None:
+        self._dispatch(document_id, event)
+
+    def _dispatch(self, document_id: int, event: Optional[dict]) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(document_id, ()))
+        for subscription in subscriptions:
+            subscription._put(event)
+
+    async def _on_first_subscriber(self, document_id: int) -> None:
+        pass
+
+    async def _on_last_unsubscribe(self, document_id: int) -> None:
+        pass
+
+    @asynccontextmanager
+    async def subscribe(self, document_id: int) -> AsyncIterator[Subscription]:
+        """Recebe os eventos publicados para o documento enquanto o bloco estiver aberto."""
+        subscription = Subscription()
+        with self._lock:
+            first = not self._subscriptions[document_id]
+            self._subscriptions[document_id].add(subscription)
+        try:
+            if first:
+                await self._on_first_subscriber(document_id)
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions[document_id].discard(subscription)
+                last = not self._subscriptions[document_id]
+                if last:
+                    del self._subscriptions[document_id]
+            if last:
+                await self._on_last_unsubscribe(document_id)
+
+
+class RedisEventBus(InMemoryEventBus):
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self._publisher = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def publish(self, document_id: int, event: dict) -> None:
+        # Publicar é síncrono: é chamado pelas tarefas do Celery
+        try:
+            if self._publisher is None:
+                self._publisher = redis.Redis.from_url(self.url)
+            self._publisher.publish(f"{CHANNEL_PREFIX}{document_id}", json.dumps(event))
+        except redis.RedisError as e:
+            print(f"Não foi possível publicar o evento do Documento ID {document_id}: {e}")
+
+    async def _on_first_subscriber(self, document_id: int) -> None:
+        if self._pubsub is None:
+            client = redis.asyncio.Redis.from_url(self.url, decode_responses=True)
+            self._pubsub = client.pubsub()
+        await self._pubsub.subscribe(f"{CHANNEL_PREFIX}{document_id}")
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _on_last_unsubscribe(self, document_id: int) -> None:
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.unsubscribe(f"{CHANNEL_PREFIX}{document_id}")
+            except redis.RedisError:
+                pass
+
+    async def _listen(self) -> None:
+        """Lê a conexão de assinatura do processo e distribui as mensagens."""
+        pubsub = self._pubsub
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None or message["type"] != "message":
+                    continue
+                document_id = int(message["channel"].removeprefix(CHANNEL_PREFIX))
+                self._dispatch(document_id, json.loads(message["data"]))
+        except (redis.RedisError, OSError) as e:
+            print(f"Conexão de eventos com o Redis perdida: {e}")
+            self._pubsub = None
+            await pubsub.aclose()
+            # Encerra os fluxos abertos: os clientes se reconectam e reassinam
+            with self._lock:
+                document_ids = list(self._subscriptions)
+            for document_id in document_ids:
+                self._dispatch(document_id, None)
+
+
+_bus: Optional[InMemoryEventBus] = None
+
+
+def get_bus() -> InMemoryEventBus:
+    global _bus
+    if _bus is None:
+        backend = EVENTS_BACKEND or ("memory" if celery_app.conf.task_always_eager else "redis")
+        _bus = RedisEventBus(REDIS_URL) if backend == "redis" else InMemoryEventBus()
+    return _bus
+
+
+def set_bus(bus: InMemoryEventBus) -> None:
+    """Substitui o barramento (ex.: por um `InMemoryEventBus` em testes)."""
+    global _bus
+    _bus = bus
+
+
+def publish(document_id: int, event: str, **data) -> None:
+    """Publica um evento do documento, ex.: `publish(1, "status", status="COMPLETED")`."""
+    get_bus().publish(document_id, {"event": event, "document_id": document_id, **data})
+
+
+def publish_status(document_id: int, status: str, **data) -> None:
+    publish(document_id, "status", status=status, **data)
+
+
+def publish_progress(document_id: int, stage: str, done: int, total: int, **data) -> None:
+    publish(document_id, "progress", stage=stage, done=done, total=total, **data)
+
+
+def is_terminal(event: dict) -> bool:
+    return event.get("event") == "status" and event.get("status") in TERMINAL_STATUSES
@@ -0,0 +1,92 @@
+# app/json_stream.py
+"""
+Leitura incremental de JSON recebido em pedaços (ex.: a resposta em streaming
+do Gemini).
+
+`ArrayObjectParser` procura o primeiro array do documento (no formato do
+prompt, `{"flashcards": [...]}`) e devolve cada objeto desse array assim que o
+seu `}` chega, sem esperar o fim da resposta. Cada objeto é decodificado
+isoladamente: um objeto malformado é descartado sem perder os demais. Texto
+fora do JSON (ex.: cercas ```json) é ignorado.
+"""
+import json
+import re
+
+# Caracteres que mudam o estado do parser; o resto é copiado sem inspeção
+_SPECIAL = re.compile(r'["\\{}\[\]]')
+
+
+class ArrayObjectParser:
+    def __init__(self):
+        self._in_array = False
+        self._finished = False
+        self._in_string = False
+        self._escaped = False
+        # Profundidade dentro do objeto atual (0 = entre os itens do array)
+        self._depth = 0
+        self._current: list[str] = []
+        self.invalid = 0
+
+    @property
+    def found_array(self) -> bool:
+        return self._in_array
+
+    def feed(self, text: str) -> list[dict]:
+        """Consome mais um pedaço do texto e devolve os objetos completados nele."""
+        objects = []
+        position = 0
+        while position < len(text) and not self._finished:
+            match = _SPECIAL.search(text, position)
+            end = match.start() if match else len(text)
+            if end > position:
+                # Um caractere escapado que não é especial fica neste trecho
+                # (inclusive quando a `\` veio no fim do pedaço anterior)
+                self._escaped = False
+                if self._depth:
+                    self._current.append(text[position:end])
+            if match is None:
+                break
+            char = match.group()
+            position = match.end()
+            if self._depth:
+                self._current.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif not self._in_array:
+                self._in_array = char == "["
+            elif char in "{[":
+                if not self._depth:
+                    self._current = [char]
+                self._depth += 1
+            elif char in "}]":
+                if not self._depth:
+                    # `]` entre os itens fecha o array: o resto da resposta é ignorado
+                    self._finished = char == "]"
+                    continue
+                self._depth -= 1
+                if not self._depth:
+                    obj = self._decode("".join(self._current))
+                    self._current = []
+                    if obj is not None:
+                        objects.append(obj)
+        return objects
+
+    def _decode(self, text: str):
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            obj = None
+        if not isinstance(obj, dict):
+            self.invalid += 1
+            return None
+        return obj
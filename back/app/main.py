@@ -1,28 +1,40 @@
 # app/main.py
 # app/main.py
-from fastapi import FastAPI
-from sqlmodel import SQLModel
-from .database import engine 
+from fastapi import FastAPI, Response
 from .routers import auth
 from .routers import folders
 from .routers import documents
+from .routers import reviews
+from .routers import search
+from .routers import duplicates
+from .routers import decks
 
-# Importe o modelo para que ele seja registrado pelo SQLModel
-from . import models
+from . import metrics, passwords
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+# O esquema do banco é criado e atualizado pelas migrações do Alembic
+# (`alembic upgrade head`), e não mais na inicialização da API.
 
 app = FastAPI(title="Flashify API")
+app.add_middleware(metrics.RequestMetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(folders.router)
 app.include_router(documents.router)
+app.include_router(reviews.router)
+app.include_router(search.router)
+app.include_router(duplicates.router)
+app.include_router(decks.router)
 
-@app.on_event("startup")
-def on_startup():
-    create_db_and_tables()
+@app.on_event("shutdown")
+def on_shutdown():
+    passwords.shutdown_pool()
 
 @app.get("/")
 def read_root():
-    return {"message": "Bem-vindo à API do Flashify!"}
\ No newline at end of file
+    return {"message": "Bem-vindo à API do Flashify!"}
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    # Formato de exposição do Prometheus (somando os processos no modo multiprocesso)
+    content, content_type = metrics.render_latest()
+    return Response(content=content, media_type=content_type)
@@ -0,0 +1,247 @@
+# app/metrics.py
+"""
+Métricas (Prometheus) e medições de tempo do pipeline e da API.
+
+- `span(stage, file_type)`: mede uma etapa do pipeline, alimenta o histograma
+  por etapa e tipo de arquivo e registra uma linha JSON com a duração.
+- `external_call(service)`: mede as chamadas ao Gemini e ao Vision.
+- Espera por cota no limite de uso do Gemini (ver `rate_limit.py`).
+- Contadores de páginas, flashcards, tokens, cache e falhas.
+- `RequestMetricsMiddleware`: latência das requisições HTTP por rota.
+- `maybe_profile(...)`: grava um cProfile de uma fração das tarefas.
+
+Com vários processos (workers do uvicorn, processos filhos do Celery), defina
+`PROMETHEUS_MULTIPROC_DIR` com um diretório vazio antes de iniciar cada
+serviço: cada processo grava suas métricas ali e a coleta soma todos eles.
+"""
+import os
+import json
+import time
+import random
+import cProfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Registra cada etapa medida como uma linha JSON na saída padrão
+LOG_SPANS = os.getenv("LOG_SPANS", "true").lower() == "true"
+# Fração das tarefas do pipeline que têm o perfil (cProfile) gravado em PROFILE_DIR
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+
+# Etapas longas (extração de PDFs grandes, geração) precisam de baldes de minutos
+_STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+STAGE_DURATION = Histogram(
+    "flashify_stage_duration_seconds",
+    "Duração de cada etapa do pipeline de processamento",
+    ["stage", "file_type"],
+    buckets=_STAGE_BUCKETS,
+)
+EXTERNAL_CALL_DURATION = Histogram(
+    "flashify_external_call_duration_seconds",
+    "Duração das chamadas às APIs externas (Gemini, Vision)",
+    ["service"],
+    buckets=_STAGE_BUCKETS,
+)
+EXTERNAL_CALL_ERRORS = Counter(
+    "flashify_external_call_errors_total",
+    "Chamadas às APIs externas que falharam",
+    ["service"],
+)
+EXTERNAL_CALL_RETRIES = Counter(
+    "flashify_external_call_retries_total",
+    "Chamadas às APIs externas repetidas depois de um erro temporário",
+    ["service", "reason"],
+)
+RATE_LIMIT_WAIT = Histogram(
+    "flashify_rate_limit_wait_seconds",
+    "Espera por cota no limite de uso compartilhado, por prioridade",
+    ["limiter", "priority"],
+    buckets=_STAGE_BUCKETS,
+)
+PAGES_EXTRACTED = Counter(
+    "flashify_pages_extracted_total",
+    "Páginas (ou imagens) com texto extraído",
+    ["file_type"],
+)
+OCR_PAGES = Counter(
+    "flashify_ocr_pages_total",
+    "Páginas digitalizadas e imagens enviadas ao OCR",
+    ["file_type"],
+)
+VISION_BYTES_SENT = Counter(
+    "flashify_vision_bytes_sent_total",
+    "Bytes de imagem enviados ao Vision",
+)
+FLASHCARDS_CREATED = Counter(
+    "flashify_flashcards_created_total",
+    "Flashcards gravados, gerados pela IA ou reaproveitados do cache",
+    ["source"],
+)
+GEMINI_TOKENS = Counter(
+    "flashify_gemini_tokens_total",
+    "Tokens consumidos nas chamadas ao Gemini",
+    ["direction"],
+)
+CACHE_LOOKUPS = Counter(
+    "flashify_cache_lookups_total",
+    "Consultas ao cache de resultados do processamento",
+    ["cache", "result"],
+)
+PIPELINE_FAILURES = Counter(
+    "flashify_pipeline_failures_total",
+    "Etapas do pipeline que falharam depois de esgotar as tentativas",
+    ["stage"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "flashify_http_request_duration_seconds",
+    "Tempo até o início da resposta de cada requisição HTTP",
+    ["method", "route", "status"],
+)
+
+
+def file_type_of(file_path: str) -> str:
+    suffix = Path(file_path).suffix.lower()
+    if suffix == ".pdf":
+        return "pdf"
+    if suffix in (".png", ".jpg", ".jpeg"):
+        return "image"
+    return "other"
+
+
+@contextmanager
+def span(stage: str, file_type: str = "other", **fields):
+    """Mede uma etapa do pipeline; `fields` vão apenas para a linha de log."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.labels(stage=stage, file_type=file_type).observe(elapsed)
+        if LOG_SPANS:
+            print(json.dumps({
+                "span": stage,
+                "file_type": file_type,
+                "duration_ms": round(elapsed * 1000, 1),
+                "outcome": outcome,
+                **fields,
+            }))
+
+
+@contextmanager
+def external_call(service: str):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        EXTERNAL_CALL_ERRORS.labels(service=service).inc()
+        raise
+    finally:
+        EXTERNAL_CALL_DURATION.labels(service=service).observe(time.perf_counter() - start)
+
+
+def record_gemini_usage(response) -> None:
+    """Soma os tokens informados pela resposta do Gemini (quando disponíveis)."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    GEMINI_TOKENS.labels(direction="prompt").inc(getattr(usage, "prompt_token_count", 0) or 0)
+    GEMINI_TOKENS.labels(direction="completion").inc(getattr(usage, "candidates_token_count", 0) or 0)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+@contextmanager
+def maybe_profile(name: str, document_id: Optional[int] = None):
+    """Grava o perfil (cProfile) de uma amostra das execuções, conforme PROFILE_SAMPLE_RATE."""
+    if PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        path = PROFILE_DIR / f"{name}-{document_id}-{time.time_ns()}.prof"
+        profiler.dump_stats(path)
+        print(f"Perfil de {name} (Documento ID {document_id}) gravado em {path}")
+
+
+def collector_registry() -> CollectorRegistry:
+    """Registro a expor: soma de todos os processos no modo multiprocesso."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_latest() -> tuple[bytes, str]:
+    return generate_latest(collector_registry()), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Descarta os arquivos de métricas "ao vivo" de um processo que terminou."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+class RequestMetricsMiddleware:
+    """
+    Middleware ASGI que mede o tempo até o início da resposta, por rota (o
+    modelo da rota, ex.: /documents/{document_id}, e não o caminho real).
+    Respostas em streaming (ex.: SSE) não contam o tempo em que ficam abertas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        observed = False
+
+        def observe(status_code: int) -> None:
+            nonlocal observed
+            observed = True
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            ).observe(time.perf_counter() - start)
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start" and not observed:
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        except Exception:
+            if not observed:
+                observe(500)
+            raise
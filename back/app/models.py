@@ -1,12 +1,15 @@
 # app/models.py
 from typing import Optional, List
+from datetime import datetime, timezone
 from sqlmodel import Field, SQLModel, Relationship
 from enum import Enum # Importe Enum
-from sqlalchemy import Column, Text
+from sqlalchemy import BigInteger, Column, DateTime, Index, LargeBinary, Text
 
 # Crie uma Enum para o status do documento
 class DocumentStatus(str, Enum):
-    PROCESSING = "PROCESSING"
+    PROCESSING = "PROCESSING" # Na fila, aguardando o início do pipeline
+    EXTRACTING = "EXTRACTING"
+    GENERATING = "GENERATING"
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
 
@@ -28,24 +31,41 @@ class Folder(SQLModel, table=True):
     name: str = Field(index=True)
 
     # Chave estrangeira para conectar a pasta a um usuário
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
 
     # Relação de volta para o usuário
     user: User = Relationship(back_populates="folders")
     documents: List["Document"] = Relationship(back_populates="folder")
 
+# Lote de arquivos enviados juntos (vários arquivos ou um ZIP) em um único upload
+class UploadBatch(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    folder_id: Optional[int] = Field(default=None, foreign_key="folder.id")
+    total: int
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
+
+    documents: List["Document"] = Relationship(back_populates="batch")
+
 class Document(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     file_path: str # Caminho para o arquivo salvo (S3 ou local)
+    content_hash: Optional[str] = Field(default=None, index=True) # SHA-256 do arquivo
     status: DocumentStatus = Field(default=DocumentStatus.PROCESSING)
     extracted_text: Optional[str] = Field(default=None, sa_column=Column(Text))
 
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
     user: User = Relationship(back_populates="documents")
 
-    folder_id: Optional[int] = Field(default=None, foreign_key="folder.id")
+    folder_id: Optional[int] = Field(default=None, foreign_key="folder.id", index=True)
     folder: Optional[Folder] = Relationship(back_populates="documents")
 
+    batch_id: Optional[int] = Field(default=None, foreign_key="uploadbatch.id", index=True)
+    batch: Optional[UploadBatch] = Relationship(back_populates="documents")
+
     flashcards: List["Flashcard"] = Relationship(back_populates="document")
 
 # NOVO MODELO FLASHCARD
@@ -54,5 +74,60 @@ class Flashcard(SQLModel, table=True):
     front: str
     back: str
 
-    document_id: int = Field(foreign_key="document.id")
-    document: Document = Relationship(back_populates="flashcards")
\ No newline at end of file
+    document_id: int = Field(foreign_key="document.id", index=True)
+    document: Document = Relationship(back_populates="flashcards")
+
+    # Primeiro cartão do grupo de quase duplicatas a que este cartão pertence
+    duplicate_of: Optional[int] = Field(default=None, foreign_key="flashcard.id", index=True)
+
+# Cache de resultados do processamento, indexado pelo hash do conteúdo do arquivo
+class ProcessingCache(SQLModel, table=True):
+    content_hash: str = Field(primary_key=True)
+    extracted_text: Optional[str] = Field(default=None, sa_column=Column(Text))
+    # Versão da extração (ver `text_extractor.EXTRACTOR_VERSION`) que gerou o texto
+    extractor_version: Optional[str] = None
+
+    # Flashcards em JSON e a versão do prompt/modelo que os gerou
+    flashcards: Optional[str] = Field(default=None, sa_column=Column(Text))
+    generator_version: Optional[str] = None
+
+    # Indexado para a remoção das entradas expiradas (`cache.evict_expired`)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
+
+
+# Estado de revisão espaçada (SM-2) de cada flashcard
+class ReviewState(SQLModel, table=True):
+    # A fila de revisão ("próximos N cartões vencidos do usuário") é servida
+    # diretamente por este índice composto.
+    __table_args__ = (Index("ix_reviewstate_user_id_due_at", "user_id", "due_at"),)
+
+    flashcard_id: int = Field(foreign_key="flashcard.id", primary_key=True)
+    user_id: int = Field(foreign_key="user.id")
+
+    ease_factor: float = Field(default=2.5)
+    interval_days: int = Field(default=0)
+    repetitions: int = Field(default=0)
+    lapses: int = Field(default=0)
+
+    due_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    last_reviewed_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+
+
+# Assinatura MinHash de cada flashcard, para a detecção de quase duplicatas
+class FlashcardSignature(SQLModel, table=True):
+    flashcard_id: int = Field(foreign_key="flashcard.id", primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    minhash: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+
+
+# Baldes LSH de cada flashcard: cartões parecidos caem no mesmo balde em ao
+# menos uma das faixas, e os candidatos são buscados por (user_id, bucket).
+class FlashcardBand(SQLModel, table=True):
+    __table_args__ = (Index("ix_flashcardband_user_id_bucket", "user_id", "bucket"),)
+
+    flashcard_id: int = Field(foreign_key="flashcard.id", primary_key=True)
+    band: int = Field(primary_key=True)
+    user_id: int = Field(foreign_key="user.id")
+    bucket: int = Field(sa_column=Column(BigInteger, nullable=False))
@@ -0,0 +1,73 @@
+# app/passwords.py
+"""
+Hash de senhas com bcrypt fora das threads de requisição.
+
+O bcrypt é propositalmente lento. Em um pico de logins, rodar o hash nas threads
+das requisições esgota o threadpool e trava endpoints que não têm nada a ver com
+autenticação. Aqui o trabalho vai para um pool de processos de tamanho limitado,
+e os endpoints assíncronos apenas aguardam o resultado.
+
+Este módulo não importa o restante da aplicação, para que os processos do pool
+sejam leves.
+"""
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# 0 desativa o pool: o hash roda no threadpool, como antes
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Indica se o hash usa parâmetros obsoletos e deve ser refeito no próximo login."""
+    return pwd_context.needs_update(hashed_password)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if PASSWORD_HASH_WORKERS > 0 and _pool is None:
+        # forkserver evita herdar threads e conexões do processo da API
+        _pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+    return _pool
+
+
+async def _run(func, *args):
+    pool = _get_pool()
+    if pool is None:
+        return await run_in_threadpool(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run(get_password_hash, password)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
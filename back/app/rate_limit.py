@@ -0,0 +1,233 @@
+# app/rate_limit.py
+"""
+Limite de uso do Gemini compartilhado por todos os workers (token bucket).
+
+Dois baldes são consumidos juntos a cada chamada: requisições por minuto e
+tokens por minuto. Cada balde se enche continuamente na taxa da cota e guarda
+no máximo um minuto de cota, então o ritmo sustentado fica exatamente no
+limite contratado, sem os 429 de quando cada worker chamava por conta própria.
+
+Prioridades: chamadas `bulk` (importações em lote) só consomem enquanto os
+baldes ficam acima de uma reserva (`GEMINI_BULK_RESERVE`, fração da cota); a
+reserva atende primeiro as chamadas `interactive` (uploads avulsos). Com fila
+de lote cheia, o lote roda na taxa da cota e um upload avulso ainda encontra
+capacidade livre.
+
+- `redis` (padrão): estado em um hash do Redis, atualizado por um script Lua
+  atômico com o relógio do próprio Redis.
+- `memory`: estado no processo, para testes e para o modo eager do Celery.
+"""
+import os
+import time
+import random
+import threading
+from typing import Optional
+
+import redis
+
+from . import clients, metrics
+from .worker import celery_app
+
+REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+# Sem valor, usa a memória quando o Celery roda as tarefas no próprio processo (eager)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND")
+
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", 60))
+GEMINI_TOKENS_PER_MINUTE = float(os.getenv("GEMINI_TOKENS_PER_MINUTE", 1_000_000))
+# Fração da cota que as chamadas em lote não podem consumir
+GEMINI_BULK_RESERVE = float(os.getenv("GEMINI_BULK_RESERVE", 0.05))
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+KEY_PREFIX = "flashify:ratelimit:"
+# Espera máxima entre duas consultas ao balde (o estado muda com os outros workers)
+_MAX_POLL_SECONDS = 2.0
+
+
+def _reserve_for(priority: str) -> float:
+    return GEMINI_BULK_RESERVE if priority == PRIORITY_BULK else 0.0
+
+
+class InMemoryRateLimiter:
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = GEMINI_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = GEMINI_TOKENS_PER_MINUTE,
+    ):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._requests = requests_per_minute
+        self._tokens = tokens_per_minute
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+        self._updated = now
+
+    def _try_acquire(self, tokens: float, reserve: float) -> float:
+        """Consome uma requisição e `tokens`; devolve 0 ou quantos segundos esperar."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._blocked_until > now:
+                return self._blocked_until - now
+            missing_requests = 1 + reserve * self.requests_per_minute - self._requests
+            missing_tokens = tokens + reserve * self.tokens_per_minute - self._tokens
+            wait = max(
+                0.0,
+                missing_requests * 60 / self.requests_per_minute,
+                missing_tokens * 60 / self.tokens_per_minute,
+            )
+            if wait == 0:
+                self._requests -= 1
+                self._tokens -= tokens
+            return wait
+
+    def _adjust_tokens(self, delta: float) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.tokens_per_minute, self._tokens + delta)
+
+    def _block(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens: float, priority: str = PRIORITY_INTERACTIVE) -> float:
+        """
+        Espera até haver cota para uma chamada de `tokens` tokens (estimados) e
+        a consome. Devolve quantos segundos a chamada ficou esperando.
+        """
+        reserve = _reserve_for(priority)
+        # Uma chamada maior que o balde nunca caberia: limita ao que cabe
+        tokens = min(tokens, self.tokens_per_minute * (1 - reserve))
+        start = time.perf_counter()
+        while True:
+            wait = self._try_acquire(tokens, reserve)
+            if wait <= 0:
+                break
+            # Jitter: workers que esperam o mesmo balde não acordam juntos
+            time.sleep(min(wait, _MAX_POLL_SECONDS) * random.uniform(1.0, 1.2))
+        waited = time.perf_counter() - start
+        metrics.RATE_LIMIT_WAIT.labels(limiter=self.name, priority=priority).observe(waited)
+        return waited
+
+    def settle(self, estimated_tokens: float, actual_tokens: float) -> None:
+        """Corrige o balde com o consumo real informado pela resposta."""
+        if actual_tokens != estimated_tokens:
+            self._adjust_tokens(estimated_tokens - actual_tokens)
+
+    def penalize(self, seconds: float) -> None:
+        """Pausa todas as chamadas por `seconds` (ex.: depois de um 429 da API)."""
+        self._block(seconds)
+
+
+# Estado: hash com os níveis dos baldes, o instante da última atualização e o
+# fim da pausa. O tempo vem do Redis, igual para todos os workers.
+_ACQUIRE_SCRIPT = """
+redis.replicate_commands()
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local rpm, tpm = tonumber(ARGV[1]), tonumber(ARGV[2])
+local tokens, reserve = tonumber(ARGV[3]), tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'updated', 'blocked_until')
+local requests_level = tonumber(state[1]) or rpm
+local tokens_level = tonumber(state[2]) or tpm
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+requests_level = math.min(rpm, requests_level + elapsed * rpm / 60)
+tokens_level = math.min(tpm, tokens_level + elapsed * tpm / 60)
+local wait = 0
+local blocked_until = tonumber(state[4]) or 0
+if blocked_until > now then
+    wait = blocked_until - now
+else
+    wait = math.max(0, (1 + reserve * rpm - requests_level) * 60 / rpm,
+                       (tokens + reserve * tpm - tokens_level) * 60 / tpm)
+    if wait == 0 then
+        requests_level = requests_level - 1
+        tokens_level = tokens_level - tokens
+    end
+end
+redis.call('HSET', KEYS[1], 'requests', requests_level, 'tokens', tokens_level, 'updated', now)
+redis.call('EXPIRE', KEYS[1], 120)
+return tostring(wait)
+"""
+
+_ADJUST_SCRIPT = """
+local level = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if level then
+    redis.call('HSET', KEYS[1], 'tokens', math.min(tonumber(ARGV[2]), level + tonumber(ARGV[1])))
+end
+return 0
+"""
+
+_BLOCK_SCRIPT = """
+redis.replicate_commands()
+local clock = redis.call('TIME')
+local until_ = tonumber(clock[1]) + tonumber(clock[2]) / 1000000 + tonumber(ARGV[1])
+local current = tonumber(redis.call('HGET', KEYS[1], 'blocked_until')) or 0
+if until_ > current then
+    redis.call('HSET', KEYS[1], 'blocked_until', until_)
+    redis.call('EXPIRE', KEYS[1], math.max(120, math.ceil(tonumber(ARGV[1])) + 60))
+end
+return 0
+"""
+
+
+class RedisRateLimiter(InMemoryRateLimiter):
+    def __init__(self, name: str, url: str, **kwargs):
+        super().__init__(name, **kwargs)
+        self.url = url
+        self.key = f"{KEY_PREFIX}{name}"
+        self._scripts = {}
+
+    def _run(self, script: str, *args) -> Optional[str]:
+        try:
+            if script not in self._scripts:
+                self._scripts[script] = clients.get_redis(self.url).register_script(script)
+            return self._scripts[script](keys=[self.key], args=args)
+        except redis.RedisError as e:
+            # Sem o Redis, segue sem limite: os 429 ainda são tratados com retry
+            print(f"Limite de uso no Redis indisponível: {e}")
+            return None
+
+    def _try_acquire(self, tokens: float, reserve: float) -> float:
+        wait = self._run(_ACQUIRE_SCRIPT, self.requests_per_minute, self.tokens_per_minute, tokens, reserve)
+        return float(wait) if wait is not None else 0.0
+
+    def _adjust_tokens(self, delta: float) -> None:
+        self._run(_ADJUST_SCRIPT, delta, self.tokens_per_minute)
+
+    def _block(self, seconds: float) -> None:
+        self._run(_BLOCK_SCRIPT, seconds)
+
+
+_limiters: dict[str, InMemoryRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str = "gemini") -> InMemoryRateLimiter:
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                backend = RATE_LIMIT_BACKEND or ("memory" if celery_app.conf.task_always_eager else "redis")
+                if backend == "redis":
+                    limiter = RedisRateLimiter(name, REDIS_URL)
+                else:
+                    limiter = InMemoryRateLimiter(name)
+                _limiters[name] = limiter
+    return limiter
+
+
+def set_limiter(limiter: InMemoryRateLimiter) -> None:
+    """Substitui o limitador `limiter.name` (ex.: por um `InMemoryRateLimiter` em testes)."""
+    _limiters[limiter.name] = limiter
@@ -1,42 +1,63 @@
 # app/routers/auth.py
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session
 from typing import Annotated
 
-from .. import crud, schemas, security
+from .. import crud, models, passwords, schemas, security
 from ..database import get_session
 
 router = APIRouter(tags=["Authentication"]) # Mudei a tag para agrupar
+CurrentUser = Annotated[models.User, Depends(security.get_current_user)]
 
 # Endpoint de Criação de Usuário (já existente)
 @router.post("/users", response_model=schemas.UserRead, status_code=status.HTTP_201_CREATED)
-def create_new_user(user: schemas.UserCreate, session: Session = Depends(get_session)):
-    db_user = crud.get_user_by_email(session=session, email=user.email)
+async def create_new_user(user: schemas.UserCreate, session: Session = Depends(get_session)):
+    db_user = await run_in_threadpool(crud.get_user_by_email, session=session, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email já registrado."
         )
-    return crud.create_user(session=session, user_create=user)
+    # O bcrypt roda no pool de processos, sem ocupar o threadpool da API
+    hashed_password = await passwords.get_password_hash_async(user.password)
+    return await run_in_threadpool(
+        crud.create_user, session=session, user_create=user, hashed_password=hashed_password
+    )
+
+
+@router.delete("/users/me", status_code=status.HTTP_204_NO_CONTENT)
+def deactivate_current_user(current_user: CurrentUser, session: Session = Depends(get_session)):
+    """
+    Desativa a conta do usuário. Os tokens já emitidos deixam de ser aceitos
+    (os caches de autenticação são limpos em `crud.set_user_active`).
+    """
+    db_user = crud.get_user_by_email(session=session, email=current_user.email)
+    crud.set_user_active(session, db_user, is_active=False)
 
 
 # NOVO ENDPOINT DE LOGIN
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     session: Session = Depends(get_session)
 ):
     # 1. Busca o usuário pelo email (no formulário, o campo é 'username')
-    user = crud.get_user_by_email(session=session, email=form_data.username)
+    user = await run_in_threadpool(crud.get_user_by_email, session=session, email=form_data.username)
     
     # 2. Verifica se o usuário existe e se a senha está correta
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user or not await passwords.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Refaz o hash se os parâmetros do bcrypt mudaram desde o cadastro
+    if passwords.needs_rehash(user.hashed_password):
+        new_hash = await passwords.get_password_hash_async(form_data.password)
+        await run_in_threadpool(crud.update_user_password_hash, session, user, new_hash)
         
     # 3. Cria o token de acesso
     access_token = security.create_access_token(subject=user.email)
@@ -0,0 +1,93 @@
+# app/routers/decks.py
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+from typing_extensions import Annotated
+
+from .. import crud, decks, models, schemas, security, uploads
+from ..database import engine, get_session
+
+router = APIRouter(prefix="/decks", tags=["Decks"])
+CurrentUser = Annotated[models.User, Depends(security.get_current_user)]
+
+DeckFormat = Literal["csv", "ndjson", "apkg"]
+
+def _check_folder(session: Session, folder_id: Optional[int], user_id: int) -> None:
+    if folder_id is not None and not crud.user_owns_folder(session, folder_id, user_id):
+        raise HTTPException(status_code=404, detail="Pasta não encontrada")
+
+@router.get("/export")
+def export_deck(
+    current_user: CurrentUser,
+    format: DeckFormat = "csv",
+    document_id: Optional[int] = None,
+    folder_id: Optional[int] = None,
+    session: Session = Depends(get_session),
+):
+    """
+    Exporta os flashcards de um documento, de uma pasta ou de todo o usuário
+    (sem filtros) em CSV, NDJSON ou pacote do Anki (.apkg), em streaming.
+    """
+    if document_id is not None and not crud.user_owns_document(session, document_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    _check_folder(session, folder_id, current_user.id)
+
+    if document_id is not None:
+        name, deck_name = f"flashify-documento-{document_id}", f"Flashify::Documento {document_id}"
+    elif folder_id is not None:
+        name, deck_name = f"flashify-pasta-{folder_id}", f"Flashify::Pasta {folder_id}"
+    else:
+        name, deck_name = "flashify", "Flashify"
+
+    media_type, extension = decks.FORMATS[format]
+    return StreamingResponse(
+        decks.iter_export(
+            lambda: Session(engine),
+            format,
+            current_user.id,
+            deck_name,
+            document_id=document_id,
+            folder_id=folder_id,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}{extension}"'},
+    )
+
+@router.post(
+    "/import",
+    response_model=schemas.DeckImportResult,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=uploads.multipart_request_body("file"),
+)
+async def import_deck(
+    request: Request,
+    current_user: CurrentUser,
+    format: DeckFormat = "csv",
+    folder_id: Optional[int] = None,
+    session: Session = Depends(get_session),
+):
+    """
+    Importa um baralho (CSV com colunas front/back, NDJSON ou .apkg) como um
+    novo documento, gravando os cartões em lotes à medida que o arquivo é lido.
+    """
+    await run_in_threadpool(_check_folder, session, folder_id, current_user.id)
+    [stored] = await uploads.receive_files(request, field_name="file", suffix=decks.FORMATS[format][1])
+
+    try:
+        return await run_in_threadpool(
+            decks.import_flashcards,
+            session,
+            current_user.id,
+            format,
+            str(stored.path),
+            folder_id=folder_id,
+            content_hash=stored.content_hash,
+        )
+    except BaseException as e:
+        # Nenhum documento aponta para o arquivo (a importação foi desfeita)
+        await run_in_threadpool(uploads.discard_files, [stored])
+        if isinstance(e, decks.DeckImportError):
+            raise HTTPException(status_code=400, detail=str(e))
+        raise
@@ -1,63 +1,308 @@
 # app/routers/documents.py
-import shutil
-from pathlib import Path
+import json
 from typing import Optional
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
 from typing_extensions import Annotated
 
-from .. import crud, models, security
-from ..database import get_session
-from ..tasks import process_document # Importe a tarefa do Celery
+from .. import crud, events, models, schemas, security, task_queue, uploads
+from ..database import engine, get_session
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 CurrentUser = Annotated[models.User, Depends(security.get_current_user)]
 
-# Diretório para salvar os uploads (em produção, use um serviço como o AWS S3)
-UPLOAD_DIRECTORY = Path("uploads")
-UPLOAD_DIRECTORY.mkdir(exist_ok=True)
+BATCH_CONTENT_TYPES = {**uploads.ALLOWED_CONTENT_TYPES, **uploads.ARCHIVE_CONTENT_TYPES}
 
-@router.post("/upload", response_model=models.Document, status_code=status.HTTP_202_ACCEPTED)
-def upload_document(
+# Intervalo dos comentários de keep-alive do SSE (evita que proxies fechem a conexão)
+EVENTS_KEEPALIVE_SECONDS = 15
+
+def _register_document(
+    session: Session, user_id: int, folder_id: Optional[int], stored: uploads.StoredFile
+) -> models.Document:
+    # Cria a entrada no banco de dados
+    db_document = crud.create_document_for_user(
+        session,
+        user_id=user_id,
+        file_path=str(stored.path),
+        folder_id=folder_id,
+        content_hash=stored.content_hash,
+    )
+
+    # Dispara a tarefa em background (pelo nome, sem importar as tarefas na API)
+    try:
+        task_queue.enqueue_document(db_document.id)
+    except BaseException:
+        # Sem a mensagem na fila, o documento ficaria para sempre em PENDING
+        crud.delete_document(session, db_document.id)
+        raise
+    return db_document
+
+@router.post(
+    "/upload",
+    response_model=schemas.DocumentRead,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra=uploads.multipart_request_body("file"),
+)
+async def upload_document(
+    request: Request,
     current_user: CurrentUser,
     folder_id: Optional[int] = None, # Opcional, para associar a uma pasta
-    file: UploadFile = File(...),
     session: Session = Depends(get_session),
 ):
-    if not file.content_type in ["image/jpeg", "image/png", "application/pdf"]:
-        raise HTTPException(status_code=400, detail="Tipo de arquivo inválido.")
+    if folder_id is not None and not await run_in_threadpool(
+        crud.user_owns_folder, session, folder_id, current_user.id
+    ):
+        raise HTTPException(status_code=404, detail="Pasta não encontrada")
 
-    # Salva o arquivo localmente
-    file_path = UPLOAD_DIRECTORY / file.filename
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Grava o arquivo em disco à medida que o corpo chega, com limite de tamanho
+    [stored] = await uploads.receive_files(request, field_name="file")
 
-    # Cria a entrada no banco de dados
-    db_document = crud.create_document_for_user(
+    try:
+        return await run_in_threadpool(
+            _register_document, session, current_user.id, folder_id, stored
+        )
+    except BaseException:
+        # Nenhum documento aponta para o arquivo
+        await run_in_threadpool(uploads.discard_files, [stored])
+        raise
+
+def _register_batch(
+    session: Session, user_id: int, folder_id: Optional[int], received: list[uploads.StoredFile]
+) -> dict:
+    """Descompacta os ZIPs, cria o lote com todos os documentos e o enfileira."""
+    files, skipped = [], []
+    try:
+        for stored in received:
+            if stored.path.suffix != ".zip":
+                files.append(stored)
+                continue
+            # Os limites valem para o lote inteiro, somando todos os ZIPs
+            unpacked_so_far = sum(done.size for done in files)
+            extracted, ignored = uploads.extract_archive(
+                stored,
+                max_files=uploads.MAX_BATCH_FILES - len(files),
+                max_total=uploads.MAX_BATCH_SIZE - unpacked_so_far,
+            )
+            files.extend(extracted)
+            skipped.extend(ignored)
+        if not files:
+            raise HTTPException(status_code=400, detail="Nenhum PDF ou imagem encontrado no envio.")
+        if len(files) > uploads.MAX_BATCH_FILES:
+            raise HTTPException(status_code=400, detail="Arquivos demais no lote.")
+    except BaseException:
+        # Nenhum documento é criado: apaga os arquivos avulsos e os já extraídos
+        uploads.discard_files(files)
+        raise
+    finally:
+        # ZIPs que não chegaram a ser descompactados (ex.: erro em um anterior)
+        for stored in received:
+            if stored.path.suffix == ".zip":
+                stored.path.unlink(missing_ok=True)
+
+    db_batch, db_documents = crud.create_batch_documents(
         session,
-        user_id=current_user.id,
-        file_path=str(file_path),
-        folder_id=folder_id
+        user_id=user_id,
+        files=[(str(stored.path), stored.content_hash) for stored in files],
+        folder_id=folder_id,
     )
+    # Uma única mensagem para o lote, com a prioridade das importações em lote
+    task_queue.enqueue_batch(db_batch.id, [document.id for document in db_documents])
+    return {"batch_id": db_batch.id, "documents": db_documents, "skipped": skipped}
 
-    # Dispara a tarefa em background
-    process_document.delay(db_document.id)
+@router.post(
+    "/upload/batch",
+    response_model=schemas.BatchUploadResult,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra=uploads.multipart_request_body("files", multiple=True),
+)
+async def upload_batch(
+    request: Request,
+    current_user: CurrentUser,
+    folder_id: Optional[int] = None,
+    session: Session = Depends(get_session),
+):
+    """
+    Envia vários PDFs/imagens, ou arquivos ZIP com eles, em uma só requisição
+    (campo `files`). Os documentos são criados juntos e processados em
+    background como um lote; acompanhe em `GET /documents/batches/{batch_id}`.
+    """
+    if folder_id is not None and not await run_in_threadpool(
+        crud.user_owns_folder, session, folder_id, current_user.id
+    ):
+        raise HTTPException(status_code=404, detail="Pasta não encontrada")
+
+    received = await uploads.receive_files(
+        request,
+        field_name="files",
+        max_files=uploads.MAX_BATCH_FILES,
+        allowed_types=BATCH_CONTENT_TYPES,
+        max_total=uploads.MAX_BATCH_SIZE,
+    )
+    return await run_in_threadpool(_register_batch, session, current_user.id, folder_id, received)
+
+@router.get("/batches/{batch_id}", response_model=schemas.BatchProgress)
+def get_batch_progress(batch_id: int, current_user: CurrentUser, session: Session = Depends(get_session)):
+    """
+    Progresso agregado de um lote: quantos documentos estão em cada status. O
+    lote termina quando todos estão em COMPLETED ou FAILED.
+    """
+    progress = crud.get_batch_progress(session, batch_id, current_user.id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Lote não encontrado")
+    done = sum(progress["counts"].get(status) or 0 for status in events.TERMINAL_STATUSES)
+    return {**progress, "done": done, "finished": done >= progress["total"]}
+
+@router.get("/", response_model=schemas.DocumentPage)
+def list_documents(
+    current_user: CurrentUser,
+    folder_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(default=schemas.DEFAULT_PAGE_SIZE, ge=1, le=schemas.MAX_PAGE_SIZE),
+    session: Session = Depends(get_session),
+):
+    """
+    Lista os documentos do usuário (sem o texto extraído), opcionalmente de uma pasta.
+    """
+    rows = crud.get_documents_by_user(
+        session, user_id=current_user.id, folder_id=folder_id, cursor=cursor, limit=limit + 1
+    )
+    return schemas.build_page(rows, limit)
 
+@router.get("/{document_id}", response_model=schemas.DocumentDetail)
+def get_document_detail(
+    document_id: int,
+    current_user: CurrentUser,
+    session: Session = Depends(get_session)
+):
+    """
+    Retorna um documento com o texto extraído completo.
+    """
+    db_document = crud.get_document(session, document_id)
+    if not db_document or db_document.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
     return db_document
 
-@router.get("/{document_id}/flashcards", response_model=list[models.Flashcard])
+@router.get(
+    "/{document_id}/flashcards",
+    response_model=schemas.FlashcardPage,
+    response_model_exclude_unset=True,
+)
 def get_document_flashcards(
     document_id: int,
     current_user: CurrentUser,
+    cursor: Optional[int] = None,
+    limit: int = Query(default=schemas.DEFAULT_PAGE_SIZE, ge=1, le=schemas.MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(
+        default=None, description="Campos a retornar, separados por vírgula (ex.: front,back)"
+    ),
     session: Session = Depends(get_session)
 ):
     """
-    Lista todos os flashcards de um documento específico.
+    Lista os flashcards de um documento específico, paginados por cursor.
     """
+    selected = None
+    if fields:
+        selected = [name.strip() for name in fields.split(",") if name.strip()]
+        invalid = set(selected) - set(crud.FLASHCARD_FIELDS)
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(sorted(invalid))}")
+
     # Primeiro, garanta que o documento pertence ao usuário logado (questão de segurança)
-    db_document = crud.get_document(session, document_id)
-    if not db_document or db_document.user_id != current_user.id:
+    if not crud.user_owns_document(session, document_id, current_user.id):
         raise HTTPException(status_code=404, detail="Documento não encontrado")
-    
-    # Você precisará adicionar a função get_flashcards_by_document ao seu crud.py
-    return crud.get_flashcards_by_document(session, document_id=document_id)
\ No newline at end of file
+
+    rows = crud.get_flashcards_page(
+        session, document_id=document_id, cursor=cursor, limit=limit + 1, fields=selected
+    )
+    return schemas.build_page(rows, limit)
+
+def _status_event(document_id: int, user_id: int) -> Optional[dict]:
+    """Evento com o status atual do documento, ou None se ele não for do usuário."""
+    with Session(engine) as session:
+        current = session.exec(
+            select(models.Document.status).where(
+                models.Document.id == document_id, models.Document.user_id == user_id
+            )
+        ).first()
+    if current is None:
+        return None
+    return {"event": "status", "document_id": document_id, "status": current.value}
+
+async def _iter_document_events(document_id: int, user_id: int):
+    """
+    Gera o status atual e, em seguida, os eventos publicados pelo pipeline até o
+    documento terminar. None marca os intervalos sem eventos (keep-alive).
+    """
+    # Assina antes de ler o status, para não perder eventos publicados entre os dois
+    async with events.get_bus().subscribe(document_id) as subscription:
+        event = await run_in_threadpool(_status_event, document_id, user_id)
+        if event is None:
+            raise HTTPException(status_code=404, detail="Documento não encontrado")
+        yield event
+        finished = events.is_terminal(event)
+        while not finished:
+            event = await subscription.get(timeout=EVENTS_KEEPALIVE_SECONDS)
+            yield event
+            finished = event is not None and events.is_terminal(event)
+
+@router.get("/{document_id}/events")
+async def stream_document_events(document_id: int, current_user: CurrentUser):
+    """
+    Envia por Server-Sent Events o progresso do processamento do documento
+    (etapas, páginas extraídas e trechos enviados à IA) até COMPLETED ou FAILED.
+    """
+    stream = _iter_document_events(document_id, current_user.id)
+    # Consome o primeiro evento aqui para responder 404 antes de abrir o fluxo
+    first = await anext(stream)
+
+    async def body():
+        try:
+            yield f"event: {first['event']}\ndata: {json.dumps(first)}\n\n"
+            async for event in stream:
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        except events.EventStreamClosed:
+            return
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/{document_id}/ws")
+async def document_events_websocket(websocket: WebSocket, document_id: int, token: str):
+    """
+    Mesmo fluxo do endpoint SSE, por WebSocket. Como navegadores não enviam
+    cabeçalhos no WebSocket, o token vai na query string (`?token=`).
+    """
+    def authenticate():
+        with Session(engine) as session:
+            return security.authenticate_token(session, token)
+
+    try:
+        user = await run_in_threadpool(authenticate)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    stream = _iter_document_events(document_id, user.id)
+    try:
+        async for event in stream:
+            # Sem eventos no intervalo: o keep-alive também revela clientes desconectados
+            await websocket.send_json(event or {"event": "keep-alive"})
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Documento não encontrado")
+        return
+    except (WebSocketDisconnect, events.EventStreamClosed):
+        return
+    finally:
+        await stream.aclose()
+    await websocket.close()
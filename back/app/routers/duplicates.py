@@ -0,0 +1,45 @@
+# app/routers/duplicates.py
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+from typing_extensions import Annotated
+
+from .. import crud, models, schemas, security
+from ..database import get_session
+
+router = APIRouter(prefix="/duplicates", tags=["Duplicates"])
+CurrentUser = Annotated[models.User, Depends(security.get_current_user)]
+
+@router.get("/", response_model=schemas.DuplicateClusterPage)
+def list_duplicate_clusters(
+    current_user: CurrentUser,
+    cursor: Optional[int] = None,
+    limit: int = Query(default=schemas.DEFAULT_PAGE_SIZE, ge=1, le=schemas.MAX_PAGE_SIZE),
+    session: Session = Depends(get_session),
+):
+    """
+    Lista os grupos de flashcards quase idênticos entre os documentos do usuário.
+    """
+    rows = crud.get_duplicate_clusters(
+        session, user_id=current_user.id, cursor=cursor, limit=limit + 1
+    )
+    return schemas.build_page(rows, limit)
+
+@router.post("/{cluster_id}/merge", response_model=schemas.DuplicateMergeResult)
+def merge_duplicate_cluster(
+    cluster_id: int,
+    current_user: CurrentUser,
+    merge: schemas.DuplicateMerge = schemas.DuplicateMerge(),
+    session: Session = Depends(get_session),
+):
+    """
+    Mantém um flashcard do grupo e apaga os demais, preservando o progresso de
+    revisão mais avançado.
+    """
+    result = crud.merge_duplicate_cluster(
+        session, user_id=current_user.id, cluster_id=cluster_id, keep_id=merge.keep_id
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Grupo de duplicatas não encontrado")
+    kept, removed = result
+    return {"kept": kept, "removed": removed}
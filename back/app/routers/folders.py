@@ -1,6 +1,6 @@
 # app/routers/folders.py
-from typing import List
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
 from sqlmodel import Session
 from typing_extensions import Annotated
 
@@ -28,12 +28,18 @@ def create_folder(
         session=session, folder_create=folder, user_id=current_user.id
     )
 
-@router.get("/", response_model=List[schemas.FolderRead])
+@router.get("/", response_model=schemas.FolderPage)
 def read_folders(
     current_user: CurrentUser,
+    cursor: Optional[int] = None,
+    limit: int = Query(default=schemas.DEFAULT_PAGE_SIZE, ge=1, le=schemas.MAX_PAGE_SIZE),
     session: Session = Depends(get_session),
 ):
     """
-    Lista todas as pastas do usuário atualmente logado.
+    Lista as pastas do usuário atualmente logado, com a quantidade de documentos
+    e flashcards de cada uma.
     """
-    return crud.get_folders_by_user(session=session, user_id=current_user.id)
\ No newline at end of file
+    rows = crud.get_folder_summaries_by_user(
+        session=session, user_id=current_user.id, cursor=cursor, limit=limit + 1
+    )
+    return schemas.build_page(rows, limit)
@@ -0,0 +1,38 @@
+# app/routers/reviews.py
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+from typing_extensions import Annotated
+
+from .. import crud, models, schemas, security
+from ..database import get_session
+
+router = APIRouter(prefix="/reviews", tags=["Reviews"])
+CurrentUser = Annotated[models.User, Depends(security.get_current_user)]
+
+@router.get("/due", response_model=list[schemas.DueFlashcard])
+def get_due_flashcards(
+    current_user: CurrentUser,
+    limit: int = Query(default=20, ge=1, le=schemas.MAX_PAGE_SIZE),
+    session: Session = Depends(get_session),
+):
+    """
+    Retorna os próximos cartões a revisar, do mais atrasado para o mais recente.
+    """
+    return crud.get_due_flashcards(
+        session, user_id=current_user.id, now=datetime.now(timezone.utc), limit=limit
+    )
+
+@router.post("/", response_model=schemas.ReviewBatchResult)
+def submit_reviews(
+    batch: schemas.ReviewBatch,
+    current_user: CurrentUser,
+    session: Session = Depends(get_session),
+):
+    """
+    Registra as notas (0 a 5) de um lote de revisões e reagenda cada cartão.
+    """
+    updated, not_found = crud.apply_reviews(
+        session, user_id=current_user.id, reviews=batch.reviews, now=datetime.now(timezone.utc)
+    )
+    return {"updated": updated, "not_found": not_found}
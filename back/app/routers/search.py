@@ -0,0 +1,36 @@
+# app/routers/search.py
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+from typing_extensions import Annotated
+
+from .. import models, schemas, search, security
+from ..database import get_session
+
+router = APIRouter(prefix="/search", tags=["Search"])
+CurrentUser = Annotated[models.User, Depends(security.get_current_user)]
+
+@router.get("/", response_model=schemas.SearchPage)
+def search_content(
+    current_user: CurrentUser,
+    q: str = Query(min_length=1, max_length=200, description="Termos a buscar"),
+    kind: Optional[Literal["document", "flashcard"]] = None,
+    cursor: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+    session: Session = Depends(get_session),
+):
+    """
+    Busca no texto dos documentos e nos flashcards do usuário, do resultado
+    mais relevante para o menos relevante, com os termos destacados.
+    """
+    rows = search.search(
+        session,
+        user_id=current_user.id,
+        query=q,
+        kinds=(kind,) if kind else search.SEARCH_KINDS,
+        offset=cursor,
+        limit=limit + 1,
+    )
+    items = rows[:limit]
+    next_cursor = cursor + limit if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,57 @@
+# app/scheduler.py
+"""
+Agendamento de revisões com o algoritmo SM-2 (SuperMemo 2).
+
+A nota de cada revisão vai de 0 a 5: abaixo de 3 o cartão foi esquecido e volta
+ao início; de 3 em diante o intervalo cresce pelo fator de facilidade do cartão.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+MIN_EASE_FACTOR = 1.3
+PASSING_GRADE = 3
+
+
+@dataclass
+class ReviewResult:
+    ease_factor: float
+    interval_days: int
+    repetitions: int
+    lapses: int
+    due_at: datetime
+    last_reviewed_at: datetime
+
+
+def schedule_review(
+    ease_factor: float,
+    interval_days: int,
+    repetitions: int,
+    lapses: int,
+    grade: int,
+    reviewed_at: datetime,
+) -> ReviewResult:
+    """Calcula o novo estado de um cartão após uma revisão com a nota `grade`."""
+    if grade >= PASSING_GRADE:
+        if repetitions == 0:
+            interval_days = 1
+        elif repetitions == 1:
+            interval_days = 6
+        else:
+            interval_days = round(interval_days * ease_factor)
+        repetitions += 1
+    else:
+        repetitions = 0
+        interval_days = 1
+        lapses += 1
+
+    miss = 5 - grade
+    ease_factor = max(MIN_EASE_FACTOR, ease_factor + 0.1 - miss * (0.08 + miss * 0.02))
+
+    return ReviewResult(
+        ease_factor=ease_factor,
+        interval_days=interval_days,
+        repetitions=repetitions,
+        lapses=lapses,
+        due_at=reviewed_at + timedelta(days=interval_days),
+        last_reviewed_at=reviewed_at,
+    )
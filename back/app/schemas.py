@@ -1,17 +1,67 @@
 # app/schemas.py
-from sqlmodel import SQLModel
+from datetime import datetime, timezone
+from pydantic import field_validator
+from sqlmodel import Field, SQLModel
 from .models import DocumentStatus
 from typing import Optional 
 
+# Paginação por cursor (keyset): cada página traz o `next_cursor`, que é o ID
+# do último item; ele é enviado como `cursor` para buscar a página seguinte.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def build_page(rows: list[dict], limit: int) -> dict:
+    """
+    Monta a resposta paginada a partir de `limit + 1` linhas: a linha extra só
+    indica que existe uma próxima página e não é devolvida.
+    """
+    items = rows[:limit]
+    next_cursor = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
 # NOVOS SCHEMAS PARA DOCUMENT
 class DocumentRead(SQLModel):
     id: int
     status: DocumentStatus
+    folder_id: Optional[int] = None
 
 class DocumentDetail(DocumentRead):
     file_path: str
     extracted_text: Optional[str] = None
 
+class DocumentPage(SQLModel):
+    items: list[DocumentRead]
+    next_cursor: Optional[int] = None
+
+# SCHEMAS DE UPLOAD EM LOTE
+class BatchUploadResult(SQLModel):
+    batch_id: int
+    documents: list[DocumentRead]
+    skipped: list[str] = [] # Arquivos do ZIP ignorados (tipo não suportado)
+
+class BatchProgress(SQLModel):
+    id: int
+    total: int
+    counts: dict[str, int] # Documentos por status
+    done: int # Concluídos ou com falha
+    finished: bool
+
+# Todos os campos, exceto o ID, são opcionais para permitir projeções (`fields=`)
+class FlashcardRead(SQLModel):
+    id: int
+    document_id: Optional[int] = None
+    front: Optional[str] = None
+    back: Optional[str] = None
+
+class FlashcardPage(SQLModel):
+    items: list[FlashcardRead]
+    next_cursor: Optional[int] = None
+
+class DeckImportResult(SQLModel):
+    document_id: int
+    imported: int
+    skipped: int
+
 # Schema para criar um novo usuário
 class UserCreate(SQLModel):
     username: str
@@ -36,4 +86,77 @@ class FolderCreate(FolderBase):
     pass
 
 class FolderRead(FolderBase):
-    id: int
\ No newline at end of file
+    id: int
+
+class FolderSummary(FolderRead):
+    document_count: int
+    flashcard_count: int
+
+class FolderPage(SQLModel):
+    items: list[FolderSummary]
+    next_cursor: Optional[int] = None
+
+# SCHEMAS DE REVISÃO ESPAÇADA
+MAX_REVIEW_BATCH = 1000
+
+class DueFlashcard(SQLModel):
+    flashcard_id: int
+    document_id: int
+    front: str
+    back: str
+    due_at: datetime
+    interval_days: int
+    repetitions: int
+
+class ReviewSubmit(SQLModel):
+    flashcard_id: int
+    grade: int = Field(ge=0, le=5) # 0-2: esqueceu, 3-5: lembrou (SM-2)
+    reviewed_at: Optional[datetime] = None
+
+    @field_validator("reviewed_at")
+    @classmethod
+    def reviewed_at_in_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Datas sem fuso são tratadas como UTC, para comparar com o `now` do servidor
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+class ReviewBatch(SQLModel):
+    reviews: list[ReviewSubmit] = Field(min_length=1, max_length=MAX_REVIEW_BATCH)
+
+class ReviewBatchResult(SQLModel):
+    updated: list[int]
+    not_found: list[int]
+
+# SCHEMAS DE BUSCA
+# Na busca, os resultados são ordenados por relevância: o `next_cursor` é a
+# posição do próximo resultado no ranking, e não um ID.
+class SearchHit(SQLModel):
+    kind: str # "document" ou "flashcard"
+    id: int
+    document_id: int
+    rank: float
+    highlight: str # Trecho em HTML escapado, com os termos encontrados entre <mark></mark>
+
+class SearchPage(SQLModel):
+    items: list[SearchHit]
+    next_cursor: Optional[int] = None
+
+# SCHEMAS DE DUPLICATAS
+# Cada grupo é identificado pelo ID do seu primeiro flashcard
+class DuplicateCluster(SQLModel):
+    id: int
+    flashcards: list[FlashcardRead]
+
+class DuplicateClusterPage(SQLModel):
+    items: list[DuplicateCluster]
+    next_cursor: Optional[int] = None
+
+class DuplicateMerge(SQLModel):
+    keep_id: Optional[int] = None # Padrão: o primeiro flashcard do grupo
+
+class DuplicateMergeResult(SQLModel):
+    kept: int
+    removed: list[int]
@@ -0,0 +1,244 @@
+# app/search.py
+"""
+Índice de busca textual sobre o texto extraído dos documentos e os flashcards.
+
+- PostgreSQL: colunas `search_vector` (tsvector) em `document` e `flashcard`,
+  com índices GIN, preenchidas explicitamente a cada escrita.
+- SQLite (testes e desenvolvimento local): tabelas virtuais FTS5
+  `document_fts` e `flashcard_fts`, cujo rowid é o ID da linha de origem.
+
+O índice é atualizado pelas funções do `crud` que gravam texto, na mesma
+transação da escrita. As estruturas não fazem parte do metadata do SQLModel
+(nem dos modelos): são criadas pela migração 0005 e, com `create_all`, pelo
+evento registrado no fim deste módulo.
+"""
+import os
+import re
+import html
+from typing import Optional
+
+from sqlalchemy import bindparam, event, text
+from sqlmodel import Session, SQLModel
+
+# Configuração de idioma do PostgreSQL (stemming e stopwords)
+TEXT_SEARCH_CONFIG = os.getenv("SEARCH_TEXT_CONFIG", "portuguese")
+
+SEARCH_KINDS = ("document", "flashcard")
+
+# Estruturas de busca criadas fora do metadata (ignoradas pelo autogenerate do Alembic)
+SEARCH_TABLES = ("document_fts", "flashcard_fts")
+SEARCH_COLUMNS = ("search_vector",)
+SEARCH_INDEXES = ("ix_document_search_vector", "ix_flashcard_search_vector")
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+# O banco marca os termos com caracteres de uso privado, e não com as tags: o
+# texto do documento é escapado antes de as marcas virarem <mark></mark>
+_MARK_START = "\ue000"
+_MARK_STOP = "\ue001"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _dialect(session: Session) -> str:
+    return session.get_bind().dialect.name
+
+
+def create_search_index(connection) -> None:
+    """Cria as estruturas de busca do banco, se ainda não existirem."""
+    if connection.dialect.name == "postgresql":
+        for table in ("document", "flashcard"):
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)"
+            ))
+    elif connection.dialect.name == "sqlite":
+        # remove_diacritics: "revolução" também é encontrada por "revolucao"
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS document_fts USING fts5("
+            "extracted_text, tokenize='unicode61 remove_diacritics 2')"
+        ))
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS flashcard_fts USING fts5("
+            "front, back, tokenize='unicode61 remove_diacritics 2')"
+        ))
+
+
+def index_document(session: Session, document_id: int, extracted_text: Optional[str]) -> None:
+    """Atualiza a entrada do documento no índice (sem commit)."""
+    dialect = _dialect(session)
+    if dialect == "postgresql":
+        session.execute(
+            text(
+                "UPDATE document SET search_vector = "
+                "to_tsvector(CAST(:config AS regconfig), coalesce(extracted_text, '')) WHERE id = :id"
+            ),
+            {"config": TEXT_SEARCH_CONFIG, "id": document_id},
+        )
+    elif dialect == "sqlite":
+        session.execute(text("DELETE FROM document_fts WHERE rowid = :id"), {"id": document_id})
+        if extracted_text:
+            session.execute(
+                text("INSERT INTO document_fts (rowid, extracted_text) VALUES (:id, :text)"),
+                {"id": document_id, "text": extracted_text},
+            )
+
+
+def index_flashcards(session: Session, flashcards: list[dict]) -> None:
+    """
+    Indexa flashcards recém-inseridos (sem commit). Cada item precisa de `id`,
+    `front` e `back`.
+    """
+    if not flashcards:
+        return
+    dialect = _dialect(session)
+    if dialect == "postgresql":
+        # Um único UPDATE para o lote inteiro, a partir das colunas já gravadas
+        session.execute(
+            text(
+                "UPDATE flashcard SET search_vector = to_tsvector(CAST(:config AS regconfig), "
+                "front || ' ' || back) WHERE id = ANY(:ids)"
+            ),
+            {"config": TEXT_SEARCH_CONFIG, "ids": [fc["id"] for fc in flashcards]},
+        )
+    elif dialect == "sqlite":
+        session.execute(
+            text("INSERT INTO flashcard_fts (rowid, front, back) VALUES (:id, :front, :back)"),
+            [{"id": fc["id"], "front": fc["front"], "back": fc["back"]} for fc in flashcards],
+        )
+
+
+def remove_flashcards(session: Session, flashcard_ids: list[int]) -> None:
+    """Tira flashcards do índice (sem commit), antes de apagá-los."""
+    # No PostgreSQL o tsvector é apagado junto com a linha do flashcard
+    if flashcard_ids and _dialect(session) == "sqlite":
+        session.execute(
+            text("DELETE FROM flashcard_fts WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": flashcard_ids},
+        )
+
+
+def _render_highlight(raw: str) -> str:
+    """Escapa o HTML do trecho e só então troca as marcas do banco pelas tags."""
+    escaped = html.escape(raw or "")
+    return escaped.replace(_MARK_START, HIGHLIGHT_START).replace(_MARK_STOP, HIGHLIGHT_STOP)
+
+
+def _rows(result) -> list[dict]:
+    return [{**row._mapping, "highlight": _render_highlight(row.highlight)} for row in result]
+
+
+def _fts5_query(query: str) -> str:
+    """
+    Converte a busca do usuário em uma consulta FTS5 segura: cada palavra vira
+    um termo entre aspas (todas obrigatórias), sem operadores da sintaxe FTS5.
+    """
+    return " ".join(f'"{word}"' for word in _WORD.findall(query))
+
+
+def search(
+    session: Session,
+    user_id: int,
+    query: str,
+    kinds: tuple[str, ...] = SEARCH_KINDS,
+    offset: int = 0,
+    limit: int = 20,
+) -> list[dict]:
+    """
+    Busca nos documentos e flashcards do usuário, do resultado mais relevante
+    para o menos relevante, com os termos encontrados destacados.
+    """
+    dialect = _dialect(session)
+    if dialect == "postgresql":
+        return _search_postgresql(session, user_id, query, kinds, offset, limit)
+    if dialect == "sqlite":
+        return _search_sqlite(session, user_id, query, kinds, offset, limit)
+    return []
+
+
+def _search_postgresql(session, user_id, query, kinds, offset, limit) -> list[dict]:
+    branches = []
+    if "document" in kinds:
+        branches.append(
+            "SELECT 'document' AS kind, d.id AS id, d.id AS document_id, "
+            "ts_rank_cd(d.search_vector, q.query) AS rank "
+            "FROM document d, q WHERE d.user_id = :user_id AND d.search_vector @@ q.query"
+        )
+    if "flashcard" in kinds:
+        branches.append(
+            "SELECT 'flashcard', f.id, f.document_id, ts_rank_cd(f.search_vector, q.query) "
+            "FROM flashcard f JOIN document d ON d.id = f.document_id, q "
+            "WHERE d.user_id = :user_id AND f.search_vector @@ q.query"
+        )
+    if not branches:
+        return []
+
+    # O ts_headline relê o texto original, então só é calculado para a página
+    statement = text(
+        "WITH q AS (SELECT websearch_to_tsquery(CAST(:config AS regconfig), :query) AS query), "
+        f"hits AS ({' UNION ALL '.join(branches)} "
+        "ORDER BY rank DESC, kind, id LIMIT :limit OFFSET :offset) "
+        "SELECT hits.kind, hits.id, hits.document_id, hits.rank, "
+        "ts_headline(CAST(:config AS regconfig), "
+        "coalesce(d.extracted_text, f.front || ' — ' || f.back), q.query, :headline) AS highlight "
+        "FROM hits CROSS JOIN q "
+        "LEFT JOIN document d ON hits.kind = 'document' AND d.id = hits.id "
+        "LEFT JOIN flashcard f ON hits.kind = 'flashcard' AND f.id = hits.id "
+        "ORDER BY hits.rank DESC, hits.kind, hits.id"
+    )
+    result = session.execute(statement, {
+        "config": TEXT_SEARCH_CONFIG,
+        "query": query,
+        "user_id": user_id,
+        "limit": limit,
+        "offset": offset,
+        "headline": f"StartSel={_MARK_START}, StopSel={_MARK_STOP}, MaxWords=35, MinWords=15",
+    })
+    return _rows(result)
+
+
+def _search_sqlite(session, user_id, query, kinds, offset, limit) -> list[dict]:
+    match = _fts5_query(query)
+    if not match:
+        return []
+
+    branches = []
+    # bm25() é menor quanto mais relevante: o sinal é invertido para ordenar como no PostgreSQL
+    if "document" in kinds:
+        branches.append(
+            "SELECT 'document' AS kind, d.id AS id, d.id AS document_id, "
+            "-bm25(document_fts) AS rank, "
+            "snippet(document_fts, 0, :start, :stop, '…', 24) AS highlight "
+            "FROM document_fts JOIN document d ON d.id = document_fts.rowid "
+            "WHERE document_fts MATCH :match AND d.user_id = :user_id"
+        )
+    if "flashcard" in kinds:
+        branches.append(
+            "SELECT 'flashcard', f.id, f.document_id, -bm25(flashcard_fts), "
+            "highlight(flashcard_fts, 0, :start, :stop) || ' — ' || highlight(flashcard_fts, 1, :start, :stop) "
+            "FROM flashcard_fts JOIN flashcard f ON f.id = flashcard_fts.rowid "
+            "JOIN document d ON d.id = f.document_id "
+            "WHERE flashcard_fts MATCH :match AND d.user_id = :user_id"
+        )
+    if not branches:
+        return []
+
+    statement = text(
+        f"SELECT * FROM ({' UNION ALL '.join(branches)}) "
+        "ORDER BY rank DESC, kind, id LIMIT :limit OFFSET :offset"
+    )
+    result = session.execute(statement, {
+        "match": match,
+        "user_id": user_id,
+        "start": _MARK_START,
+        "stop": _MARK_STOP,
+        "limit": limit,
+        "offset": offset,
+    })
+    return _rows(result)
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _create_search_index_after_create_all(target, connection, **kw) -> None:
+    # Mantém bancos criados com `create_all` (testes, benchmarks) pesquisáveis
+    create_search_index(connection)
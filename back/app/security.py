@@ -1,10 +1,13 @@
 # app/security.py
 import os
+import json
+import threading
 from datetime import datetime, timedelta, timezone
 from typing import Any, Union
 
+import redis
+from cachetools import TTLCache
 from jose import jwt
-from passlib.context import CryptContext
 from dotenv import load_dotenv
 
 from fastapi import Depends, HTTPException, status
@@ -12,22 +15,27 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session
 from jose import JWTError, jwt
 
-from . import crud, models
+from . import clients, crud, models
 from .database import get_session
+# O hash de senhas vive em `passwords` (leve o bastante para o pool de processos)
+from .passwords import pwd_context, verify_password, get_password_hash
 
 load_dotenv()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# Cache de tokens já verificados -> dados do usuário, para não consultar o banco
+# a cada requisição. O TTL curto limita por quanto tempo outro processo da API
+# pode continuar aceitando um usuário desativado.
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", 30))
+AUTH_CACHE_MAXSIZE = int(os.getenv("AUTH_CACHE_MAXSIZE", 10000))
+AUTH_CACHE_REDIS_URL = os.getenv("AUTH_CACHE_REDIS_URL")
+USER_SNAPSHOT_FIELDS = ("id", "username", "email", "is_active")
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+_token_cache: TTLCache = TTLCache(maxsize=AUTH_CACHE_MAXSIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+_token_cache_lock = threading.Lock()  # As dependências síncronas rodam em várias threads
 
 # NOVA FUNÇÃO PARA CRIAR O TOKEN
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta | None = None) -> str:
@@ -42,15 +50,81 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta | Non
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+def _get_redis():
+    return clients.get_redis(AUTH_CACHE_REDIS_URL)
+
+def _redis_user_key(email: str) -> str:
+    return f"flashify:auth:user:{email}"
+
+def _snapshot(user: models.User) -> dict:
+    return {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+
+def _user_from_snapshot(snapshot: dict) -> models.User:
+    # Instância desligada da sessão: só carrega os campos usados pelas rotas
+    return models.User(**snapshot, hashed_password="")
+
+def _get_shared_snapshot(email: str) -> dict | None:
+    client = _get_redis()
+    if client is None:
+        return None
+    try:
+        cached = client.get(_redis_user_key(email))
+    except redis.RedisError as e:
+        print(f"Cache de autenticação no Redis indisponível: {e}")
+        return None
+    return json.loads(cached) if cached else None
+
+def _set_shared_snapshot(snapshot: dict) -> None:
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        client.set(_redis_user_key(snapshot["email"]), json.dumps(snapshot), ex=AUTH_CACHE_TTL_SECONDS)
+    except redis.RedisError as e:
+        print(f"Cache de autenticação no Redis indisponível: {e}")
+
+def invalidate_user_cache(email: str) -> None:
+    """
+    Remove o usuário dos caches de autenticação (ex.: ao ser desativado).
+
+    Só os campos de `USER_SNAPSHOT_FIELDS` ficam em cache, então só quem os
+    altera precisa chamar esta função (hoje, `crud.set_user_active`). Trocar a
+    senha não invalida tokens já emitidos: o JWT continua válido até expirar.
+    Os caches locais de outros processos da API só são limpos pelo TTL.
+    """
+    with _token_cache_lock:
+        for token, (snapshot, _) in list(_token_cache.items()):
+            if snapshot["email"] == email:
+                _token_cache.pop(token, None)
+    client = _get_redis()
+    if client is not None:
+        try:
+            client.delete(_redis_user_key(email))
+        except redis.RedisError as e:
+            print(f"Cache de autenticação no Redis indisponível: {e}")
+
 # NOVA FUNÇÃO PARA OBTER O USUÁRIO ATUAL
 def get_current_user(
     session: Session = Depends(get_session), token: str = Depends(oauth2_scheme)
 ) -> models.User:
+    return authenticate_token(session, token)
+
+def authenticate_token(session: Session, token: str) -> models.User:
+    """Valida o token JWT e retorna o usuário (ex.: para WebSockets, sem cabeçalho)."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as credenciais",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+    # Token já verificado recentemente: dispensa a decodificação e o banco
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+    if cached is not None:
+        snapshot, expires_at = cached
+        if expires_at > datetime.now(timezone.utc).timestamp():
+            return _user_from_snapshot(snapshot)
+
     try:
         # Decodifica o token JWT
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -61,8 +135,18 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    # Busca o usuário no banco de dados
-    user = crud.get_user_by_email(session=session, email=email)
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+    snapshot = _get_shared_snapshot(email)
+    if snapshot is None:
+        # Busca o usuário no banco de dados
+        user = crud.get_user_by_email(session=session, email=email)
+        if user is None:
+            raise credentials_exception
+        snapshot = _snapshot(user)
+        _set_shared_snapshot(snapshot)
+
+    if not snapshot["is_active"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Usuário inativo")
+
+    with _token_cache_lock:
+        _token_cache[token] = (snapshot, payload["exp"])
+    return _user_from_snapshot(snapshot)
\ No newline at end of file
@@ -0,0 +1,50 @@
+# app/task_queue.py
+"""
+Cliente leve da fila de tarefas, usado pela API.
+
+A API só precisa enfileirar o processamento: as tarefas são enviadas pelo
+nome (`send_task`), sem importar `app.tasks`, que carrega o extrator de texto,
+o gerador de flashcards e os SDKs do Google. Assim cada worker do uvicorn
+inicia mais rápido e ocupa menos memória; esses módulos só são carregados
+nos workers do Celery.
+"""
+from . import rate_limit
+
+PROCESS_DOCUMENT_TASK = "app.tasks.process_document"
+PROCESS_BATCH_TASK = "app.tasks.process_batch"
+
+# Prioridade das mensagens no broker (no Redis, 0 é a mais alta; o kombu
+# separa as mensagens nos degraus 0, 3, 6 e 9)
+TASK_PRIORITIES = {rate_limit.PRIORITY_INTERACTIVE: 0, rate_limit.PRIORITY_BULK: 6}
+
+
+def _send(task_name: str, kwargs: dict, priority: str) -> None:
+    # O Celery também só é importado no primeiro envio
+    from .worker import celery_app
+
+    if celery_app.conf.task_always_eager:
+        # send_task ignora o modo eager: em testes, roda a tarefa no processo
+        from . import tasks
+        getattr(tasks, task_name.rsplit(".", 1)[-1]).apply_async(kwargs=kwargs)
+        return
+    # A API não consulta o resultado: sem ignore_result, o backend Redis
+    # assinaria o canal do resultado a cada envio
+    celery_app.send_task(
+        task_name,
+        kwargs=kwargs,
+        priority=TASK_PRIORITIES.get(priority, 0),
+        ignore_result=True,
+    )
+
+
+def enqueue_document(document_id: int, priority: str = rate_limit.PRIORITY_INTERACTIVE) -> None:
+    """Enfileira o pipeline de processamento do documento."""
+    _send(PROCESS_DOCUMENT_TASK, {"document_id": document_id, "priority": priority}, priority)
+
+
+def enqueue_batch(batch_id: int, document_ids: list[int], priority: str = rate_limit.PRIORITY_BULK) -> None:
+    """
+    Enfileira o processamento de um lote com uma única mensagem; o worker a
+    expande em um pipeline por documento.
+    """
+    _send(PROCESS_BATCH_TASK, {"batch_id": batch_id, "document_ids": document_ids, "priority": priority}, priority)
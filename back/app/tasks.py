@@ -1,50 +1,340 @@
 # app/tasks.py
 from pathlib import Path
+from celery import chain, group
+from celery.exceptions import Retry
+from google.api_core import exceptions as google_exceptions
+from redis import exceptions as redis_exceptions
+from sqlalchemy.exc import OperationalError
 from .worker import celery_app
 from .database import engine
-from . import crud, models # Adicione models
-from .text_extractor import extract_text_from_pdf, extract_text_from_image
-from .ai_generator import generate_flashcards_from_text # <-- IMPORTAÇÃO NOVA
+from . import cache, crud, duplicates, events, metrics, models, rate_limit, task_queue
 from sqlmodel import Session
 
+# O extrator de texto e o gerador de flashcards são importados dentro de cada
+# etapa: o worker da fila `cpu` não carrega o SDK do Gemini e o da fila `io`
+# não carrega o pdfplumber.
+
+
+def _set_status(session: Session, db_document: models.Document, status: models.DocumentStatus, **details):
+    """Grava a etapa do documento e avisa os clientes conectados."""
+    crud.update_document_status(session, db_document, status)
+    events.publish_status(db_document.id, status.value, **details)
+
+
+# Erros temporários (rede, tempo esgotado, banco indisponível, limite de uso ou
+# falha do lado do Google): só esses fazem a etapa ser repetida. Os demais
+# (arquivo ausente, PDF corrompido, ValueError...) não melhoram com uma nova
+# tentativa e levam o documento direto para FAILED.
+TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    OperationalError,
+    redis_exceptions.ConnectionError,
+    redis_exceptions.TimeoutError,
+    google_exceptions.TooManyRequests,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+)
+
+
+class PipelineTask(celery_app.Task):
+    """
+    Base das etapas do pipeline: cada etapa é repetida isoladamente com backoff
+    exponencial nos erros temporários e, quando as tentativas se esgotam (ou o
+    erro é permanente), o documento vai para FAILED.
+    """
+    autoretry_for = TRANSIENT_ERRORS
+    max_retries = 3
+    retry_backoff = True
+    retry_backoff_max = 600
+    retry_jitter = True
+
+    def __call__(self, *args, **kwargs):
+        try:
+            with metrics.maybe_profile(self.name, kwargs.get("document_id")):
+                return super().__call__(*args, **kwargs)
+        except Retry as retry:
+            if not self.request.is_eager:
+                raise  # A nova tentativa já foi agendada com backoff
+            # Com task_eager_propagates, o Celery relança o Retry em vez de
+            # repetir a etapa: no modo eager a nova tentativa roda aqui, na hora
+            self.on_retry(retry.exc, self.request.id, args, kwargs, None)
+            return retry.sig.apply().get()
+        except Exception as exc:
+            # Com task_eager_propagates, o Celery relança a exceção sem chamar
+            # o on_failure: no modo eager o status FAILED é gravado aqui.
+            if self.request.is_eager:
+                self.on_failure(exc, self.request.id, args, kwargs, None)
+            raise
+
+    def on_retry(self, exc, task_id, args, kwargs, einfo):
+        document_id = kwargs.get("document_id")
+        if document_id is not None:
+            events.publish(document_id, "retry", stage=self.name, error=str(exc))
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        document_id = kwargs.get("document_id")
+        print(f"ERRO na etapa {self.name} do Documento ID {document_id}: {exc}")
+        metrics.PIPELINE_FAILURES.labels(stage=self.name.rsplit(".", 1)[-1]).inc()
+        if document_id is not None:
+            with Session(engine) as session:
+                db_document = crud.get_document(session=session, document_id=document_id)
+                if db_document:
+                    _set_status(session, db_document, models.DocumentStatus.FAILED, error=str(exc))
+
+
+def _document_pipeline(document_id: int, priority: str):
+    """Cadeia de etapas (extração -> geração -> conclusão) de um documento."""
+    message_priority = task_queue.TASK_PRIORITIES.get(priority, 0)
+    return chain(
+        extract_document_text.si(document_id=document_id).set(priority=message_priority),
+        generate_document_flashcards.si(document_id=document_id, priority=priority).set(priority=message_priority),
+        finish_document.s(document_id=document_id).set(priority=message_priority),
+    )
+
+
+def _start_pipeline(document_id: int, pipeline) -> None:
+    """
+    Dispara a cadeia de um documento. No modo eager (testes), ela roda aqui
+    mesmo: a falha de uma etapa, que já deixa o documento como FAILED, não
+    sobe para quem enfileirou (a requisição de upload, por exemplo).
+    """
+    if not celery_app.conf.task_always_eager:
+        pipeline.apply_async()
+        return
+    try:
+        pipeline.apply_async()
+    except Exception as exc:
+        print(f"ERRO no pipeline do Documento ID {document_id}: {exc}")
+
+
 @celery_app.task
-def process_document(document_id: int):
+def process_document(document_id: int, priority: str = rate_limit.PRIORITY_INTERACTIVE):
+    """
+    Dispara o pipeline de processamento (extração -> geração -> conclusão) do
+    documento. Uploads avulsos (`interactive`) passam na frente das importações
+    em lote (`bulk`), tanto nas filas quanto no limite de uso do Gemini.
+    """
     print(f"Iniciando o processamento para o Documento ID: {document_id}")
-    
+    _start_pipeline(document_id, _document_pipeline(document_id, priority))
+    return {"document_id": document_id, "status": "PIPELINE_STARTED"}
+
+
+def _start_pipelines(document_ids: list[int], priority: str) -> None:
+    """Dispara, de uma vez, as cadeias de vários documentos (um `group`)."""
+    if not document_ids:
+        return
+    pipelines = [_document_pipeline(document_id, priority) for document_id in document_ids]
+    if celery_app.conf.task_always_eager:
+        # No modo eager, o group esperaria cada cadeia com .get() dentro desta
+        # tarefa, o que o Celery proíbe: as cadeias rodam uma a uma, e a falha
+        # de um documento não interrompe as outras
+        for document_id, pipeline in zip(document_ids, pipelines):
+            _start_pipeline(document_id, pipeline)
+    else:
+        group(pipelines).apply_async()
+
+
+@celery_app.task
+def process_batch(batch_id: int, document_ids: list[int], priority: str = rate_limit.PRIORITY_BULK):
+    """
+    Dispara, de uma vez, o pipeline de todos os documentos de um lote (um
+    `group` de cadeias). O progresso agregado vem do status de cada documento
+    (`GET /documents/batches/{id}`), então não é preciso um chord: a falha de
+    um documento não impede que o lote seja dado como terminado.
+
+    As imagens do lote passam antes por `extract_batch_images`, que faz o OCR
+    de todas juntas; os demais documentos começam na hora.
+    """
+    print(f"Iniciando o processamento do Lote ID: {batch_id} ({len(document_ids)} documento(s))")
+    with Session(engine) as session:
+        image_ids = [
+            db_document.id
+            for db_document in crud.get_documents_by_ids(session, document_ids)
+            if metrics.file_type_of(db_document.file_path) == "image"
+        ]
+    if len(image_ids) < 2:
+        # Uma imagem sozinha não tem com quem ser agrupada
+        image_ids = []
+    if image_ids:
+        extract_batch_images.si(batch_id=batch_id, document_ids=image_ids, priority=priority).set(
+            priority=task_queue.TASK_PRIORITIES.get(priority, 0)
+        ).apply_async()
+    batched = set(image_ids)
+    _start_pipelines([document_id for document_id in document_ids if document_id not in batched], priority)
+    return {"batch_id": batch_id, "documents": len(document_ids), "status": "PIPELINE_STARTED"}
+
+
+@celery_app.task
+def extract_batch_images(batch_id: int, document_ids: list[int], priority: str = rate_limit.PRIORITY_BULK):
+    """
+    Etapa prévia das imagens de um lote (fila `cpu`): faz o OCR de todas com o
+    mínimo de requisições `batch_annotate_images` e guarda os textos no cache.
+    Depois dispara o pipeline de cada imagem, cuja extração já encontra o texto
+    pronto. Se o OCR em lote falhar, cada documento tenta o seu sozinho.
+    """
+    from .text_extractor import EXTRACTOR_VERSION, extract_text_from_images
+
+    try:
+        with Session(engine) as session:
+            pending = [
+                db_document
+                for db_document in crud.get_documents_by_ids(session, document_ids)
+                if db_document.content_hash
+                and cache.get_extracted_text(session, db_document.content_hash, EXTRACTOR_VERSION) is None
+            ]
+            if pending:
+                with metrics.span("extract", "image", batch_id=batch_id, documents=len(pending)):
+                    texts = extract_text_from_images([db_document.file_path for db_document in pending])
+                for db_document, text in zip(pending, texts):
+                    cache.store_extracted_text(session, db_document.content_hash, EXTRACTOR_VERSION, text)
+                metrics.PAGES_EXTRACTED.labels(file_type="image").inc(len(pending))
+    except Exception as exc:
+        print(f"ERRO no OCR em lote do Lote ID {batch_id}: {exc}")
+    _start_pipelines(document_ids, priority)
+
+
+@celery_app.task(base=PipelineTask)
+def extract_document_text(document_id: int):
+    """Etapa 1 (fila `cpu`): extrai o texto do arquivo ou o reaproveita do cache."""
+    from .text_extractor import EXTRACTOR_VERSION, extract_text_from_image, extract_text_from_pdf
+
     with Session(engine) as session:
         db_document = crud.get_document(session=session, document_id=document_id)
         if not db_document:
             print(f"ERRO: Documento ID {document_id} não encontrado.")
             return
+        _set_status(session, db_document, models.DocumentStatus.EXTRACTING)
 
         file_path = Path(db_document.file_path)
-        extracted_text = ""
-        try:
-            # 1. EXTRAÇÃO DE TEXTO (já implementada)
-            if file_path.suffix.lower() == ".pdf":
-                extracted_text = extract_text_from_pdf(str(file_path))
-            elif file_path.suffix.lower() in [".png", ".jpg", ".jpeg"]:
-                extracted_text = extract_text_from_image(str(file_path))
-            
-            # 2. SALVAR TEXTO E ATUALIZAR STATUS (já implementado)
-            crud.update_document_after_processing(
-                session=session, db_document=db_document, text=extracted_text
-            )
-            print(f"Extração de texto para o Documento ID: {document_id} CONCLUÍDA.")
+        content_hash = db_document.content_hash
+        if content_hash is None:
+            # Documentos enviados antes do cache não têm o hash salvo
+            content_hash = cache.compute_file_hash(str(file_path))
+            db_document.content_hash = content_hash
+
+        file_type = metrics.file_type_of(str(file_path))
+        cached_text = cache.get_extracted_text(session, content_hash, EXTRACTOR_VERSION)
+        metrics.record_cache_lookup("text", hit=cached_text is not None)
+        if cached_text is not None:
+            extracted_text = cached_text
+            print(f"Texto do Documento ID: {document_id} encontrado no cache.")
+        else:
+            def on_page(page: int, total: int):
+                metrics.PAGES_EXTRACTED.labels(file_type=file_type).inc()
+                events.publish_progress(document_id, "EXTRACTING", done=page, total=total)
 
-            # 3. GERAR FLASHCARDS COM IA (NOVA ETAPA)
-            flashcards_data = generate_flashcards_from_text(extracted_text)
+            extracted_text = ""
+            with metrics.span("extract", file_type, document_id=document_id):
+                if file_type == "pdf":
+                    extracted_text = extract_text_from_pdf(str(file_path), on_page=on_page)
+                elif file_type == "image":
+                    extracted_text = extract_text_from_image(str(file_path))
+                    on_page(1, 1)
+            cache.store_extracted_text(session, content_hash, EXTRACTOR_VERSION, extracted_text)
 
-            # 4. SALVAR FLASHCARDS NO BANCO (NOVA ETAPA)
-            if flashcards_data:
+        crud.update_document_after_processing(
+            session=session,
+            db_document=db_document,
+            text=extracted_text,
+            status=models.DocumentStatus.GENERATING,
+        )
+        events.publish_status(document_id, models.DocumentStatus.GENERATING.value)
+        print(f"Extração de texto para o Documento ID: {document_id} CONCLUÍDA.")
+
+
+@celery_app.task(base=PipelineTask)
+def generate_document_flashcards(document_id: int, priority: str = rate_limit.PRIORITY_INTERACTIVE) -> int:
+    """
+    Etapa 2 (fila `io`): gera os flashcards com IA (ou os reaproveita do cache) e
+    os grava em lotes pequenos, à medida que a resposta do modelo chega.
+    """
+    from .ai_generator import GENERATOR_VERSION, iter_flashcard_batches
+
+    with Session(engine) as session:
+        db_document = crud.get_document(session=session, document_id=document_id)
+        if not db_document:
+            print(f"ERRO: Documento ID {document_id} não encontrado.")
+            return 0
+
+        file_type = metrics.file_type_of(db_document.file_path)
+        # Lido uma vez: depois de cada commit, acessar o documento iria ao banco de novo
+        user_id = db_document.user_id
+
+        # Reaproveita os flashcards do cache, se o prompt/modelo não mudou
+        flashcards_data = cache.get_flashcards(session, db_document.content_hash, GENERATOR_VERSION)
+        metrics.record_cache_lookup("flashcards", hit=flashcards_data is not None)
+        if flashcards_data is not None:
+            print(f"Flashcards do Documento ID: {document_id} encontrados no cache.")
+            crud.delete_flashcards_for_document(session, document_id)
+            with metrics.span("db_write", file_type, document_id=document_id, flashcards=len(flashcards_data)):
                 crud.create_flashcards_for_document(
-                    session=session,
-                    flashcards_data=flashcards_data,
-                    document_id=db_document.id,
+                    session=session, flashcards_data=flashcards_data, document_id=document_id, user_id=user_id
                 )
-                print(f"{len(flashcards_data)} flashcards salvos para o Documento ID: {document_id}.")
-        
-        except Exception as e:
-            print(f"ERRO no pipeline de processamento do Documento ID {document_id}: {e}")
-    
-    return {"document_id": document_id, "status": "PIPELINE_COMPLETED"}
\ No newline at end of file
+            metrics.FLASHCARDS_CREATED.labels(source="cache").inc(len(flashcards_data))
+            return len(flashcards_data)
+
+        if generate_document_flashcards.request.retries:
+            # Numa nova tentativa, os cartões gravados antes da falha são mantidos
+            # e as perguntas que eles já cobrem não são gravadas de novo
+            flashcards_data = [
+                {"front": card.front, "back": card.back}
+                for card in crud.get_flashcards_by_document(session, document_id)
+            ]
+        else:
+            crud.delete_flashcards_for_document(session, document_id)
+            flashcards_data = []
+
+        progress = {"done": 0, "total": 0}
+
+        def publish_progress():
+            events.publish_progress(document_id, "GENERATING", flashcards=len(flashcards_data), **progress)
+
+        def on_chunk(chunk: int, total: int):
+            progress.update(done=chunk, total=total)
+            publish_progress()
+
+        with metrics.span("generate", file_type, document_id=document_id):
+            for batch in iter_flashcard_batches(
+                db_document.extracted_text or "",
+                on_chunk=on_chunk,
+                priority=priority,
+                existing_fronts=[card["front"] for card in flashcards_data],
+            ):
+                with metrics.span("db_write", file_type, document_id=document_id, flashcards=len(batch)):
+                    crud.create_flashcards_for_document(
+                        session=session, flashcards_data=batch, document_id=document_id, user_id=user_id
+                    )
+                metrics.FLASHCARDS_CREATED.labels(source="generated").inc(len(batch))
+                flashcards_data.extend(batch)
+                # Cada lote gravado já aparece para o cliente, sem esperar o pedaço terminar
+                publish_progress()
+            print(f"{len(flashcards_data)} flashcards salvos para o Documento ID: {document_id}.")
+
+        if flashcards_data:
+            cache.store_flashcards(
+                session, db_document.content_hash, GENERATOR_VERSION, flashcards_data
+            )
+        return len(flashcards_data)
+
+
+@celery_app.task(base=PipelineTask)
+def finish_document(flashcards_count: int, document_id: int):
+    """
+    Etapa 3 (fila `io`): procura duplicatas entre os cartões gravados e marca o
+    documento como concluído.
+    """
+    with Session(engine) as session:
+        db_document = crud.get_document(session=session, document_id=document_id)
+        if not db_document:
+            print(f"ERRO: Documento ID {document_id} não encontrado.")
+            return
+        duplicates.index_document(session, document_id, db_document.user_id)
+        db_document = crud.get_document(session=session, document_id=document_id)
+        _set_status(session, db_document, models.DocumentStatus.COMPLETED, flashcards=flashcards_count)
+
+    print(f"Documento ID: {document_id} concluído com {flashcards_count} flashcards.")
+    return {"document_id": document_id, "status": "PIPELINE_COMPLETED"}
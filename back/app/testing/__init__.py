@@ -0,0 +1,5 @@
+# app/testing/__init__.py
+"""
+Substitutos dos serviços externos e arquivos sintéticos usados pelos testes
+(`tests/`) e pelos benchmarks (`benchmarks/`). Não é importado pela aplicação.
+"""
@@ -0,0 +1,100 @@
+# app/testing/fakes.py
+"""
+Substitutos locais e determinísticos do Gemini e do Vision para os testes e benchmarks.
+
+As respostas dependem apenas da entrada (mesmo prompt/imagem, mesma resposta),
+e cada chamada espera `latency` segundos para simular a ida à rede.
+"""
+import hashlib
+import json
+import random
+import time
+from types import SimpleNamespace
+
+from app.testing.synthetic import random_paragraph
+
+
+def _rng_for(data: bytes) -> random.Random:
+    return random.Random(int.from_bytes(hashlib.sha256(data).digest()[:8], "big"))
+
+
+class FakeStream:
+    """
+    Resposta em streaming: a primeira parte do texto chega depois de
+    `first_delay` segundos e cada uma das seguintes, `interval` depois.
+    """
+
+    def __init__(self, parts: list[str], first_delay: float, interval: float, usage_metadata):
+        self.parts = parts
+        self.first_delay = first_delay
+        self.interval = interval
+        self.usage_metadata = usage_metadata
+
+    def __iter__(self):
+        for index, part in enumerate(self.parts):
+            time.sleep(self.interval if index else self.first_delay)
+            yield SimpleNamespace(text=part)
+
+
+class FakeGeminiModel:
+    """
+    Imita `GenerativeModel.generate_content`, devolvendo flashcards em JSON.
+    Com `stream=True`, a primeira parte chega depois de `first_token_latency`
+    (padrão: 10% de `latency`) e o resto é distribuído até completar `latency`.
+    """
+
+    def __init__(self, latency: float = 0.0, cards_per_chunk: int = 10, first_token_latency: float = None):
+        self.latency = latency
+        self.cards_per_chunk = cards_per_chunk
+        self.first_token_latency = latency * 0.1 if first_token_latency is None else first_token_latency
+        self.calls = 0
+
+    def generate_content(self, prompt: str, stream: bool = False, generation_config=None, **kwargs):
+        self.calls += 1
+        rng = _rng_for(prompt.encode("utf-8"))
+        flashcards = [
+            {"front": random_paragraph(rng, 8).rstrip(".") + "?", "back": random_paragraph(rng, 12)}
+            for _ in range(self.cards_per_chunk)
+        ]
+        text = json.dumps({"flashcards": flashcards}, ensure_ascii=False)
+        if (generation_config or {}).get("response_mime_type") != "application/json":
+            text = f"```json\n{text}\n```"
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+
+        if not stream:
+            time.sleep(self.latency)
+            return SimpleNamespace(text=text, usage_metadata=usage)
+        # Cerca de uma parte por flashcard, cortada em posições arbitrárias do JSON
+        size = -(-len(text) // (self.cards_per_chunk + 1))
+        parts = [text[i:i + size] for i in range(0, len(text), size)]
+        interval = max(0.0, self.latency - self.first_token_latency) / max(1, len(parts) - 1)
+        return FakeStream(parts, self.first_token_latency, interval, usage)
+
+
+class FakeVisionClient:
+    """
+    Imita `ImageAnnotatorClient.batch_annotate_images` (detecção de texto). Com
+    `bandwidth` (bytes/s), o tempo de upload das imagens entra na latência.
+    """
+
+    def __init__(self, latency: float = 0.0, words: int = 150, bandwidth: float = 0.0):
+        self.latency = latency
+        self.words = words
+        self.bandwidth = bandwidth
+        self.calls = 0
+        self.bytes_received = 0
+
+    def batch_annotate_images(self, requests, **kwargs):
+        self.calls += 1
+        size = sum(len(request.image.content) for request in requests)
+        self.bytes_received += size
+        time.sleep(self.latency + (size / self.bandwidth if self.bandwidth else 0))
+        responses = []
+        for request in requests:
+            rng = _rng_for(request.image.content)
+            text = " ".join(random_paragraph(rng) for _ in range(self.words // 12))
+            responses.append(SimpleNamespace(
+                error=SimpleNamespace(message=""),
+                text_annotations=[SimpleNamespace(description=text)],
+            ))
+        return SimpleNamespace(responses=responses)
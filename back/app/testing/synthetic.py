@@ -0,0 +1,142 @@
+# app/testing/synthetic.py
+"""Geração de arquivos sintéticos (PDFs com camada de texto ou digitalizados e imagens) para testes e benchmarks."""
+import random
+import struct
+import zlib
+
+_WORDS = (
+    "celula membrana proteina enzima energia nucleo genoma bacteria sequencia "
+    "processo negocio gestao requisito sistema projeto análise dados modelo "
+    "teoria conceito definicao exemplo resultado metodo amostra"
+).split()
+
+
+def random_paragraph(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_text_pdf(path: str, pages: int, lines_per_page: int = 40, seed: int = 0) -> str:
+    """Escreve um PDF simples (Helvetica, só ASCII) com `pages` páginas de texto."""
+    rng = random.Random(seed)
+    objects: list[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(b"")  # preenchido depois que a árvore de páginas existir
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for _ in range(pages):
+        lines = [
+            _escape(random_paragraph(rng))
+            for _ in range(lines_per_page)
+        ]
+        stream = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        content_id = add(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream.encode("latin-1"))
+        )
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font_id, content_id)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref_offset = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(
+            b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%EOF\n"
+            % (len(objects) + 1, catalog_id, xref_offset)
+        )
+    return path
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def make_png(path: str, width: int, height: int, seed: int = 0) -> str:
+    """Escreve um PNG em tons de cinza com ruído (sem depender do Pillow)."""
+    rng = random.Random(seed)
+    # Cada linha começa com o byte do filtro (0 = nenhum)
+    rows = b"".join(b"\x00" + rng.randbytes(width) for _ in range(height))
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)))
+        f.write(_png_chunk(b"IDAT", zlib.compress(rows, 6)))
+        f.write(_png_chunk(b"IEND", b""))
+    return path
+
+
+def _render_text_page(rng: random.Random, width: int, height: int):
+    """Página em tons de cinza com linhas de texto, como uma folha fotografada ou digitalizada."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    image = Image.new("L", (width, height), color=235)
+    draw = ImageDraw.Draw(image)
+    font_size = max(12, height // 80)
+    font = ImageFont.load_default(size=font_size)
+    margin = width // 12
+    for y in range(margin, height - margin, int(font_size * 1.5)):
+        draw.text((margin, y), random_paragraph(rng, 10), fill=20, font=font)
+    # Ruído leve do sensor/scanner, que pesa na compressão como numa foto real
+    noise = Image.effect_noise((width, height), 12)
+    return Image.blend(image, noise, 0.15)
+
+
+def make_text_image(path: str, width: int, height: int, seed: int = 0) -> str:
+    """Escreve uma imagem (PNG ou JPEG, conforme a extensão) de uma página com texto."""
+    image = _render_text_page(random.Random(seed), width, height)
+    image.save(path, quality=95)
+    return path
+
+
+def make_scanned_pdf(path: str, pages: int, dpi: int = 300, seed: int = 0) -> str:
+    """Escreve um PDF só de imagens (sem camada de texto), como o de um scanner, em A4."""
+    rng = random.Random(seed)
+    width, height = round(8.27 * dpi), round(11.69 * dpi)
+    images = [_render_text_page(rng, width, height) for _ in range(pages)]
+    images[0].save(path, save_all=True, append_images=images[1:], resolution=dpi)
+    return path
+
+
+def make_mixed_pdf(path: str, pages: int, scanned_every: int = 3, seed: int = 0) -> str:
+    """PDF em que uma a cada `scanned_every` páginas é digitalizada e as demais têm texto."""
+    import pypdfium2 as pdfium
+
+    text_path, scanned_path = f"{path}.text.pdf", f"{path}.scanned.pdf"
+    scanned_count = len(range(0, pages, scanned_every))
+    make_text_pdf(text_path, pages - scanned_count, seed=seed)
+    make_scanned_pdf(scanned_path, scanned_count, seed=seed)
+    text_pdf, scanned_pdf = pdfium.PdfDocument(text_path), pdfium.PdfDocument(scanned_path)
+    output = pdfium.PdfDocument.new()
+    text_index = scanned_index = 0
+    for index in range(pages):
+        if index % scanned_every == 0:
+            output.import_pages(scanned_pdf, [scanned_index])
+            scanned_index += 1
+        else:
+            output.import_pages(text_pdf, [text_index])
+            text_index += 1
+    output.save(path)
+    for document in (output, text_pdf, scanned_pdf):
+        document.close()
+    return path
@@ -1,31 +1,295 @@
 # app/text_extractor.py
-import pdfplumber
-from google.cloud import vision
+import io
+import os
+import hashlib
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional
+
+from . import clients, metrics
+
+# Marca o fim de cada página no texto extraído, para que as etapas seguintes
+# (ex.: divisão em trechos para a IA) possam respeitar os limites de página.
+PAGE_BREAK = "\f"
+_PAGE_SUFFIX = "\n" + PAGE_BREAK
+
+# PDFs com pelo menos esta quantidade de páginas são extraídos em paralelo
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", 50))
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", os.cpu_count() or 1))
+
+# Limite de imagens por chamada síncrona de batch_annotate_images da API do Vision
+VISION_BATCH_SIZE = int(os.getenv("VISION_BATCH_SIZE", 16))
+
+# Páginas de PDF com menos caracteres que isto na camada de texto são
+# consideradas digitalizadas (só imagem) e vão para o OCR
+OCR_MIN_TEXT_CHARS = int(os.getenv("OCR_MIN_TEXT_CHARS", 20))
+# Resolução das páginas renderizadas para o OCR
+OCR_RENDER_DPI = int(os.getenv("OCR_RENDER_DPI", 200))
+# Maior lado (em pixels) das imagens enviadas ao Vision: acima disso o OCR não
+# melhora, só aumenta o upload e a latência
+OCR_MAX_DIMENSION = int(os.getenv("OCR_MAX_DIMENSION", 2048))
+OCR_JPEG_QUALITY = int(os.getenv("OCR_JPEG_QUALITY", 85))
+
+# Identifica a forma de extração usada para gerar o texto em cache, como o
+# `GENERATOR_VERSION` dos flashcards. Incremente `_EXTRACTOR_REVISION` quando
+# a lógica mudar (ex.: o OCR por página de PDFs digitalizados).
+_EXTRACTOR_REVISION = 2
+EXTRACTOR_VERSION = hashlib.sha256(
+    f"{_EXTRACTOR_REVISION}|{OCR_MIN_TEXT_CHARS}|{OCR_RENDER_DPI}|{OCR_MAX_DIMENSION}|{OCR_JPEG_QUALITY}".encode("utf-8")
+).hexdigest()[:16]
+
+
+@dataclass
+class ExtractedText:
+    """Texto extraído de um documento, com a posição inicial de cada página."""
+    text: str
+    page_offsets: list[int] = field(default_factory=list)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_offsets)
+
+    def page(self, index: int) -> str:
+        """Retorna o texto de uma página (sem o separador de página)."""
+        start = self.page_offsets[index]
+        end = self.page_offsets[index + 1] if index + 1 < self.page_count else len(self.text)
+        return self.text[start:end - len(_PAGE_SUFFIX)]
+
+
+def iter_pdf_pages(file_path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """Gera o texto de cada página do PDF, uma por vez."""
+    import pdfplumber
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extrai texto de um arquivo PDF."""
-    full_text = ""
     with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            full_text += page.extract_text() + "\n"
-    return full_text
+        for page in pdf.pages[start:stop]:
+            # extract_text() retorna None em páginas sem camada de texto
+            yield page.extract_text() or ""
+            # Libera os objetos já analisados da página para manter a memória estável
+            page.flush_cache()
 
-def extract_text_from_image(file_path: str) -> str:
-    """Usa o Google Cloud Vision para extrair texto de uma imagem."""
-    client = vision.ImageAnnotatorClient()
 
-    with open(file_path, "rb") as image_file:
-        content = image_file.read()
+def _extract_page_range(args: tuple[str, int, int]) -> list[str]:
+    file_path, start, stop = args
+    return list(iter_pdf_pages(file_path, start, stop))
+
+
+def count_pdf_pages(file_path: str) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+def iter_pdf_pages_parallel(
+    file_path: str, workers: int = PDF_EXTRACTION_WORKERS, page_count: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Gera o texto das páginas em ordem, distribuindo faixas de páginas entre
+    processos quando o PDF é grande o suficiente para compensar o custo.
+    """
+    if page_count is None:
+        page_count = count_pdf_pages(file_path)
+    # Processos daemon (ex.: dentro de alguns pools) não podem criar filhos
+    if (
+        workers <= 1
+        or page_count < PARALLEL_PAGE_THRESHOLD
+        or multiprocessing.current_process().daemon
+    ):
+        yield from iter_pdf_pages(file_path)
+        return
+
+    # Faixas menores que páginas/workers para equilibrar páginas "pesadas"
+    range_size = max(1, math.ceil(page_count / (workers * 4)))
+    ranges = [
+        (file_path, start, min(start + range_size, page_count))
+        for start in range(0, page_count, range_size)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() devolve as faixas na ordem original, à medida que ficam prontas
+        for pages in executor.map(_extract_page_range, ranges):
+            yield from pages
+
+
+def join_pages(pages: Iterable[str]) -> ExtractedText:
+    """Junta as páginas em um único texto, guardando o deslocamento de cada uma."""
+    parts = []
+    offsets = []
+    position = 0
+    for page_text in pages:
+        offsets.append(position)
+        part = page_text + _PAGE_SUFFIX
+        parts.append(part)
+        position += len(part)
+    return ExtractedText(text="".join(parts), page_offsets=offsets)
+
+
+def _report_pages(
+    pages: Iterable[str], page_count: int, on_page: Callable[[int, int], None]
+) -> Iterator[str]:
+    for number, page_text in enumerate(pages, start=1):
+        yield page_text
+        on_page(number, page_count)
+
 
-    image = vision.Image(content=content)
-    
-    response = client.text_detection(image=image)
-    texts = response.text_annotations
+def needs_ocr(page_text: str) -> bool:
+    """Indica se a página não tem uma camada de texto de verdade (ex.: digitalizada)."""
+    return len("".join(page_text.split())) < OCR_MIN_TEXT_CHARS
 
-    if response.error.message:
-        raise Exception(
-            f"{response.error.message}\nPara mais detalhes, veja https://cloud.google.com/apis/design/errors"
-        )
 
-    # O primeiro texto retornado é o texto completo detectado na imagem.
-    return texts[0].description if texts else ""
\ No newline at end of file
+def prepare_image_for_ocr(image) -> bytes:
+    """
+    Reduz uma imagem (PIL) à resolução que o OCR precisa e a recomprime em JPEG
+    em tons de cinza, para diminuir o upload ao Vision.
+    """
+    from PIL import ImageOps
+
+    image = ImageOps.exif_transpose(image).convert("L")
+    # thumbnail() só reduz, nunca amplia, e mantém a proporção
+    image.thumbnail((OCR_MAX_DIMENSION, OCR_MAX_DIMENSION))
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=OCR_JPEG_QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def prepare_image_content_for_ocr(content: bytes) -> bytes:
+    """Como `prepare_image_for_ocr`, a partir do arquivo; mantém o original se já for menor."""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            prepared = prepare_image_for_ocr(image)
+    except (UnidentifiedImageError, OSError) as e:
+        print(f"Não foi possível preparar a imagem para o OCR, enviando o original: {e}")
+        return content
+    return prepared if len(prepared) < len(content) else content
+
+
+def render_pdf_pages(file_path: str, page_indexes: list[int]) -> list[bytes]:
+    """Renderiza páginas do PDF (pypdfium2) como imagens prontas para o OCR."""
+    import pypdfium2 as pdfium
+
+    contents = []
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        for index in page_indexes:
+            page = pdf[index]
+            try:
+                width, height = page.get_size()  # em pontos (1/72 de polegada)
+                scale = min(OCR_RENDER_DPI / 72, OCR_MAX_DIMENSION / max(width, height, 1))
+                image = page.render(scale=scale, grayscale=True).to_pil()
+                contents.append(prepare_image_for_ocr(image))
+            finally:
+                page.close()
+    finally:
+        pdf.close()
+    return contents
+
+
+def _ocr_scanned_pages(file_path: str, pages: Iterable[str], client=None) -> Iterator[str]:
+    """
+    Repassa as páginas em ordem, trocando o texto das que não têm camada de
+    texto pelo OCR da página renderizada. As páginas digitalizadas são
+    agrupadas em lotes de até `VISION_BATCH_SIZE` por chamada ao Vision.
+    """
+    pending: list[str] = []
+    scanned: list[int] = []  # posições em `pending` que precisam de OCR
+    first_index = 0
+
+    def flush() -> list[str]:
+        nonlocal pending, scanned, first_index
+        if scanned:
+            images = render_pdf_pages(file_path, [first_index + position for position in scanned])
+            metrics.OCR_PAGES.labels(file_type="pdf").inc(len(images))
+            for position, text in zip(scanned, extract_text_from_image_contents(images, client=client)):
+                pending[position] = text
+        ready, first_index = pending, first_index + len(pending)
+        pending, scanned = [], []
+        return ready
+
+    for page_text in pages:
+        if needs_ocr(page_text):
+            scanned.append(len(pending))
+        elif not scanned:
+            # Nada esperando o OCR: a página segue direto
+            first_index += 1
+            yield page_text
+            continue
+        pending.append(page_text)
+        if len(scanned) >= VISION_BATCH_SIZE:
+            yield from flush()
+    yield from flush()
+
+
+def extract_pdf(
+    file_path: str, on_page: Optional[Callable[[int, int], None]] = None, client=None
+) -> ExtractedText:
+    """
+    Extrai o texto de um PDF, mantendo as posições de cada página. Usa a camada
+    de texto onde ela existe e faz OCR só das páginas digitalizadas.
+    `on_page(página, total)` é chamado à medida que cada página fica pronta.
+    """
+    page_count = count_pdf_pages(file_path)
+    pages = _ocr_scanned_pages(
+        file_path, iter_pdf_pages_parallel(file_path, page_count=page_count), client=client
+    )
+    if on_page is not None:
+        pages = _report_pages(pages, page_count, on_page)
+    return join_pages(pages)
+
+
+def extract_text_from_pdf(
+    file_path: str, on_page: Optional[Callable[[int, int], None]] = None, client=None
+) -> str:
+    """Extrai texto de um arquivo PDF."""
+    return extract_pdf(file_path, on_page=on_page, client=client).text
+
+def extract_text_from_image_contents(contents: list[bytes], client=None) -> list[str]:
+    """
+    Usa o Google Cloud Vision para extrair texto de várias imagens, agrupando-as
+    em requisições `batch_annotate_images` de até `VISION_BATCH_SIZE` imagens.
+    """
+    from google.cloud import vision
+
+    if client is None:
+        client = clients.get_vision_client()
+
+    feature = vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)
+    texts = []
+    for start in range(0, len(contents), VISION_BATCH_SIZE):
+        requests = [
+            vision.AnnotateImageRequest(image=vision.Image(content=content), features=[feature])
+            for content in contents[start:start + VISION_BATCH_SIZE]
+        ]
+        metrics.VISION_BYTES_SENT.inc(sum(len(request.image.content) for request in requests))
+        with metrics.external_call("vision"):
+            batch = client.batch_annotate_images(requests=requests)
+
+        for response in batch.responses:
+            if response.error.message:
+                raise Exception(
+                    f"{response.error.message}\nPara mais detalhes, veja https://cloud.google.com/apis/design/errors"
+                )
+            annotations = response.text_annotations
+            # O primeiro texto retornado é o texto completo detectado na imagem.
+            texts.append(annotations[0].description if annotations else "")
+    return texts
+
+
+def extract_text_from_images(file_paths: list[str], client=None) -> list[str]:
+    """
+    Extrai o texto de vários arquivos de imagem com o mínimo de chamadas ao
+    Vision, depois de reduzi-los à resolução que o OCR precisa.
+    """
+    contents = []
+    for file_path in file_paths:
+        with open(file_path, "rb") as image_file:
+            contents.append(prepare_image_content_for_ocr(image_file.read()))
+    metrics.OCR_PAGES.labels(file_type="image").inc(len(contents))
+    return extract_text_from_image_contents(contents, client=client)
+
+
+def extract_text_from_image(file_path: str, client=None) -> str:
+    """Usa o Google Cloud Vision para extrair texto de uma imagem."""
+    return extract_text_from_images([file_path], client=client)[0]
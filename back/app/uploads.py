@@ -0,0 +1,321 @@
+# app/uploads.py
+"""
+Recebimento de uploads em streaming.
+
+O corpo multipart é lido em pedaços diretamente do ASGI e gravado em disco à
+medida que chega, calculando o SHA-256 no caminho. O arquivo final recebe um
+nome derivado do conteúdo (`<sha256><extensão>`), então envios idênticos
+apontam para o mesmo arquivo e nomes de arquivos nunca colidem.
+
+Arquivos ZIP (upload em lote) também são gravados em streaming e depois
+descompactados membro a membro, em pedaços, sem carregar nenhum deles na memória.
+"""
+import os
+import hashlib
+import uuid
+import zipfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import anyio
+from fastapi import HTTPException, Request, status
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Diretório para salvar os uploads (em produção, use um serviço como o AWS S3)
+UPLOAD_DIRECTORY = Path(os.getenv("UPLOAD_DIRECTORY", "uploads"))
+UPLOAD_DIRECTORY.mkdir(exist_ok=True)
+
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE_MB", 50)) * 1024 * 1024
+# Limites do upload em lote: tamanho total (enviado e descompactado) e arquivos
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE_MB", 1024)) * 1024 * 1024
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", 200))
+# Folga para os cabeçalhos do multipart ao comparar com o Content-Length
+MULTIPART_OVERHEAD = 16 * 1024
+
+# Tipos aceitos e a extensão usada no nome do arquivo salvo
+ALLOWED_CONTENT_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "application/pdf": ".pdf",
+}
+ARCHIVE_CONTENT_TYPES = {
+    "application/zip": ".zip",
+    "application/x-zip-compressed": ".zip",
+}
+# Extensões aceitas dentro de um ZIP e a extensão do arquivo salvo
+ARCHIVE_MEMBER_SUFFIXES = {".pdf": ".pdf", ".jpg": ".jpg", ".jpeg": ".jpg", ".png": ".png"}
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class StoredFile:
+    path: Path
+    content_hash: str
+    size: int
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    # False quando o mesmo conteúdo já estava armazenado (o arquivo pode
+    # pertencer a outro documento e não deve ser apagado numa falha)
+    created: bool = True
+
+
+def multipart_request_body(field_name: str = "file", multiple: bool = False) -> dict:
+    """
+    `openapi_extra` das rotas de upload: documenta o corpo multipart, que não
+    aparece sozinho porque o arquivo é lido manualmente (`receive_files`).
+    """
+    file_schema = {"type": "string", "format": "binary"}
+    if multiple:
+        file_schema = {"type": "array", "items": file_schema}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {field_name: file_schema},
+                        "required": [field_name],
+                    }
+                }
+            },
+        }
+    }
+
+
+def payload_too_large(limit: int = MAX_UPLOAD_SIZE) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Arquivo excede o limite de {limit // (1024 * 1024)} MB.",
+    )
+
+
+class FileSink:
+    """Grava um arquivo em pedaços, calculando o hash e aplicando o limite de tamanho."""
+
+    def __init__(self, suffix: str, max_size: int = MAX_UPLOAD_SIZE):
+        self.suffix = suffix
+        self.max_size = max_size
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._temp_path = UPLOAD_DIRECTORY / f".{uuid.uuid4().hex}.part"
+        self._file = None
+
+    async def open(self) -> "FileSink":
+        self._file = await anyio.open_file(self._temp_path, "wb")
+        return self
+
+    async def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise payload_too_large(self.max_size)
+        self._digest.update(chunk)
+        await self._file.write(chunk)
+
+    async def close(self, filename: Optional[str] = None, content_type: Optional[str] = None) -> StoredFile:
+        """Conclui a gravação e move o arquivo para o nome endereçado pelo conteúdo."""
+        await self._file.aclose()
+        content_hash = self._digest.hexdigest()
+        final_path = UPLOAD_DIRECTORY / f"{content_hash}{self.suffix}"
+        created = not await anyio.Path(final_path).exists()
+        if created:
+            await anyio.Path(self._temp_path).rename(final_path)
+        else:
+            # Mesmo conteúdo já armazenado: descarta a cópia temporária
+            await anyio.Path(self._temp_path).unlink()
+        return StoredFile(
+            path=final_path,
+            content_hash=content_hash,
+            size=self.size,
+            filename=filename,
+            content_type=content_type,
+            created=created,
+        )
+
+    async def discard(self) -> None:
+        if self._file is not None:
+            await self._file.aclose()
+        await anyio.Path(self._temp_path).unlink(missing_ok=True)
+
+
+async def receive_files(
+    request: Request,
+    field_name: str = "file",
+    max_files: int = 1,
+    suffix: Optional[str] = None,
+    allowed_types: dict[str, str] = ALLOWED_CONTENT_TYPES,
+    max_total: Optional[int] = None,
+) -> list[StoredFile]:
+    """
+    Lê o corpo multipart da requisição em streaming e grava cada arquivo do campo
+    `field_name` em disco, sem prender uma thread durante todo o upload nem manter
+    o corpo em memória.
+
+    Com `suffix`, o tipo do arquivo não é validado aqui (quem chama valida o
+    conteúdo) e o arquivo é salvo com essa extensão. Cada arquivo tem até
+    `MAX_UPLOAD_SIZE` bytes (ZIPs, até `max_total`), e todos juntos até
+    `max_total` (padrão: `MAX_UPLOAD_SIZE` por arquivo).
+    """
+    max_total = max_total or MAX_UPLOAD_SIZE * max_files
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        try:
+            content_length = int(content_length)
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            raise HTTPException(status_code=400, detail="Cabeçalho Content-Length inválido.")
+    if content_length and content_length > max_total + MULTIPART_OVERHEAD * max_files:
+        # Rejeita antes de ler qualquer byte do corpo
+        raise payload_too_large(max_total)
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Envie o arquivo como multipart/form-data.")
+
+    # O parser é síncrono e baseado em callbacks: os eventos são acumulados e
+    # processados (com escrita assíncrona) depois de cada pedaço recebido.
+    events: list[tuple[str, bytes]] = []
+    callbacks = {
+        "on_part_begin": lambda: events.append(("part_begin", b"")),
+        "on_header_field": lambda data, start, end: events.append(("header_field", data[start:end])),
+        "on_header_value": lambda data, start, end: events.append(("header_value", data[start:end])),
+        "on_header_end": lambda: events.append(("header_end", b"")),
+        "on_headers_finished": lambda: events.append(("headers_finished", b"")),
+        "on_part_data": lambda data, start, end: events.append(("part_data", bytes(data[start:end]))),
+        "on_part_end": lambda: events.append(("part_end", b"")),
+    }
+    parser = MultipartParser(params[b"boundary"], callbacks)
+
+    stored: list[StoredFile] = []
+    headers: dict[bytes, bytes] = {}
+    header_field = header_value = b""
+    sink: Optional[FileSink] = None
+    part_info: tuple[Optional[str], Optional[str]] = (None, None)
+    received = 0
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for kind, data in events:
+                if kind == "part_begin":
+                    headers = {}
+                elif kind == "header_field":
+                    header_field += data
+                elif kind == "header_value":
+                    header_value += data
+                elif kind == "header_end":
+                    headers[header_field.lower()] = header_value
+                    header_field = header_value = b""
+                elif kind == "headers_finished":
+                    _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+                    name = disposition.get(b"name", b"").decode()
+                    filename = disposition.get(b"filename")
+                    if name != field_name or filename is None:
+                        continue  # Campos que não são o arquivo são ignorados
+                    if len(stored) >= max_files:
+                        raise HTTPException(status_code=400, detail="Arquivos demais na requisição.")
+                    part_type = headers.get(b"content-type", b"").decode().split(";")[0].strip()
+                    if suffix is None and part_type not in allowed_types:
+                        raise HTTPException(status_code=400, detail="Tipo de arquivo inválido.")
+                    part_suffix = suffix or allowed_types[part_type]
+                    max_size = max_total if part_suffix == ".zip" else MAX_UPLOAD_SIZE
+                    sink = await FileSink(part_suffix, max_size).open()
+                    part_info = (filename.decode(errors="replace"), part_type)
+                elif kind == "part_data" and sink is not None:
+                    received += len(data)
+                    if received > max_total:
+                        raise payload_too_large(max_total)
+                    await sink.write(data)
+                elif kind == "part_end" and sink is not None:
+                    stored.append(await sink.close(*part_info))
+                    sink = None
+            events.clear()
+        parser.finalize()
+    except BaseException:
+        if sink is not None:
+            await sink.discard()
+        await anyio.to_thread.run_sync(discard_files, stored)
+        raise
+
+    if not stored:
+        raise HTTPException(status_code=400, detail=f"Campo '{field_name}' não enviado.")
+    return stored
+
+
+def discard_files(files: list[StoredFile]) -> None:
+    """Apaga os arquivos criados por uma requisição que falhou (os que já existiam ficam)."""
+    for stored in files:
+        if stored.created:
+            stored.path.unlink(missing_ok=True)
+
+
+def _store_stream(source, suffix: str, max_size: int = MAX_UPLOAD_SIZE) -> StoredFile:
+    """Versão síncrona do `FileSink`: copia `source` em pedaços para o nome endereçado pelo conteúdo."""
+    digest = hashlib.sha256()
+    size = 0
+    temp_path = UPLOAD_DIRECTORY / f".{uuid.uuid4().hex}.part"
+    try:
+        with open(temp_path, "wb") as target:
+            while chunk := source.read(COPY_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise payload_too_large(max_size)
+                digest.update(chunk)
+                target.write(chunk)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    content_hash = digest.hexdigest()
+    final_path = UPLOAD_DIRECTORY / f"{content_hash}{suffix}"
+    created = not final_path.exists()
+    if created:
+        temp_path.replace(final_path)
+    else:
+        temp_path.unlink()
+    return StoredFile(path=final_path, content_hash=content_hash, size=size, created=created)
+
+
+def extract_archive(
+    archive: StoredFile, max_files: int = MAX_BATCH_FILES, max_total: int = MAX_BATCH_SIZE
+) -> tuple[list[StoredFile], list[str]]:
+    """
+    Descompacta os PDFs e imagens de um ZIP, membro a membro, para o diretório de
+    uploads. Devolve os arquivos extraídos e os nomes ignorados (tipo não
+    suportado ou protegidos por senha). O tamanho descompactado de cada membro e
+    do total é verificado durante a cópia, e não pelo cabeçalho do ZIP, que
+    pode mentir. Síncrona: rode em uma thread.
+    """
+    stored: list[StoredFile] = []
+    skipped: list[str] = []
+    total = 0
+    try:
+        with zipfile.ZipFile(archive.path) as zf:
+            for info in zf.infolist():
+                name = info.filename
+                base = os.path.basename(name)
+                if info.is_dir() or name.startswith("__MACOSX/") or not base or base.startswith("."):
+                    continue
+                member_suffix = ARCHIVE_MEMBER_SUFFIXES.get(os.path.splitext(base)[1].lower())
+                if member_suffix is None or info.flag_bits & 0x1:
+                    skipped.append(name)
+                    continue
+                if len(stored) >= max_files:
+                    raise HTTPException(status_code=400, detail="Arquivos demais no ZIP.")
+                with zf.open(info) as source:
+                    member = _store_stream(source, member_suffix, min(MAX_UPLOAD_SIZE, max_total - total))
+                total += member.size
+                member.filename = name
+                stored.append(member)
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, EOFError, zlib.error) as e:
+        discard_files(stored)
+        raise HTTPException(status_code=400, detail=f"Arquivo ZIP inválido: {e}")
+    except BaseException:
+        discard_files(stored)
+        raise
+    finally:
+        # Só os membros extraídos são processados; o ZIP em si não é mantido
+        archive.path.unlink(missing_ok=True)
+    return stored, skipped
@@ -1,15 +1,57 @@
 # app/worker.py
+import os
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_ready
 
 # O 'broker' é a URL do Redis, por onde as tarefas são enviadas.
 # O 'backend' também é o Redis, onde os resultados das tarefas são armazenados.
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
 celery_app = Celery(
     "tasks",
-    broker="redis://localhost:6379/0",
-    backend="redis://localhost:6379/0",
+    broker=REDIS_URL,
+    backend=REDIS_URL,
     include=["app.tasks"] # Aponta para o arquivo onde escreveremos nossas tarefas
 )
 
 celery_app.conf.update(
     task_track_started=True,
-)
\ No newline at end of file
+    # Cada etapa do pipeline vai para a fila adequada ao seu tipo de carga:
+    # `cpu` (extração/OCR, worker prefork) e `io` (chamadas à IA e ao banco,
+    # worker com pool de threads), permitindo escalar cada uma separadamente.
+    task_routes={
+        "app.tasks.extract_document_text": {"queue": "cpu"},
+        "app.tasks.extract_batch_images": {"queue": "cpu"},
+        "app.tasks.*": {"queue": "io"},
+    },
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    # Em testes, as tarefas podem rodar no próprio processo, sem Redis
+    task_always_eager=os.getenv("CELERY_TASK_ALWAYS_EAGER", "false").lower() == "true",
+    task_eager_propagates=True,
+)
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # Conexões gRPC e do banco não podem ser compartilhadas entre processos após
+    # o fork: cada processo filho cria as suas na primeira tarefa.
+    from . import clients
+    from .database import engine
+    clients.reset_clients()
+    # close=False: apenas esquece as conexões herdadas, sem fechá-las no pai
+    engine.dispose(close=False)
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(pid=None, **kwargs):
+    from . import metrics
+    metrics.mark_process_dead(pid or os.getpid())
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    # As métricas dos processos filhos são somadas (PROMETHEUS_MULTIPROC_DIR) e
+    # expostas pelo processo principal do worker em WORKER_METRICS_PORT.
+    port = os.getenv("WORKER_METRICS_PORT")
+    if port:
+        from prometheus_client import start_http_server
+        from . import metrics
+        start_http_server(int(port), registry=metrics.collector_registry())
@@ -0,0 +1,170 @@
+# benchmarks/bench_batch_upload.py
+"""
+Compara a ingestão de documentos pela rota de upload avulso
+(`POST /documents/upload`, um arquivo por requisição) com o upload em lote
+(`POST /documents/upload/batch`), enviando os PDFs soltos ou dentro de um ZIP.
+
+Mede só a ingestão: receber os arquivos, criar os documentos e enfileirar o
+processamento. O enfileiramento é substituído por um contador de mensagens,
+então o pipeline não roda. Para cada modo: documentos por segundo, requisições,
+mensagens para a fila e comandos SQL por documento.
+
+Uso (a partir de back/):
+    python -m benchmarks.bench_batch_upload --documents 200 --batch-size 50 --pages 2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from benchmarks.bench_pipeline import _configure_environment, _git_commit
+
+
+def _make_pdfs(directory: Path, count: int, pages: int) -> list[tuple[str, bytes]]:
+    from app.testing.synthetic import make_text_pdf
+
+    files = []
+    for seed in range(count):
+        path = make_text_pdf(str(directory / f"doc_{seed}.pdf"), pages, seed=seed)
+        files.append((Path(path).name, Path(path).read_bytes()))
+    return files
+
+
+def _zip(files: list[tuple[str, bytes]]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files:
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def run(args, tmp: str) -> dict:
+    import httpx
+    from sqlalchemy import event, text
+    from sqlmodel import SQLModel
+
+    from app import task_queue
+    from app.database import engine
+    from app.main import app
+
+    with engine.connect() as connection:
+        connection.execute(text("PRAGMA journal_mode=WAL"))
+    SQLModel.metadata.create_all(engine)
+
+    messages = 0
+
+    def count_message(*_args, **_kwargs):
+        nonlocal messages
+        messages += 1
+
+    task_queue.enqueue_document = count_message
+    task_queue.enqueue_batch = count_message
+
+    statements = 0
+
+    def count_statement(*_):
+        nonlocal statements
+        statements += 1
+
+    files = _make_pdfs(Path(tmp), args.documents, args.pages)
+    batches = [files[i:i + args.batch_size] for i in range(0, len(files), args.batch_size)]
+
+    async def ingest(client, headers, mode: str) -> int:
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def post(url: str, multipart: list) -> int:
+            async with semaphore:
+                response = await client.post(url, headers=headers, files=multipart)
+            response.raise_for_status()
+            body = response.json()
+            return len(body["documents"]) if "documents" in body else 1
+
+        if mode == "single":
+            requests = [
+                post("/documents/upload", [("file", (name, content, "application/pdf"))])
+                for name, content in files
+            ]
+        elif mode == "batch":
+            requests = [
+                post("/documents/upload/batch", [("files", (name, content, "application/pdf")) for name, content in batch])
+                for batch in batches
+            ]
+        else:
+            requests = [
+                post("/documents/upload/batch", [("files", (f"lote_{index}.zip", _zip(batch), "application/zip"))])
+                for index, batch in enumerate(batches)
+            ]
+        return sum(await asyncio.gather(*requests))
+
+    async def run_modes() -> dict:
+        nonlocal messages, statements
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+            await client.post("/users", json={"username": "bench", "email": "bench@local", "password": "bench"})
+            response = await client.post("/token", data={"username": "bench@local", "password": "bench"})
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            results = {}
+            for mode in args.modes:
+                messages = statements = 0
+                requests = len(files) if mode == "single" else len(batches)
+                event.listen(engine, "before_cursor_execute", count_statement)
+                start = time.perf_counter()
+                try:
+                    documents = await ingest(client, headers, mode)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    event.remove(engine, "before_cursor_execute", count_statement)
+                results[mode] = {
+                    "documents": documents,
+                    "requests": requests,
+                    "seconds": round(elapsed, 3),
+                    "documents_per_second": round(documents / elapsed, 1),
+                    "queue_messages": messages,
+                    "db_statements_per_document": round(statements / max(1, documents), 2),
+                }
+            return results
+
+    results = asyncio.run(run_modes())
+    baseline = results.get("single", {}).get("documents_per_second")
+    if baseline:
+        for result in results.values():
+            result["speedup"] = round(result["documents_per_second"] / baseline, 2)
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {key: value for key, value in vars(args).items() if key != "verbose"},
+        "modes": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=2, help="Páginas de cada PDF")
+    parser.add_argument("--batch-size", type=int, default=50, help="Arquivos por requisição em lote")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requisições simultâneas")
+    parser.add_argument("--modes", nargs="+", default=["single", "batch", "zip"], choices=["single", "batch", "zip"])
+    parser.add_argument("--verbose", action="store_true", help="Mostra os logs da aplicação")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure_environment(tmp)
+        with contextlib.ExitStack() as stack:
+            if not args.verbose:
+                devnull = stack.enter_context(open(os.devnull, "w"))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            result = run(args, tmp)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_duplicates.py
+"""
+Mede o custo da detecção de quase duplicatas na gravação de flashcards
+(inserção + `duplicates.index_document`) à medida que o acervo do usuário
+cresce. Com o índice LSH, o tempo de gravação de um lote deve ficar
+praticamente constante, e não crescer com o acervo.
+
+Metade de cada lote medido são cópias levemente alteradas de cartões já
+existentes (para medir quantas são detectadas); a outra metade é nova.
+
+Uso (a partir de back/):
+    python -m benchmarks.bench_duplicates --sizes 1000 10000 50000
+"""
+import argparse
+import json
+import random
+import string
+import tempfile
+import time
+
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import crud, duplicates, models
+
+SEED_BATCH = 500
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    # Vocabulário aberto: com poucas palavras, todos os cartões seriam parecidos
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(words)
+    ).capitalize()
+
+
+def _card(rng: random.Random) -> dict:
+    return {"front": _sentence(rng, 8) + "?", "back": _sentence(rng, 10) + "."}
+
+
+def _perturb(card: dict) -> dict:
+    # Mesma pergunta com pequenas diferenças de redação
+    return {"front": "Explique: " + card["front"].lower(), "back": card["back"].rstrip(".") + "!"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--batch", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.database_url or f"sqlite:///{tmp}/bench.db")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            user = models.User(username=f"bench{time.time_ns()}", email=f"{time.time_ns()}@bench", hashed_password="")
+            session.add(user)
+            session.commit()
+            user_id = user.id
+
+            existing: list[dict] = []
+            for size in sorted(args.sizes):
+                while len(existing) < size:
+                    document = crud.create_document_for_user(session, user_id=user_id, file_path="bench.pdf")
+                    batch = [_card(rng) for _ in range(min(SEED_BATCH, size - len(existing)))]
+                    crud.create_flashcards_for_document(session, batch, document.id, user_id=user_id)
+                    duplicates.index_document(session, document.id, user_id)
+                    existing.extend(batch)
+
+                copies = [_perturb(card) for card in rng.sample(existing, args.batch // 2)]
+                fresh = [_card(rng) for _ in range(args.batch - len(copies))]
+                document = crud.create_document_for_user(session, user_id=user_id, file_path="bench.pdf")
+                start = time.perf_counter()
+                created = crud.create_flashcards_for_document(session, copies + fresh, document.id, user_id=user_id)
+                duplicates.index_document(session, document.id, user_id)
+                elapsed = time.perf_counter() - start
+                # A detecção grava `duplicate_of` no banco; os objetos devolvidos não a veem
+                duplicate_of = dict(session.exec(
+                    select(models.Flashcard.id, models.Flashcard.duplicate_of)
+                    .where(models.Flashcard.document_id == document.id)
+                ).all())
+                existing.extend(copies + fresh)
+
+                print(json.dumps({
+                    "database": engine.dialect.name,
+                    "existing_cards": size,
+                    "batch": args.batch,
+                    "insert_ms": elapsed * 1000,
+                    "duplicates_found": sum(duplicate_of[fc.id] is not None for fc in created[:len(copies)]),
+                    "false_positives": sum(duplicate_of[fc.id] is not None for fc in created[len(copies):]),
+                    "expected_duplicates": len(copies),
+                }))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_export.py
+"""
+Mede a exportação em streaming (`app.decks`) de baralhos de vários tamanhos:
+tempo, bytes gerados e pico de memória alocada pelo Python (tracemalloc)
+enquanto o arquivo é consumido pedaço a pedaço. O pico deve ficar estável
+com o crescimento do baralho.
+
+Uso (a partir de back/):
+    python -m benchmarks.bench_export --cards 10000 100000 1000000
+    python -m benchmarks.bench_export --database-url postgresql://...
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import decks, models
+from app.testing.synthetic import random_paragraph
+
+SEED_BATCH = 5000
+
+
+def seed(engine, cards: int) -> int:
+    """Cria um usuário com um documento de `cards` cartões; devolve o ID do usuário."""
+    rng = random.Random(0)
+    with Session(engine) as session:
+        user = models.User(username=f"export-{time.time_ns()}", email=f"{time.time_ns()}@bench", hashed_password="")
+        session.add(user)
+        session.commit()
+        document = models.Document(user_id=user.id, file_path="bench.pdf")
+        session.add(document)
+        session.commit()
+        for start in range(0, cards, SEED_BATCH):
+            session.execute(insert(models.Flashcard), [
+                {"front": random_paragraph(rng, 10), "back": random_paragraph(rng, 20), "document_id": document.id}
+                for _ in range(min(SEED_BATCH, cards - start))
+            ])
+        session.commit()
+        return user.id
+
+
+def measure(engine, user_id: int, export_format: str) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = 0
+    for chunk in decks.iter_export(lambda: Session(engine), export_format, user_id, "Bench"):
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 3), "bytes": size, "peak_memory_kb": round(peak / 1024)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--formats", nargs="+", default=list(decks.FORMATS))
+    parser.add_argument("--database-url", help="Padrão: SQLite temporário")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.database_url or f"sqlite:///{tmp}/bench.db")
+        SQLModel.metadata.create_all(engine)
+        for cards in args.cards:
+            user_id = seed(engine, cards)
+            for export_format in args.formats:
+                print(json.dumps({"cards": cards, "format": export_format, **measure(engine, user_id, export_format)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_login.py
+"""
+Mede logins/s concorrentes e a latência de um endpoint leve durante o pico de
+logins, comparando o bcrypt no threadpool (PASSWORD_HASH_WORKERS=0, como antes)
+com o pool de processos dedicado.
+
+Uso (a partir de back/):
+    python -m benchmarks.bench_login --logins 200 --concurrency 50 --workers 0 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+async def _run_single(logins: int, concurrency: int) -> dict:
+    import httpx
+    from sqlmodel import SQLModel
+
+    from app import passwords
+    from app.database import engine
+    from app.main import app
+
+    SQLModel.metadata.create_all(engine)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/users", json={"username": "bench", "email": "bench@example.com", "password": "senha"})
+        semaphore = asyncio.Semaphore(concurrency)
+        ping_latencies: list[float] = []
+        done = asyncio.Event()
+
+        async def login() -> None:
+            async with semaphore:
+                response = await client.post("/token", data={"username": "bench@example.com", "password": "senha"})
+                response.raise_for_status()
+
+        async def ping() -> None:
+            # Endpoint sem relação com autenticação, disputando o mesmo processo
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/")
+                ping_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        pinger = asyncio.create_task(ping())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await pinger
+
+    passwords.shutdown_pool()
+    ping_latencies.sort()
+    return {
+        "hash_workers": passwords.PASSWORD_HASH_WORKERS,
+        "logins": logins,
+        "concurrency": concurrency,
+        "logins_per_second": logins / elapsed,
+        "unrelated_p50": statistics.median(ping_latencies),
+        "unrelated_p95": ping_latencies[int(len(ping_latencies) * 0.95) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, os.cpu_count() or 1])
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(asyncio.run(_run_single(args.logins, args.concurrency))))
+        return
+
+    # Cada configuração roda em um processo novo, com banco SQLite próprio
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ,
+                "PASSWORD_HASH_WORKERS": str(workers),
+                "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+                "SECRET_KEY": os.getenv("SECRET_KEY", "bench"),
+                "ALGORITHM": os.getenv("ALGORITHM", "HS256"),
+            }
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_login", "--single",
+                 "--logins", str(args.logins), "--concurrency", str(args.concurrency)],
+                env=env,
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
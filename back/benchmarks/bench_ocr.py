@@ -0,0 +1,99 @@
+# benchmarks/bench_ocr.py
+"""
+Mede o OCR híbrido de `app.text_extractor` com um Vision falso que simula a
+latência e a banda de upload (ver `app/testing/fakes.py`).
+
+Para cada arquivo sintético compara:
+- `baseline`: imagens enviadas no tamanho original; em PDFs, OCR de todas as
+  páginas renderizadas a 300 DPI em PNG (sem OCR, como antes, as páginas
+  digitalizadas simplesmente ficavam sem texto);
+- `hybrid`: camada de texto onde ela existe, OCR só das páginas digitalizadas,
+  imagens reduzidas e recomprimidas antes do envio.
+
+Uso (a partir de back/):
+    python -m benchmarks.bench_ocr --bandwidth 2000000 --latency 0.3
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("LOG_SPANS", "false")
+
+from app import text_extractor  # noqa: E402
+from app.testing.fakes import FakeVisionClient  # noqa: E402
+from app.testing.synthetic import make_mixed_pdf, make_scanned_pdf, make_text_image, make_text_pdf  # noqa: E402
+
+
+def _baseline_pdf(path: str, client) -> str:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    contents = []
+    for index in range(len(pdf)):
+        output = io.BytesIO()
+        pdf[index].render(scale=300 / 72).to_pil().save(output, format="PNG")
+        contents.append(output.getvalue())
+    pdf.close()
+    return "".join(text_extractor.extract_text_from_image_contents(contents, client=client))
+
+
+def _baseline_image(path: str, client) -> str:
+    return text_extractor.extract_text_from_image_contents([Path(path).read_bytes()], client=client)[0]
+
+
+def _hybrid_pdf(path: str, client) -> str:
+    return text_extractor.extract_text_from_pdf(path, client=client)
+
+
+def _hybrid_image(path: str, client) -> str:
+    return text_extractor.extract_text_from_image(path, client=client)
+
+
+def _measure(func, path: str, args) -> dict:
+    client = FakeVisionClient(latency=args.latency, bandwidth=args.bandwidth)
+    start = time.perf_counter()
+    text = func(path, client)
+    return {
+        "seconds": round(time.perf_counter() - start, 3),
+        "vision_calls": client.calls,
+        "bytes_sent": client.bytes_received,
+        "text_chars": len(text),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.3, help="Latência de cada chamada ao Vision (s)")
+    parser.add_argument("--bandwidth", type=float, default=2_000_000, help="Banda de upload (bytes/s)")
+    parser.add_argument("--pages", type=int, default=10, help="Páginas de cada PDF")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = [
+            ("pdf-text", make_text_pdf(f"{tmp}/text.pdf", args.pages), _baseline_pdf, _hybrid_pdf),
+            ("pdf-mixed", make_mixed_pdf(f"{tmp}/mixed.pdf", args.pages), _baseline_pdf, _hybrid_pdf),
+            ("pdf-scanned", make_scanned_pdf(f"{tmp}/scanned.pdf", args.pages), _baseline_pdf, _hybrid_pdf),
+            ("photo-12mp-jpeg", make_text_image(f"{tmp}/photo.jpg", 4000, 3000), _baseline_image, _hybrid_image),
+            ("scan-a4-png", make_text_image(f"{tmp}/scan.png", 2480, 3508), _baseline_image, _hybrid_image),
+        ]
+        for kind, path, baseline, hybrid in inputs:
+            before, after = _measure(baseline, path, args), _measure(hybrid, path, args)
+            results.append({
+                "input": kind,
+                "file_bytes": os.path.getsize(path),
+                "baseline": before,
+                "hybrid": after,
+                "bytes_saved": before["bytes_sent"] - after["bytes_sent"],
+                "speedup": round(before["seconds"] / max(after["seconds"], 1e-6), 2),
+            })
+            print(json.dumps(results[-1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_pdf_extraction.py
+"""
+Compara a extração de PDF original (serial, com `+=`) com a extração em
+streaming/paralela de `app.text_extractor` em PDFs sintéticos.
+
+Uso (a partir de back/):
+    python -m benchmarks.bench_pdf_extraction --pages 10 100 1000
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import pdfplumber
+
+from app import text_extractor
+from app.testing.synthetic import make_text_pdf
+
+
+def legacy_extract_text_from_pdf(file_path: str) -> str:
+    """Implementação anterior, mantida aqui apenas como referência."""
+    full_text = ""
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages:
+            full_text += page.extract_text() + "\n"
+    return full_text
+
+
+def _timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--workers", type=int, default=text_extractor.PDF_EXTRACTION_WORKERS)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = str(Path(tmp) / f"synthetic_{pages}.pdf")
+            make_text_pdf(path, pages)
+            results.append({
+                "pages": pages,
+                "legacy_seconds": _timed(legacy_extract_text_from_pdf, path),
+                "serial_seconds": _timed(
+                    lambda p: text_extractor.join_pages(text_extractor.iter_pdf_pages(p)), path
+                ),
+                "parallel_seconds": _timed(
+                    lambda p: text_extractor.join_pages(
+                        text_extractor.iter_pdf_pages_parallel(p, workers=args.workers)
+                    ),
+                    path,
+                ),
+            })
+            print(json.dumps(results[-1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# benchmarks/bench_pipeline.py
+"""
+Benchmark ponta a ponta e offline do pipeline: a API roda no próprio processo
+sobre um SQLite temporário, o Celery em modo eager (com um pool de threads no
+papel dos workers) e o Gemini e o Vision são substituídos por fakes locais com
+latência configurável (ver `app/testing/fakes.py`).
+
+Gera PDFs e imagens sintéticos de vários tamanhos, envia todos pela rota de
+upload e mede:
+- a latência do upload;
+- documentos processados por minuto;
+- p50/p95 do tempo até o primeiro flashcard gravado e até a conclusão;
+- a quantidade de comandos SQL executados.
+
+O resultado é um JSON (com o commit atual) para comparar execuções entre commits.
+
+Uso (a partir de back/):
+    python -m benchmarks.bench_pipeline --pdf-pages 1 5 20 --image-sizes 512 1024 \\
+        --repeat 5 --gemini-latency 0.5 --vision-latency 0.2 --workers 4 --output antes.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+
+
+def _configure_environment(tmp: str) -> None:
+    """Precisa rodar antes de importar o `app`, que lê a configuração ao ser importado."""
+    upload_dir = Path(tmp) / "uploads"
+    upload_dir.mkdir()
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+    os.environ["UPLOAD_DIRECTORY"] = str(upload_dir)
+    os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
+    os.environ["EVENTS_BACKEND"] = "memory"
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"
+    os.environ["LOG_SPANS"] = "false"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    # Mede o pipeline, não a cota do Gemini (ver bench_rate_limit.py)
+    os.environ.setdefault("GEMINI_REQUESTS_PER_MINUTE", "1000000")
+    os.environ.setdefault("GEMINI_TOKENS_PER_MINUTE", "1000000000")
+    # Sem Redis: os caches e o barramento de eventos ficam no processo
+    for name in ("CACHE_REDIS_URL", "AUTH_CACHE_REDIS_URL"):
+        os.environ.pop(name, None)
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "max": None}
+    values = sorted(values)
+    rank = lambda q: round(values[max(0, math.ceil(q * len(values)) - 1)], 1)
+    return {"p50": rank(0.50), "p95": rank(0.95), "max": round(values[-1], 1)}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _make_inputs(directory: Path, args) -> list[dict]:
+    from app.testing.synthetic import make_png, make_text_pdf
+
+    inputs = []
+    seed = 0
+    for pages in args.pdf_pages:
+        for _ in range(args.repeat):
+            seed += 1
+            path = make_text_pdf(str(directory / f"doc_{seed}.pdf"), pages, seed=seed)
+            inputs.append({"kind": f"pdf-{pages}p", "path": path, "content_type": "application/pdf"})
+    for size in args.image_sizes:
+        for _ in range(args.repeat):
+            seed += 1
+            path = make_png(str(directory / f"img_{seed}.png"), size, size, seed=seed)
+            inputs.append({"kind": f"png-{size}px", "path": path, "content_type": "image/png"})
+    return inputs
+
+
+def run(args, tmp: str) -> dict:
+    import httpx
+    from sqlalchemy import event, text
+    from sqlmodel import SQLModel
+
+    from app import ai_generator, clients, events, rate_limit, task_queue, tasks
+    from app.database import engine
+    from app.main import app
+    from app.testing.fakes import FakeGeminiModel, FakeVisionClient
+
+    # WAL permite leituras da API enquanto os "workers" gravam
+    with engine.begin() as connection:
+        connection.execute(text("PRAGMA journal_mode=WAL"))
+    SQLModel.metadata.create_all(engine)
+
+    gemini = FakeGeminiModel(latency=args.gemini_latency, cards_per_chunk=args.cards_per_chunk)
+    vision = FakeVisionClient(latency=args.vision_latency)
+    clients.set_gemini_model(ai_generator.MODEL_NAME, gemini)
+    clients.set_vision_client(vision)
+
+    # Linha do tempo de cada documento, a partir dos eventos publicados pelo pipeline
+    first_card_at: dict[int, float] = {}
+    finished_at: dict[int, tuple[float, str]] = {}
+
+    class TimelineBus(events.InMemoryEventBus):
+        def publish(self, document_id: int, event: dict) -> None:
+            now = time.perf_counter()
+            if event.get("flashcards"):
+                first_card_at.setdefault(document_id, now)
+            if events.is_terminal(event):
+                finished_at[document_id] = (now, event["status"])
+            super().publish(document_id, event)
+
+    events.set_bus(TimelineBus())
+
+    # Em modo eager, o enfileiramento rodaria o pipeline dentro da requisição:
+    # aqui ele vai para um pool de threads que faz o papel dos workers do Celery.
+    workers = ThreadPoolExecutor(max_workers=args.workers)
+    futures = []
+    task_queue.enqueue_document = lambda document_id, priority=rate_limit.PRIORITY_INTERACTIVE: futures.append(
+        workers.submit(tasks.process_document.apply, kwargs={"document_id": document_id, "priority": priority})
+    )
+
+    statements = 0
+    statements_lock = threading.Lock()
+
+    def count_statement(*_):
+        nonlocal statements
+        with statements_lock:
+            statements += 1
+
+    inputs = _make_inputs(Path(tmp), args)
+
+    async def upload_all() -> dict:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+            await client.post("/users", json={"username": "bench", "email": "bench@local", "password": "bench"})
+            response = await client.post("/token", data={"username": "bench@local", "password": "bench"})
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            semaphore = asyncio.Semaphore(args.concurrency)
+            uploads = {}
+
+            async def upload(item: dict) -> None:
+                with open(item["path"], "rb") as f:
+                    content = f.read()
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post(
+                        "/documents/upload",
+                        headers=headers,
+                        files={"file": (Path(item["path"]).name, content, item["content_type"])},
+                    )
+                    latency = time.perf_counter() - start
+                response.raise_for_status()
+                uploads[response.json()["id"]] = {**item, "start": start, "latency": latency}
+
+            await asyncio.gather(*(upload(item) for item in inputs))
+            return uploads
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    started = time.perf_counter()
+    try:
+        uploads = asyncio.run(upload_all())
+        wait(futures)
+    finally:
+        elapsed = time.perf_counter() - started
+        event.remove(engine, "before_cursor_execute", count_statement)
+        workers.shutdown()
+
+    failed = sum(1 for f in futures if f.exception() is not None)
+    by_kind: dict[str, dict[str, list[float]]] = {}
+    totals: dict[str, list[float]] = {"upload": [], "first_card": [], "completed": []}
+    for document_id, info in uploads.items():
+        kind = by_kind.setdefault(info["kind"], {"upload": [], "first_card": [], "completed": []})
+        samples = {"upload": info["latency"]}
+        if document_id in first_card_at:
+            samples["first_card"] = first_card_at[document_id] - info["start"]
+        if document_id in finished_at and finished_at[document_id][1] == "COMPLETED":
+            samples["completed"] = finished_at[document_id][0] - info["start"]
+        for name, value in samples.items():
+            kind[name].append(value * 1000)
+            totals[name].append(value * 1000)
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output", "verbose")
+        },
+        "documents": len(uploads),
+        "failed": failed,
+        "elapsed_seconds": round(elapsed, 2),
+        "documents_per_minute": round(len(uploads) / elapsed * 60, 1),
+        "upload_latency_ms": _percentiles(totals["upload"]),
+        "time_to_first_card_ms": _percentiles(totals["first_card"]),
+        "time_to_completed_ms": _percentiles(totals["completed"]),
+        "db_statements": {"total": statements, "per_document": round(statements / max(1, len(uploads)), 1)},
+        "fake_calls": {"gemini": gemini.calls, "vision": vision.calls},
+        "by_kind": {
+            kind: {
+                "documents": len(samples["upload"]),
+                "upload_latency_ms": _percentiles(samples["upload"]),
+                "time_to_first_card_ms": _percentiles(samples["first_card"]),
+                "time_to_completed_ms": _percentiles(samples["completed"]),
+            }
+            for kind, samples in sorted(by_kind.items())
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf-pages", type=int, nargs="*", default=[1, 5, 20])
+    parser.add_argument("--image-sizes", type=int, nargs="*", default=[512, 1024])
+    parser.add_argument("--repeat", type=int, default=5, help="Arquivos de cada tamanho")
+    parser.add_argument("--gemini-latency", type=float, default=0.2, help="Segundos por chamada")
+    parser.add_argument("--vision-latency", type=float, default=0.1, help="Segundos por chamada")
+    parser.add_argument("--cards-per-chunk", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4, help="Threads no papel dos workers")
+    parser.add_argument("--concurrency", type=int, default=8, help="Uploads simultâneos")
+    parser.add_argument("--output", help="Também grava o JSON neste arquivo")
+    parser.add_argument("--verbose", action="store_true", help="Mostra os logs da aplicação")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure_environment(tmp)
+        # Os logs da aplicação (print) poluiriam o JSON na saída padrão
+        with contextlib.ExitStack() as stack:
+            if not args.verbose:
+                devnull = stack.enter_context(open(os.devnull, "w"))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            result = run(args, tmp)
+
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/bench_rate_limit.py
+"""
+Benchmark do limite de uso compartilhado do Gemini (`app/rate_limit.py`).
+
+Vários "workers" (threads) chamam um Gemini falso que aplica uma cota de
+requisições por minuto e responde 429 ao estourá-la, como a API real. Uma
+carga de lote satura a cota enquanto chegam chamadas avulsas (interativas) em
+ritmo constante. Mede:
+- chamadas atendidas por minuto, comparadas com a cota;
+- quantos 429 a API devolveu;
+- p50/p95 da latência de cada prioridade (espera por cota + retries + chamada).
+
+Com `--no-limiter` os workers chamam sem coordenação (como antes), só com o
+retry com backoff, para comparação. Os baldes começam vazios, para medir o
+regime sustentado e não a rajada inicial.
+
+Uso (a partir de back/):
+    python -m benchmarks.bench_rate_limit --rpm 600 --bulk-workers 16 --interactive-rate 1 --duration 30
+"""
+import argparse
+import json
+import math
+import os
+import threading
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ["RATE_LIMIT_BACKEND"] = "memory"
+os.environ.setdefault("LOG_SPANS", "false")
+
+from app import ai_generator, rate_limit  # noqa: E402
+from app.testing.fakes import FakeGeminiModel  # noqa: E402
+
+
+class QuotaExceeded(Exception):
+    code = 429
+
+
+class QuotaGeminiModel(FakeGeminiModel):
+    """Gemini falso com cota de requisições por minuto (balde de um minuto, começando vazio)."""
+
+    def __init__(self, requests_per_minute: float, **kwargs):
+        super().__init__(**kwargs)
+        self.requests_per_minute = requests_per_minute
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._level = 0.0
+        self._updated = time.monotonic()
+
+    def generate_content(self, prompt: str, **kwargs):
+        with self._lock:
+            now = time.monotonic()
+            self._level = min(
+                self.requests_per_minute,
+                self._level + (now - self._updated) * self.requests_per_minute / 60,
+            )
+            self._updated = now
+            if self._level < 1:
+                self.rejected += 1
+                raise QuotaExceeded("429 Resource has been exhausted")
+            self._level -= 1
+        return super().generate_content(prompt, **kwargs)
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"p50": None, "p95": None}
+    values = sorted(values)
+    rank = lambda q: round(values[max(0, math.ceil(q * len(values)) - 1)] * 1000, 1)
+    return {"p50": rank(0.50), "p95": rank(0.95)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rpm", type=float, default=600, help="Cota da API (requisições por minuto)")
+    parser.add_argument("--bulk-workers", type=int, default=16)
+    parser.add_argument("--interactive-rate", type=float, default=1.0, help="Chamadas avulsas por segundo")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--latency", type=float, default=0.2, help="Latência de cada chamada (s)")
+    parser.add_argument("--retry-base", type=float, default=0.5, help="Base do backoff em 429 (s)")
+    parser.add_argument("--no-limiter", action="store_true")
+    args = parser.parse_args()
+
+    ai_generator.GEMINI_RETRY_BASE_SECONDS = args.retry_base
+    model = QuotaGeminiModel(args.rpm, latency=args.latency)
+    limiter = rate_limit.InMemoryRateLimiter(
+        "gemini",
+        requests_per_minute=args.rpm if not args.no_limiter else 1e9,
+        tokens_per_minute=1e12,
+    )
+    if not args.no_limiter:
+        limiter._requests = 0.0  # Começa vazio, como a cota da API falsa
+    rate_limit.set_limiter(limiter)
+
+    latencies = {priority: [] for priority in rate_limit.PRIORITIES}
+    failures = {priority: 0 for priority in rate_limit.PRIORITIES}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def call(priority: str) -> None:
+        start = time.perf_counter()
+        try:
+            ai_generator._call_model(model, f"{priority} {start}", priority)
+        except QuotaExceeded:
+            with lock:
+                failures[priority] += 1
+            return
+        with lock:
+            latencies[priority].append(time.perf_counter() - start)
+
+    def bulk_worker() -> None:
+        while time.monotonic() < deadline:
+            call(rate_limit.PRIORITY_BULK)
+
+    threads = [threading.Thread(target=bulk_worker) for _ in range(args.bulk_workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    if args.interactive_rate > 0:
+        while time.monotonic() < deadline:
+            thread = threading.Thread(target=call, args=(rate_limit.PRIORITY_INTERACTIVE,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(1 / args.interactive_rate)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    served = sum(len(values) for values in latencies.values())
+    print(json.dumps({
+        "config": vars(args),
+        "elapsed_seconds": round(elapsed, 2),
+        "quota_rpm": args.rpm,
+        "served_rpm": round(served / elapsed * 60, 1),
+        "quota_utilization": round(served / elapsed * 60 / args.rpm, 3),
+        "api_429": model.rejected,
+        "failed_calls": failures,
+        "latency_ms": {priority: _percentiles(values) for priority, values in latencies.items()},
+        "calls": {priority: len(values) for priority, values in latencies.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
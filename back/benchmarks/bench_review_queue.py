@@ -0,0 +1,119 @@
+# benchmarks/bench_review_queue.py
+"""
+Semeia um usuário com um histórico sintético de revisões e mede a busca da fila
+de cartões vencidos e a aplicação de notas em lote.
+
+Uso (a partir de back/):
+    python -m benchmarks.bench_review_queue --cards 100000 --batch 500
+    python -m benchmarks.bench_review_queue --database-url postgresql://...
+"""
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import crud, models, schemas
+
+SEED_BATCH = 5000
+
+
+def seed(engine, cards: int, users: int) -> int:
+    """Cria `users` usuários com `cards` cartões cada; devolve o ID do primeiro."""
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        first_user_id = None
+        for u in range(users):
+            user = models.User(username=f"bench{u}-{time.time_ns()}", email=f"{u}-{time.time_ns()}@bench", hashed_password="")
+            session.add(user)
+            session.commit()
+            first_user_id = first_user_id or user.id
+            document = models.Document(user_id=user.id, file_path="bench.pdf")
+            session.add(document)
+            session.commit()
+
+            for start in range(0, cards, SEED_BATCH):
+                size = min(SEED_BATCH, cards - start)
+                ids = session.scalars(
+                    insert(models.Flashcard).returning(models.Flashcard.id),
+                    [{"front": f"Pergunta {start + i}?", "back": "Resposta", "document_id": document.id} for i in range(size)],
+                ).all()
+                # Histórico sintético: intervalos variados, vencimentos espalhados em ±60 dias
+                session.execute(insert(models.ReviewState), [
+                    {
+                        "flashcard_id": flashcard_id,
+                        "user_id": user.id,
+                        "ease_factor": round(rng.uniform(1.3, 3.0), 2),
+                        "interval_days": rng.randint(1, 120),
+                        "repetitions": rng.randint(0, 10),
+                        "lapses": rng.randint(0, 3),
+                        "due_at": now + timedelta(days=rng.uniform(-60, 60)),
+                    }
+                    for flashcard_id in ids
+                ])
+                session.commit()
+    return first_user_id
+
+
+def _percentiles(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[int(len(samples) * 0.95) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--cards", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.database_url or f"sqlite:///{tmp}/bench.db")
+        SQLModel.metadata.create_all(engine)
+
+        start = time.perf_counter()
+        user_id = seed(engine, args.cards, args.users)
+        seed_seconds = time.perf_counter() - start
+
+        queue_samples = []
+        with Session(engine) as session:
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                due = crud.get_due_flashcards(session, user_id, datetime.now(timezone.utc), args.queue_size)
+                queue_samples.append(time.perf_counter() - start)
+
+        batch_samples = []
+        rng = random.Random(1)
+        for _ in range(max(1, args.iterations // 20)):
+            with Session(engine) as session:
+                due = crud.get_due_flashcards(session, user_id, datetime.now(timezone.utc), args.batch)
+                reviews = [schemas.ReviewSubmit(flashcard_id=row["flashcard_id"], grade=rng.randint(0, 5)) for row in due]
+                start = time.perf_counter()
+                crud.apply_reviews(session, user_id, reviews, datetime.now(timezone.utc))
+                batch_samples.append(time.perf_counter() - start)
+
+        print(json.dumps({
+            "database": engine.dialect.name,
+            "cards_per_user": args.cards,
+            "users": args.users,
+            "seed_seconds": seed_seconds,
+            "due_queue": {"size": args.queue_size, **_percentiles(queue_samples)},
+            "review_batch": {"size": args.batch, **_percentiles(batch_samples)},
+        }))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/bench_startup.py
+"""
+Mede o custo de iniciar um processo da API: tempo de `import app.main`, memória
+residente (RSS) depois da importação e quantos módulos foram carregados. Cada
+rodada usa um interpretador novo, como um worker do uvicorn recém-criado.
+
+Também indica se os módulos pesados, que só os workers do Celery precisam
+(extração de texto, SDKs do Google, o próprio Celery), entraram no processo.
+
+Uso (a partir de back/):
+    python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACK_DIRECTORY = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = [
+    "celery",
+    "kombu",
+    "app.tasks",
+    "app.ai_generator",
+    "app.text_extractor",
+    "pdfplumber",
+    "pdfminer",
+    "pypdfium2",
+    "PIL",
+    "google.generativeai",
+    "google.cloud.vision",
+    "grpc",
+]
+
+# Roda no processo filho: importa a API e relata as medidas em JSON
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+rss_kb = 0
+try:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+except OSError:
+    pass
+print(json.dumps({
+    "import_seconds": elapsed,
+    "rss_kb": rss_kb,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(sys.modules),
+    "loaded": sorted(name for name in %r if name in sys.modules),
+}))
+""" % (HEAVY_MODULES,)
+
+
+def probe(env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACK_DIRECTORY,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACK_DIRECTORY, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(BACK_DIRECTORY),
+        "DATABASE_URL": os.getenv("DATABASE_URL", "sqlite://"),
+    }
+    probe(env)  # Aquece o cache de bytecode e do sistema de arquivos
+    samples = [probe(env) for _ in range(args.runs)]
+
+    print(json.dumps({
+        "commit": git_commit(),
+        "runs": args.runs,
+        "import_seconds_median": round(statistics.median(s["import_seconds"] for s in samples), 3),
+        "import_seconds_min": round(min(s["import_seconds"] for s in samples), 3),
+        "rss_mb_median": round(statistics.median(s["rss_kb"] for s in samples) / 1024, 1),
+        "max_rss_mb_median": round(statistics.median(s["max_rss_kb"] for s in samples) / 1024, 1),
+        "modules": samples[-1]["modules"],
+        "heavy_modules_loaded": samples[-1]["loaded"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
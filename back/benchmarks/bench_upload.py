@@ -0,0 +1,77 @@
+# benchmarks/bench_upload.py
+"""
+Benchmark de carga do upload: envia arquivos em paralelo para uma API em execução
+e mede a vazão (uploads/s e MB/s) e as latências.
+
+Uso (a partir de back/, com a API rodando):
+    python -m benchmarks.bench_upload --url http://localhost:8000 \\
+        --email user@example.com --password senha --concurrency 64 --requests 500 --size-kb 2048
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import httpx
+
+
+async def _login(client: httpx.AsyncClient, email: str, password: str) -> dict:
+    response = await client.post("/token", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+        headers = await _login(client, args.email, args.password)
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies: list[float] = []
+        statuses: dict[int, int] = {}
+
+        async def upload(index: int) -> None:
+            # Conteúdo distinto por requisição para não cair sempre no mesmo arquivo
+            payload = os.urandom(args.size_kb * 1024)
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/documents/upload",
+                    headers=headers,
+                    files={"file": (f"bench_{index}.pdf", payload, "application/pdf")},
+                )
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(upload(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "size_kb": args.size_kb,
+        "elapsed_seconds": elapsed,
+        "uploads_per_second": args.requests / elapsed,
+        "megabytes_per_second": args.requests * args.size_kb / 1024 / elapsed,
+        "latency_p50": statistics.median(latencies),
+        "latency_p95": latencies[int(len(latencies) * 0.95) - 1],
+        "status_codes": statuses,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--size-kb", type=int, default=1024)
+    print(json.dumps(asyncio.run(run(parser.parse_args()))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""processing cache and pipeline statuses
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 20:24:02.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OLD_STATUSES = ('PROCESSING', 'COMPLETED', 'FAILED')
+NEW_STATUSES = ('PROCESSING', 'EXTRACTING', 'GENERATING', 'COMPLETED', 'FAILED')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('processingcache',
+    sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('extracted_text', sa.Text(), nullable=True),
+    sa.Column('flashcards', sa.Text(), nullable=True),
+    sa.Column('generator_version', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+
+    with op.batch_alter_table('document', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_document_content_hash'), ['content_hash'], unique=False)
+        if op.get_bind().dialect.name != 'postgresql':
+            # No SQLite o Enum é um VARCHAR com CHECK: recria a coluna com os novos valores
+            batch_op.alter_column(
+                'status',
+                existing_type=sa.Enum(*OLD_STATUSES, name='documentstatus'),
+                type_=sa.Enum(*NEW_STATUSES, name='documentstatus'),
+                existing_nullable=False,
+            )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TYPE documentstatus ADD VALUE IF NOT EXISTS 'EXTRACTING' AFTER 'PROCESSING'")
+        op.execute("ALTER TYPE documentstatus ADD VALUE IF NOT EXISTS 'GENERATING' AFTER 'EXTRACTING'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # O Postgres não remove valores de um ENUM: os novos status ficam no tipo,
+    # mas documentos nesses estados voltam para PROCESSING.
+    op.execute(
+        "UPDATE document SET status = 'PROCESSING' WHERE status IN ('EXTRACTING', 'GENERATING')"
+    )
+    with op.batch_alter_table('document', schema=None) as batch_op:
+        if op.get_bind().dialect.name != 'postgresql':
+            batch_op.alter_column(
+                'status',
+                existing_type=sa.Enum(*NEW_STATUSES, name='documentstatus'),
+                type_=sa.Enum(*OLD_STATUSES, name='documentstatus'),
+                existing_nullable=False,
+            )
+        batch_op.drop_index(batch_op.f('ix_document_content_hash'))
+        batch_op.drop_column('content_hash')
+
+    op.drop_table('processingcache')
@@ -0,0 +1,37 @@
+"""foreign key indexes
+
+Índices nas chaves estrangeiras usadas como filtro por todas as listagens.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 20:31:47.560219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_folder_user_id'), 'folder', ['user_id'], unique=False)
+    op.create_index(op.f('ix_document_user_id'), 'document', ['user_id'], unique=False)
+    op.create_index(op.f('ix_document_folder_id'), 'document', ['folder_id'], unique=False)
+    op.create_index(op.f('ix_flashcard_document_id'), 'flashcard', ['document_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_flashcard_document_id'), table_name='flashcard')
+    op.drop_index(op.f('ix_document_folder_id'), table_name='document')
+    op.drop_index(op.f('ix_document_user_id'), table_name='document')
+    op.drop_index(op.f('ix_folder_user_id'), table_name='folder')
@@ -0,0 +1,54 @@
+"""review state
+
+Estado de revisão espaçada por flashcard, com índice (user_id, due_at) para a
+fila de revisão. Os flashcards existentes entram na fila como vencidos.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 21:02:13.447120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('reviewstate',
+    sa.Column('flashcard_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('ease_factor', sa.Float(), nullable=False),
+    sa.Column('interval_days', sa.Integer(), nullable=False),
+    sa.Column('repetitions', sa.Integer(), nullable=False),
+    sa.Column('lapses', sa.Integer(), nullable=False),
+    sa.Column('due_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_reviewed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['flashcard_id'], ['flashcard.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('flashcard_id')
+    )
+    op.create_index('ix_reviewstate_user_id_due_at', 'reviewstate', ['user_id', 'due_at'], unique=False)
+
+    op.execute(
+        """
+        INSERT INTO reviewstate (flashcard_id, user_id, ease_factor, interval_days, repetitions, lapses, due_at)
+        SELECT flashcard.id, document.user_id, 2.5, 0, 0, 0, CURRENT_TIMESTAMP
+        FROM flashcard JOIN document ON flashcard.document_id = document.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviewstate_user_id_due_at', table_name='reviewstate')
+    op.drop_table('reviewstate')
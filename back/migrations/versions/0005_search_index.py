@@ -0,0 +1,69 @@
+"""search index
+
+Índice de busca textual sobre documentos e flashcards: colunas tsvector com
+índices GIN no PostgreSQL e tabelas FTS5 no SQLite. As linhas existentes são
+indexadas na própria migração.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 21:48:02.915310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Mesma configuração padrão de app.search.TEXT_SEARCH_CONFIG
+TEXT_SEARCH_CONFIG = 'portuguese'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('ALTER TABLE document ADD COLUMN search_vector tsvector')
+        op.execute('ALTER TABLE flashcard ADD COLUMN search_vector tsvector')
+        op.execute(
+            f"UPDATE document SET search_vector = to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(extracted_text, ''))"
+        )
+        op.execute(
+            f"UPDATE flashcard SET search_vector = to_tsvector('{TEXT_SEARCH_CONFIG}', front || ' ' || back)"
+        )
+        op.execute('CREATE INDEX ix_document_search_vector ON document USING gin (search_vector)')
+        op.execute('CREATE INDEX ix_flashcard_search_vector ON flashcard USING gin (search_vector)')
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE document_fts USING fts5("
+            "extracted_text, tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE VIRTUAL TABLE flashcard_fts USING fts5("
+            "front, back, tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            'INSERT INTO document_fts (rowid, extracted_text) '
+            'SELECT id, extracted_text FROM document WHERE extracted_text IS NOT NULL'
+        )
+        op.execute('INSERT INTO flashcard_fts (rowid, front, back) SELECT id, front, back FROM flashcard')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX ix_flashcard_search_vector')
+        op.execute('DROP INDEX ix_document_search_vector')
+        op.execute('ALTER TABLE flashcard DROP COLUMN search_vector')
+        op.execute('ALTER TABLE document DROP COLUMN search_vector')
+    elif dialect == 'sqlite':
+        op.execute('DROP TABLE flashcard_fts')
+        op.execute('DROP TABLE document_fts')
@@ -0,0 +1,65 @@
+"""flashcard duplicates
+
+Assinaturas MinHash e baldes LSH para a detecção de flashcards quase idênticos,
+e a coluna `duplicate_of` que agrupa as duplicatas. Os flashcards existentes
+são indexados depois com `python -m app.duplicates`.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 22:36:00.778795
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('flashcardband',
+    sa.Column('flashcard_id', sa.Integer(), nullable=False),
+    sa.Column('band', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['flashcard_id'], ['flashcard.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('flashcard_id', 'band')
+    )
+    op.create_index('ix_flashcardband_user_id_bucket', 'flashcardband', ['user_id', 'bucket'], unique=False)
+
+    op.create_table('flashcardsignature',
+    sa.Column('flashcard_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('minhash', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['flashcard_id'], ['flashcard.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('flashcard_id')
+    )
+    op.create_index(op.f('ix_flashcardsignature_user_id'), 'flashcardsignature', ['user_id'], unique=False)
+
+    with op.batch_alter_table('flashcard', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duplicate_of', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_flashcard_duplicate_of'), ['duplicate_of'], unique=False)
+        batch_op.create_foreign_key('fk_flashcard_duplicate_of_flashcard', 'flashcard', ['duplicate_of'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('flashcard', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_flashcard_duplicate_of_flashcard', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_flashcard_duplicate_of'))
+        batch_op.drop_column('duplicate_of')
+
+    op.drop_index(op.f('ix_flashcardsignature_user_id'), table_name='flashcardsignature')
+    op.drop_table('flashcardsignature')
+    op.drop_index('ix_flashcardband_user_id_bucket', table_name='flashcardband')
+    op.drop_table('flashcardband')
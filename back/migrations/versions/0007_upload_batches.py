@@ -0,0 +1,54 @@
+"""upload batches
+
+Tabela `uploadbatch` e a coluna `document.batch_id`, que agrupa os documentos
+enviados juntos em `POST /documents/upload/batch` para acompanhar o progresso
+do lote.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 23:48:12.301744
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('uploadbatch',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('folder_id', sa.Integer(), nullable=True),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['folder_id'], ['folder.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_uploadbatch_user_id'), 'uploadbatch', ['user_id'], unique=False)
+
+    with op.batch_alter_table('document', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('batch_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_document_batch_id'), ['batch_id'], unique=False)
+        batch_op.create_foreign_key('fk_document_batch_id_uploadbatch', 'uploadbatch', ['batch_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('document', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_document_batch_id_uploadbatch', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_document_batch_id'))
+        batch_op.drop_column('batch_id')
+
+    op.drop_index(op.f('ix_uploadbatch_user_id'), table_name='uploadbatch')
+    op.drop_table('uploadbatch')
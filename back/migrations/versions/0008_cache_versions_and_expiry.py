@@ -0,0 +1,38 @@
+"""cache versions and expiry
+
+Coluna `processingcache.extractor_version`, para que o texto extraído por uma
+versão anterior da extração não seja reaproveitado, e índice em
+`processingcache.updated_at` para a remoção das entradas expiradas.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 23:58:03.412906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Os textos já em cache ficam sem versão e são extraídos de novo no próximo uso
+    with op.batch_alter_table('processingcache', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('extractor_version', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_processingcache_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('processingcache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_processingcache_updated_at'))
+        batch_op.drop_column('extractor_version')
@@ -0,0 +1,103 @@
+# tests/conftest.py
+"""
+Configuração dos testes: SQLite temporário, Celery em modo eager e caches e
+eventos no processo, sem Redis nem rede. As variáveis precisam ser definidas
+antes de importar o `app`, que lê a configuração ao ser importado.
+"""
+import itertools
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+TEST_DIRECTORY = Path(tempfile.mkdtemp(prefix="flashify-tests-"))
+(TEST_DIRECTORY / "uploads").mkdir()
+
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DIRECTORY}/test.db"
+os.environ["UPLOAD_DIRECTORY"] = str(TEST_DIRECTORY / "uploads")
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
+os.environ["EVENTS_BACKEND"] = "memory"
+os.environ["RATE_LIMIT_BACKEND"] = "memory"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["LOG_SPANS"] = "false"
+os.environ["SECRET_KEY"] = "test"
+os.environ["ALGORITHM"] = "HS256"
+# Os testes não esperam pela cota do Gemini
+os.environ["GEMINI_REQUESTS_PER_MINUTE"] = "1000000"
+os.environ["GEMINI_TOKENS_PER_MINUTE"] = "1000000000"
+for name in ("CACHE_REDIS_URL", "AUTH_CACHE_REDIS_URL"):
+    os.environ.pop(name, None)
+
+_user_ids = itertools.count(1)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_DIRECTORY, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from sqlmodel import SQLModel
+    import app.main  # noqa: F401 (registra as tabelas e o índice de busca no metadata)
+    from app.database import engine
+
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def session(engine):
+    from sqlmodel import Session
+
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Cria um usuário novo e devolve o cabeçalho com o token dele."""
+    number = next(_user_ids)
+    email = f"user{number}@test.local"
+    client.post("/users", json={"username": f"user{number}", "email": email, "password": "senha"})
+    response = client.post("/token", data={"username": email, "password": "senha"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def upload_directory() -> Path:
+    return TEST_DIRECTORY / "uploads"
+
+
+@pytest.fixture
+def fake_gemini():
+    """Troca o Gemini pelo modelo local de `app/testing/fakes.py` durante o teste."""
+    from app import ai_generator, clients
+    from app.testing.fakes import FakeGeminiModel
+
+    model = FakeGeminiModel(cards_per_chunk=3)
+    clients.set_gemini_model(ai_generator.MODEL_NAME, model)
+    yield model
+    clients.reset_clients()
+
+
+@pytest.fixture
+def fake_vision():
+    """Troca o Vision pelo cliente local de `app/testing/fakes.py` durante o teste."""
+    from app import clients
+    from app.testing.fakes import FakeVisionClient
+
+    client = FakeVisionClient(words=24)
+    clients.set_vision_client(client)
+    yield client
+    clients.reset_clients()
@@ -0,0 +1,93 @@
+# tests/test_ai_generator.py
+import random
+import threading
+from types import SimpleNamespace
+
+from app import ai_generator
+from app.text_extractor import PAGE_BREAK
+from app.testing.fakes import FakeGeminiModel
+from app.testing.synthetic import random_paragraph
+
+
+def _long_text(pages: int, paragraphs: int = 8) -> str:
+    rng = random.Random(0)
+    return PAGE_BREAK.join(
+        "\n\n".join(random_paragraph(rng, 60) for _ in range(paragraphs)) for _ in range(pages)
+    )
+
+
+def test_chunks_cover_the_whole_text_within_the_size_limit():
+    text = _long_text(pages=20)
+
+    chunks = ai_generator.split_text_into_chunks(text, max_chars=2000)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 2000 for chunk in chunks)
+    # Nada é descartado: só as quebras de página e de parágrafo mudam
+    assert "".join("".join(chunks).split()) == "".join(text.replace(PAGE_BREAK, "").split())
+
+
+def test_chunks_split_oversized_paragraphs():
+    chunks = ai_generator.split_text_into_chunks("palavra " * 1000, max_chars=500)
+
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert sum(chunk.count("palavra") for chunk in chunks) == 1000
+
+
+def test_every_chunk_is_sent_to_the_model():
+    text = _long_text(pages=30)
+    model = FakeGeminiModel(cards_per_chunk=4)
+
+    flashcards = ai_generator.generate_flashcards_from_text(text, model=model, max_workers=4)
+
+    chunks = ai_generator.split_text_into_chunks(text)
+    assert len(chunks) > 1
+    assert model.calls == len(chunks)
+    assert len(flashcards) == 4 * len(chunks)
+
+
+def test_calls_in_flight_are_bounded():
+    class CountingModel(FakeGeminiModel):
+        def __init__(self):
+            super().__init__(latency=0.05)
+            self.lock = threading.Lock()
+            self.in_flight = self.peak = 0
+
+        def generate_content(self, prompt, stream=False, **kwargs):
+            return self._track(super().generate_content(prompt, stream=True, **kwargs))
+
+        def _track(self, response):
+            # A chamada só termina quando a resposta em streaming é lida até o fim
+            with self.lock:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+            try:
+                yield from response
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+
+    model = CountingModel()
+    ai_generator.generate_flashcards_from_text(_long_text(pages=60), model=model, max_workers=2)
+
+    assert model.calls > 2
+    assert model.peak == 2
+
+
+def test_repeated_questions_are_merged():
+    class RepeatingModel:
+        calls = 0
+
+        def generate_content(self, prompt, stream=False, **kwargs):
+            # A mesma pergunta para todos os pedaços, variando só a pontuação e a caixa
+            self.calls += 1
+            front = "O que é fotossíntese?" if self.calls % 2 else "o que é FOTOSSÍNTESE"
+            part = SimpleNamespace(text='{"flashcards": [{"front": "%s", "back": "Produção de energia."}]}' % front)
+            return [part] if stream else part
+
+    model = RepeatingModel()
+    flashcards = ai_generator.generate_flashcards_from_text(_long_text(pages=30), model=model)
+
+    assert model.calls > 1
+    assert len(flashcards) == 1
+    assert flashcards[0]["back"] == "Produção de energia."
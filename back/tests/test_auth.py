@@ -0,0 +1,86 @@
+# tests/test_auth.py
+import pytest
+from cachetools import TTLCache
+
+from app import crud, security
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def token(auth_headers) -> str:
+    return auth_headers["Authorization"].removeprefix("Bearer ")
+
+
+@pytest.fixture
+def user_lookups(monkeypatch) -> list[str]:
+    """Conta as buscas do usuário no banco feitas pela autenticação."""
+    lookups = []
+    get_user_by_email = crud.get_user_by_email
+
+    def counting(session, email):
+        lookups.append(email)
+        return get_user_by_email(session=session, email=email)
+
+    monkeypatch.setattr(security.crud, "get_user_by_email", counting)
+    return lookups
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(
+        security, "_token_cache", TTLCache(maxsize=100, ttl=security.AUTH_CACHE_TTL_SECONDS, timer=clock)
+    )
+    return clock
+
+
+def test_verified_token_is_served_from_the_cache(session, token, clock, user_lookups):
+    first = security.authenticate_token(session, token)
+    second = security.authenticate_token(session, token)
+
+    assert first.email == second.email
+    assert len(user_lookups) == 1
+
+
+def test_cached_token_expires_after_the_ttl(session, token, clock, user_lookups):
+    security.authenticate_token(session, token)
+    clock.now += security.AUTH_CACHE_TTL_SECONDS - 1
+    security.authenticate_token(session, token)
+    assert len(user_lookups) == 1
+
+    clock.now += 2
+    security.authenticate_token(session, token)
+    assert len(user_lookups) == 2
+
+
+def test_deactivated_user_is_rejected_immediately(client, auth_headers, clock):
+    assert client.get("/folders/", headers=auth_headers).status_code == 200
+
+    assert client.delete("/users/me", headers=auth_headers).status_code == 204
+
+    # O token estava no cache, mas a desativação o removeu
+    response = client.get("/folders/", headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Usuário inativo"
+
+
+def test_invalidation_only_drops_the_users_tokens(session, client, token, clock, user_lookups):
+    other = client.post("/users", json={"username": "vizinho", "email": "vizinho@test.local", "password": "senha"})
+    assert other.status_code == 201
+    other_token = client.post("/token", data={"username": "vizinho@test.local", "password": "senha"}).json()["access_token"]
+    user = security.authenticate_token(session, token)
+    security.authenticate_token(session, other_token)
+    user_lookups.clear()
+
+    security.invalidate_user_cache(user.email)
+    security.authenticate_token(session, token)
+    security.authenticate_token(session, other_token)
+
+    assert user_lookups == [user.email]
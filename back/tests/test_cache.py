@@ -0,0 +1,98 @@
+# tests/test_cache.py
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import cache, crud
+
+
+class DictRedis:
+    """Redis em memória com o subconjunto usado pelo cache."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+@pytest.fixture
+def content_hash() -> str:
+    return uuid.uuid4().hex
+
+
+def test_miss_then_hit_in_the_database(session, content_hash):
+    assert cache.get_extracted_text(session, content_hash, "v1") is None
+
+    cache.store_extracted_text(session, content_hash, "v1", "texto extraído")
+
+    assert cache.get_extracted_text(session, content_hash, "v1") == "texto extraído"
+
+
+def test_text_from_another_extractor_version_is_a_miss(session, content_hash):
+    cache.store_extracted_text(session, content_hash, "v1", "texto antigo")
+
+    assert cache.get_extracted_text(session, content_hash, "v2") is None
+
+
+def test_empty_text_is_a_hit(session, content_hash):
+    cache.store_extracted_text(session, content_hash, "v1", "")
+
+    assert cache.get_extracted_text(session, content_hash, "v1") == ""
+
+
+def test_flashcards_depend_on_the_generator_version(session, content_hash):
+    cards = [{"front": "Q?", "back": "R"}]
+    cache.store_flashcards(session, content_hash, "g1", cards)
+
+    assert cache.get_flashcards(session, content_hash, "g1") == cards
+    assert cache.get_flashcards(session, content_hash, "g2") is None
+
+
+def test_expired_entries_are_misses_and_get_evicted(session, content_hash):
+    cache.store_extracted_text(session, content_hash, "v1", "texto")
+    db_cache = crud.get_processing_cache(session, content_hash)
+    db_cache.updated_at = datetime.now(timezone.utc) - timedelta(days=cache.CACHE_DB_TTL_DAYS + 1)
+    session.add(db_cache)
+    session.commit()
+
+    assert cache.get_extracted_text(session, content_hash, "v1") is None
+    assert cache.evict_expired(session) >= 1
+    session.expire_all()
+    assert crud.get_processing_cache(session, content_hash) is None
+
+
+def test_redis_hit_skips_the_database(session, content_hash, monkeypatch):
+    redis_client = DictRedis()
+    monkeypatch.setattr(cache, "_get_redis", lambda: redis_client)
+    cache.store_extracted_text(session, content_hash, "v1", "texto")
+    # Só o Redis tem o texto: a leitura não pode depender do banco
+    monkeypatch.setattr(crud, "get_processing_cache", lambda *args, **kwargs: pytest.fail("consultou o banco"))
+
+    assert cache.get_extracted_text(session, content_hash, "v1") == "texto"
+    assert f"flashify:cache:text:v1:{content_hash}" in redis_client.data
+
+
+def test_database_hit_fills_redis(session, content_hash, monkeypatch):
+    cache.store_extracted_text(session, content_hash, "v1", "texto")
+    redis_client = DictRedis()
+    monkeypatch.setattr(cache, "_get_redis", lambda: redis_client)
+
+    assert cache.get_extracted_text(session, content_hash, "v1") == "texto"
+    assert redis_client.data == {f"flashify:cache:text:v1:{content_hash}": "texto"}
+
+
+def test_unavailable_redis_falls_back_to_the_database(session, content_hash, monkeypatch, capsys):
+    import redis
+
+    # Nada escuta nesta porta: cada comando falha com ConnectionError
+    monkeypatch.setattr(cache, "_get_redis", lambda: redis.Redis(port=1, socket_connect_timeout=0.1))
+
+    cache.store_extracted_text(session, content_hash, "v1", "texto")
+
+    assert cache.get_extracted_text(session, content_hash, "v1") == "texto"
+    assert "Cache Redis indisponível" in capsys.readouterr().out
@@ -0,0 +1,83 @@
+# tests/test_clients.py
+from app import cache, clients, events, rate_limit, security, text_extractor
+from app.worker import celery_app
+from app.testing.fakes import FakeGeminiModel
+from app.testing.synthetic import make_mixed_pdf, make_png
+
+
+def test_clients_are_reused_until_reset(fake_vision):
+    model = FakeGeminiModel()
+    clients.set_gemini_model("gemini-teste", model)
+
+    assert clients.get_vision_client() is fake_vision
+    assert clients.get_vision_client() is fake_vision
+    assert clients.get_gemini_model("gemini-teste") is model
+
+    # Depois do fork do worker, os clientes herdados são descartados
+    clients.reset_clients()
+    assert clients._vision_client is None
+    assert "gemini-teste" not in clients._gemini_models
+
+
+
+def test_redis_client_is_shared_per_url(monkeypatch):
+    # Criar o cliente não abre conexão: nada precisa estar escutando
+    monkeypatch.setattr(cache, "CACHE_REDIS_URL", "redis://127.0.0.1:1/0")
+    monkeypatch.setattr(security, "AUTH_CACHE_REDIS_URL", "redis://127.0.0.1:1/0")
+
+    assert cache._get_redis() is security._get_redis() is clients.get_redis("redis://127.0.0.1:1/0")
+    assert clients.get_redis("redis://127.0.0.1:1/1") is not cache._get_redis()
+    assert clients.get_redis(None) is None
+
+    clients.reset_clients()
+    assert not clients._redis_clients
+
+
+def test_backends_follow_the_eager_mode_at_call_time(monkeypatch):
+    monkeypatch.setattr(events, "EVENTS_BACKEND", None)
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_BACKEND", None)
+    monkeypatch.setattr(events, "_bus", None)
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+
+    # Modo eager ligado depois do import: tudo fica no processo
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    assert type(events.get_bus()) is events.InMemoryEventBus
+    assert type(rate_limit.get_limiter("teste")) is rate_limit.InMemoryRateLimiter
+
+    monkeypatch.setattr(events, "_bus", None)
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", False)
+    assert type(events.get_bus()) is events.RedisEventBus
+    assert type(rate_limit.get_limiter("teste")) is rate_limit.RedisRateLimiter
+
+
+def test_images_are_sent_in_batches(fake_vision, monkeypatch):
+    monkeypatch.setattr(text_extractor, "VISION_BATCH_SIZE", 4)
+    contents = [f"imagem {index}".encode() for index in range(10)]
+
+    texts = text_extractor.extract_text_from_image_contents(contents)
+
+    assert fake_vision.calls == 3
+    assert fake_vision.bytes_received == sum(len(content) for content in contents)
+    assert len(texts) == 10 and all(texts)
+    # Cada texto continua na posição da sua imagem
+    assert texts == [text_extractor.extract_text_from_image_contents([content])[0] for content in contents]
+
+
+def test_image_files_share_one_request(fake_vision, tmp_path):
+    paths = [make_png(str(tmp_path / f"pagina_{seed}.png"), 64, 64, seed=seed) for seed in range(3)]
+
+    texts = text_extractor.extract_text_from_images(paths)
+
+    assert len(texts) == 3
+    assert fake_vision.calls == 1
+
+
+def test_only_scanned_pdf_pages_go_to_ocr(fake_vision, tmp_path):
+    path = make_mixed_pdf(str(tmp_path / "misto.pdf"), pages=6, scanned_every=3)
+
+    extracted = text_extractor.extract_pdf(path)
+
+    # As páginas digitalizadas vão juntas em uma chamada; as demais usam a camada de texto
+    assert fake_vision.calls == 1
+    assert len(extracted.page_offsets) == 6
@@ -0,0 +1,46 @@
+# tests/test_decks.py
+import os
+
+from app import decks
+
+
+def _import(client, headers, content: bytes, format: str = "csv"):
+    return client.post(
+        f"/decks/import?format={format}",
+        headers=headers,
+        files={"file": (f"baralho.{format}", content, "application/octet-stream")},
+    )
+
+
+def test_csv_import_is_written_in_batches(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(decks, "IMPORT_BATCH_SIZE", 10)
+    rows = "".join(f"pergunta {i},resposta {i}\n" for i in range(25))
+
+    response = _import(client, auth_headers, f"front,back\n{rows},sem frente\n".encode())
+
+    assert response.status_code == 201
+    assert response.json()["imported"] == 25
+    assert response.json()["skipped"] == 1
+
+
+def test_oversized_csv_field_rolls_back_the_import(client, auth_headers, upload_directory, monkeypatch):
+    monkeypatch.setattr(decks, "IMPORT_BATCH_SIZE", 10)
+    # O campo acima do limite do leitor de CSV só aparece depois de alguns lotes gravados
+    rows = "".join(f"pergunta {i},resposta {i}\n" for i in range(25))
+    content = f'front,back\n{rows}x,"{"y" * 200_000}"\n'.encode()
+    before = set(os.listdir(upload_directory))
+
+    response = _import(client, auth_headers, content)
+
+    assert response.status_code == 400
+    assert client.get("/documents/", headers=auth_headers).json()["items"] == []
+    assert set(os.listdir(upload_directory)) == before
+
+
+def test_corrupt_apkg_is_rejected(client, auth_headers, upload_directory):
+    before = set(os.listdir(upload_directory))
+
+    response = _import(client, auth_headers, b"PK\x03\x04corrompido", format="apkg")
+
+    assert response.status_code == 400
+    assert set(os.listdir(upload_directory)) == before
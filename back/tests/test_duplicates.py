@@ -0,0 +1,117 @@
+# tests/test_duplicates.py
+import csv
+import io
+import runpy
+import time
+
+from sqlmodel import select
+
+from app import crud, duplicates, models
+
+CARDS = [
+    ("Qual organela da célula é responsável pela produção de energia na forma de ATP?",
+     "A mitocôndria, por meio da respiração celular."),
+    ("Quem escreveu o romance Dom Casmurro, publicado em 1899?",
+     "Machado de Assis, um dos fundadores da Academia Brasileira de Letras."),
+]
+OTHER_CARD = ("Qual é a fórmula química da água e quantos átomos a compõem?", "H2O: dois de hidrogênio e um de oxigênio.")
+
+
+def _import(client, headers, cards) -> int:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["front", "back"])
+    writer.writerows(cards)
+    response = client.post(
+        "/decks/import?format=csv",
+        headers=headers,
+        files={"file": ("baralho.csv", buffer.getvalue().encode(), "text/csv")},
+    )
+    assert response.status_code == 201
+    return response.json()["document_id"]
+
+
+def _reworded(cards):
+    # Mesmas perguntas, com pequenas diferenças de redação
+    return [(front.replace("?", " ?").lower(), back.rstrip(".") + "!") for front, back in cards]
+
+
+def test_near_duplicates_across_documents_are_grouped(client, auth_headers):
+    first = _import(client, auth_headers, CARDS)
+    second = _import(client, auth_headers, _reworded(CARDS) + [OTHER_CARD])
+
+    clusters = client.get("/duplicates/", headers=auth_headers).json()["items"]
+
+    assert len(clusters) == len(CARDS)
+    for cluster in clusters:
+        # O grupo é identificado pelo cartão mais antigo, do primeiro documento
+        assert [card["document_id"] for card in cluster["flashcards"]] == [first, second]
+        assert cluster["id"] == cluster["flashcards"][0]["id"]
+    grouped_fronts = {card["front"] for cluster in clusters for card in cluster["flashcards"]}
+    assert OTHER_CARD[0] not in grouped_fronts
+
+
+def test_merge_keeps_the_chosen_card_and_the_best_progress(client, auth_headers, session):
+    _import(client, auth_headers, CARDS[:1])
+    _import(client, auth_headers, _reworded(CARDS[:1]))
+    [cluster] = client.get("/duplicates/", headers=auth_headers).json()["items"]
+    original, copy = (card["id"] for card in cluster["flashcards"])
+    # Só a cópia foi estudada
+    for grade in (5, 5):
+        client.post("/reviews/", headers=auth_headers, json={"reviews": [{"flashcard_id": copy, "grade": grade}]})
+    session.expire_all()
+    studied = session.get(models.ReviewState, copy)
+    progress = (studied.repetitions, studied.interval_days, studied.due_at)
+    assert studied.repetitions == 2
+
+    response = client.post(f"/duplicates/{cluster['id']}/merge", headers=auth_headers, json={"keep_id": original})
+
+    assert response.status_code == 200
+    assert response.json() == {"kept": original, "removed": [copy]}
+    session.expire_all()
+    kept = session.get(models.ReviewState, original)
+    assert (kept.repetitions, kept.interval_days, kept.due_at) == progress
+    assert session.get(models.Flashcard, copy) is None
+    assert client.get("/duplicates/", headers=auth_headers).json()["items"] == []
+
+
+def test_merge_rejects_other_users_and_foreign_cards(client, auth_headers):
+    _import(client, auth_headers, CARDS[:1])
+    _import(client, auth_headers, _reworded(CARDS[:1]))
+    [cluster] = client.get("/duplicates/", headers=auth_headers).json()["items"]
+
+    client.post("/users", json={"username": "alheio", "email": "alheio@test.local", "password": "senha"})
+    token = client.post("/token", data={"username": "alheio@test.local", "password": "senha"}).json()["access_token"]
+    other = {"Authorization": f"Bearer {token}"}
+
+    assert client.post(f"/duplicates/{cluster['id']}/merge", headers=other).status_code == 404
+    response = client.post(f"/duplicates/{cluster['id']}/merge", headers=auth_headers, json={"keep_id": 999999})
+    assert response.status_code == 404
+
+
+def test_index_missing_indexes_cards_created_before_the_index(session, capsys):
+    user = models.User(username=f"legado{time.time_ns()}", email=f"{time.time_ns()}@test.local", hashed_password="")
+    session.add(user)
+    session.commit()
+    document_ids = []
+    for cards in (CARDS, _reworded(CARDS)):
+        document = crud.create_document_for_user(session, user_id=user.id, file_path="legado.pdf")
+        # Sem `duplicates.index_document`: como os cartões anteriores à migração 0006
+        crud.create_flashcards_for_document(
+            session, [{"front": front, "back": back} for front, back in cards], document.id, user_id=user.id
+        )
+        document_ids.append(document.id)
+
+    # Pela linha de comando, como na implantação da migração
+    runpy.run_module("app.duplicates", run_name="__main__")
+
+    indexed = int(capsys.readouterr().out.split()[0])
+    assert indexed >= 2 * len(CARDS)
+    session.expire_all()
+    copies = session.exec(select(models.Flashcard).where(models.Flashcard.document_id == document_ids[1])).all()
+    originals = {card.id for card in session.exec(
+        select(models.Flashcard).where(models.Flashcard.document_id == document_ids[0])
+    )}
+    assert {card.duplicate_of for card in copies} == originals
+    # Uma segunda passada não encontra mais nada para indexar
+    assert duplicates.index_missing(session) == 0
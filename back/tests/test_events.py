@@ -0,0 +1,123 @@
+# tests/test_events.py
+import asyncio
+import json
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app import crud, events, models, security
+from app.routers import documents
+
+
+def _token(headers) -> str:
+    return headers["Authorization"].removeprefix("Bearer ")
+
+
+@pytest.fixture
+def document_id(session, auth_headers) -> int:
+    """Documento do usuário de `auth_headers`, ainda em processamento."""
+    user = security.authenticate_token(session, _token(auth_headers))
+    return crud.create_document_for_user(session, user_id=user.id, file_path="eventos.pdf").id
+
+
+def _publish_after_status(monkeypatch, *published: tuple[str, dict]):
+    """
+    Publica os eventos logo depois que a rota lê o status atual, quando a
+    assinatura já está aberta (como o pipeline publicaria em outro processo).
+    """
+    status_event = documents._status_event
+
+    def status_then_publish(document_id: int, user_id: int):
+        event = status_event(document_id, user_id)
+        for name, data in published:
+            events.publish(document_id, name, **data)
+        return event
+
+    monkeypatch.setattr(documents, "_status_event", status_then_publish)
+
+
+def _read_sse(response) -> list[dict]:
+    return [json.loads(line.removeprefix("data: ")) for line in response.iter_lines() if line.startswith("data: ")]
+
+
+def test_sse_sends_the_current_status_then_the_pipeline_events(client, auth_headers, document_id, monkeypatch):
+    _publish_after_status(
+        monkeypatch,
+        ("status", {"status": "EXTRACTING"}),
+        ("progress", {"stage": "EXTRACTING", "done": 1, "total": 2}),
+        ("status", {"status": "COMPLETED"}),
+    )
+
+    with client.stream("GET", f"/documents/{document_id}/events", headers=auth_headers) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        received = _read_sse(response)
+
+    assert [(event["event"], event.get("status", event.get("done"))) for event in received] == [
+        ("status", "PROCESSING"),
+        ("status", "EXTRACTING"),
+        ("progress", 1),
+        ("status", "COMPLETED"),
+    ]
+
+
+def test_sse_of_a_finished_document_closes_right_away(client, auth_headers, document_id, session):
+    document = crud.get_document(session, document_id)
+    crud.update_document_status(session, document, models.DocumentStatus.FAILED)
+
+    response = client.get(f"/documents/{document_id}/events", headers=auth_headers)
+
+    assert _read_sse(response) == [{"event": "status", "document_id": document_id, "status": "FAILED"}]
+
+
+def test_sse_of_another_users_document_is_not_found(client, auth_headers, document_id):
+    client.post("/users", json={"username": "espiao", "email": "espiao@test.local", "password": "senha"})
+    token = client.post("/token", data={"username": "espiao@test.local", "password": "senha"}).json()["access_token"]
+
+    response = client.get(f"/documents/{document_id}/events", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 404
+    assert client.get("/documents/999999/events", headers=auth_headers).status_code == 404
+
+
+def test_websocket_streams_events_with_keep_alive(client, auth_headers, document_id, monkeypatch):
+    monkeypatch.setattr(documents, "EVENTS_KEEPALIVE_SECONDS", 0.05)
+
+    with client.websocket_connect(f"/documents/{document_id}/ws?token={_token(auth_headers)}") as websocket:
+        assert websocket.receive_json()["status"] == "PROCESSING"
+        # Sem eventos no intervalo, o servidor manda um keep-alive
+        assert websocket.receive_json() == {"event": "keep-alive"}
+        events.publish_status(document_id, "COMPLETED")
+        received = websocket.receive_json()
+        while received["event"] == "keep-alive":
+            received = websocket.receive_json()
+        assert received["status"] == "COMPLETED"
+        # Status final: o servidor fecha a conexão
+        with pytest.raises(WebSocketDisconnect):
+            websocket.receive_json()
+
+
+def test_websocket_rejects_bad_tokens_and_unknown_documents(client, auth_headers, document_id):
+    # Token inválido: a conexão é recusada antes de ser aceita
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect(f"/documents/{document_id}/ws?token=invalido"):
+            pass
+    assert closed.value.code == 1008
+
+    with client.websocket_connect(f"/documents/999999/ws?token={_token(auth_headers)}") as websocket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1008
+    assert closed.value.reason == "Documento não encontrado"
+
+
+def test_subscribers_only_get_their_documents_events():
+    async def scenario():
+        bus = events.InMemoryEventBus()
+        async with bus.subscribe(1) as first, bus.subscribe(2) as second:
+            bus.publish(1, {"event": "status", "status": "COMPLETED"})
+            assert await first.get(timeout=1) == {"event": "status", "status": "COMPLETED"}
+            assert await second.get(timeout=0.01) is None
+        assert not bus._subscriptions
+
+    asyncio.run(scenario())
@@ -0,0 +1,69 @@
+# tests/test_flashcards.py
+import time
+
+from sqlalchemy import event
+from sqlmodel import select
+
+from app import crud, duplicates, models
+
+
+def _document(session) -> models.Document:
+    user = models.User(username=f"cards{time.time_ns()}", email=f"{time.time_ns()}@test.local", hashed_password="")
+    session.add(user)
+    session.commit()
+    return crud.create_document_for_user(session, user_id=user.id, file_path="cards.pdf")
+
+
+def test_created_flashcards_carry_ids_without_refresh(session, engine):
+    document = _document(session)
+    data = [{"front": f"Pergunta {i}?", "back": f"Resposta {i}"} for i in range(5)]
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        created = crud.create_flashcards_for_document(session, data, document.id, user_id=document.user_id)
+        inserted = len(statements)
+        # Ler os atributos depois do commit não pode disparar um SELECT por cartão
+        ids = [fc.id for fc in created]
+        fronts = [fc.front for fc in created]
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == inserted
+    assert all(fc_id is not None for fc_id in ids)
+    assert sorted(fronts) == sorted(fc["front"] for fc in data)
+    states = session.exec(
+        select(models.ReviewState).where(models.ReviewState.flashcard_id.in_(ids))
+    ).all()
+    assert {state.user_id for state in states} == {document.user_id}
+    assert len(states) == len(ids)
+
+
+def test_user_id_is_looked_up_only_when_omitted(session):
+    document = _document(session)
+
+    created = crud.create_flashcards_for_document(session, [{"front": "Q?", "back": "R"}], document.id)
+
+    state = session.exec(
+        select(models.ReviewState).where(models.ReviewState.flashcard_id == created[0].id)
+    ).one()
+    assert state.user_id == document.user_id
+
+
+def test_duplicates_are_flagged_once_per_document(session):
+    first = _document(session)
+    card = {"front": "Qual é a capital da França e por que ela é importante?", "back": "Paris, centro político e cultural."}
+    original = crud.create_flashcards_for_document(session, [card], first.id, user_id=first.user_id)
+    duplicates.index_document(session, first.id, first.user_id)
+
+    second = crud.create_document_for_user(session, user_id=first.user_id, file_path="copia.pdf")
+    copy = crud.create_flashcards_for_document(session, [card], second.id, user_id=first.user_id)
+    # A inserção não faz a detecção; ela roda uma vez, no fim do documento
+    assert session.get(models.Flashcard, copy[0].id).duplicate_of is None
+
+    assert duplicates.index_document(session, second.id, first.user_id) == 1
+    session.expire_all()
+    assert session.get(models.Flashcard, copy[0].id).duplicate_of == original[0].id
+    # Cartões já indexados não são indexados de novo
+    assert duplicates.index_document(session, second.id, first.user_id) == 0
@@ -0,0 +1,73 @@
+# tests/test_json_stream.py
+import json
+
+from app.json_stream import ArrayObjectParser
+
+
+def _feed_all(parser: ArrayObjectParser, pieces) -> list[dict]:
+    return [obj for piece in pieces for obj in parser.feed(piece)]
+
+
+def test_objects_split_across_chunks_are_emitted_when_complete():
+    text = '{"flashcards": [{"front": "Q1", "back": "R1"}, {"front": "Q2", "back": "R2"}]}'
+    parser = ArrayObjectParser()
+
+    first = parser.feed(text[:30])
+    assert first == []  # O primeiro objeto ainda não fechou
+    second = parser.feed(text[30:50])
+    assert second == [{"front": "Q1", "back": "R1"}]
+    assert parser.feed(text[50:]) == [{"front": "Q2", "back": "R2"}]
+
+
+def test_every_split_point_gives_the_same_objects():
+    cards = [{"front": f"Pergunta {i}", "back": f"Resposta {i}"} for i in range(3)]
+    text = json.dumps({"flashcards": cards})
+
+    for size in range(1, 12):
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        assert _feed_all(ArrayObjectParser(), pieces) == cards
+
+
+def test_escaped_quotes_and_braces_inside_strings():
+    cards = [
+        {"front": 'O que é "x}" em {chaves}?', "back": "Um ] e um [ dentro do texto \\ com barra"},
+        {"front": "Último", "back": '\\"'},
+    ]
+    text = json.dumps({"flashcards": cards})
+    # A `\` de um escape no fim de um pedaço e o caractere escapado no seguinte
+    split = text.index("\\") + 1
+
+    assert _feed_all(ArrayObjectParser(), [text[:split], text[split:]]) == cards
+    assert _feed_all(ArrayObjectParser(), list(text)) == cards
+
+
+def test_json_fence_and_surrounding_text_are_ignored():
+    text = 'Aqui estão:\n```json\n{"flashcards": [{"front": "Q", "back": "R"}]}\n```\nBons estudos!'
+    parser = ArrayObjectParser()
+
+    assert _feed_all(parser, [text[:15], text[15:]]) == [{"front": "Q", "back": "R"}]
+    assert parser.found_array
+    assert parser.invalid == 0
+
+
+def test_malformed_object_is_skipped_without_losing_the_others():
+    text = '{"flashcards": [{"front": "Q1", "back": "R1"}, {"front": "Q2" "back": }, {"front": "Q3", "back": "R3"}]}'
+    parser = ArrayObjectParser()
+
+    assert parser.feed(text) == [{"front": "Q1", "back": "R1"}, {"front": "Q3", "back": "R3"}]
+    assert parser.invalid == 1
+
+
+def test_text_after_the_array_is_ignored():
+    parser = ArrayObjectParser()
+
+    objects = parser.feed('{"flashcards": [{"front": "Q", "back": "R"}], "extra": [{"front": "X"}]}')
+
+    assert objects == [{"front": "Q", "back": "R"}]
+
+
+def test_response_without_array_is_reported():
+    parser = ArrayObjectParser()
+
+    assert parser.feed("Não consegui gerar flashcards.") == []
+    assert not parser.found_array
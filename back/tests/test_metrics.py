@@ -0,0 +1,71 @@
+# tests/test_metrics.py
+import subprocess
+import sys
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+from app import metrics
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _requests_seen(route: str, status: str, method: str = "GET") -> float:
+    value = REGISTRY.get_sample_value(
+        "flashify_http_request_duration_seconds_count",
+        {"method": method, "route": route, "status": status},
+    )
+    return value or 0.0
+
+
+def test_requests_are_labelled_with_the_route_template(client, auth_headers):
+    before = _requests_seen("/documents/{document_id}/events", "404")
+
+    for document_id in (999998, 999999):
+        client.get(f"/documents/{document_id}/events", headers=auth_headers)
+
+    # Os dois IDs caem na mesma série, sem um rótulo por documento
+    assert _requests_seen("/documents/{document_id}/events", "404") == before + 2
+    assert _requests_seen("/documents/999999/events", "404") == 0
+
+
+def test_paths_without_a_route_share_one_label(client):
+    before = _requests_seen("unmatched", "404")
+
+    client.get("/nao-existe/1")
+    client.get("/nao-existe/2")
+
+    assert _requests_seen("unmatched", "404") == before + 2
+
+
+def test_metrics_endpoint_exposes_the_registry(client):
+    client.get("/")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE_LATEST
+    assert 'flashify_http_request_duration_seconds_count{method="GET",route="/",status="200"}' in response.text
+
+
+def _count_in_other_process(multiproc_dir: Path, flashcards: int) -> None:
+    script = f"from app import metrics; metrics.FLASHCARDS_CREATED.labels(source='ai').inc({flashcards})"
+    subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=BACKEND_DIR,
+        env={"PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir), "PATH": ""},
+        check=True,
+    )
+
+
+def test_multiprocess_mode_sums_every_process(client, tmp_path, monkeypatch):
+    # Dois "workers" gravam suas métricas no diretório compartilhado
+    _count_in_other_process(tmp_path, 3)
+    _count_in_other_process(tmp_path, 4)
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "MULTIPROC_DIR", str(tmp_path))
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'flashify_flashcards_created_total{source="ai"} 7.0' in response.text
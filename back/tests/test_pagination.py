@@ -0,0 +1,73 @@
+# tests/test_pagination.py
+import pytest
+
+from app import schemas
+
+
+def _import_document(client, headers, count: int) -> int:
+    rows = "".join(f"pergunta {i},resposta {i}\n" for i in range(count))
+    response = client.post(
+        "/decks/import?format=csv",
+        headers=headers,
+        files={"file": ("baralho.csv", f"front,back\n{rows}".encode(), "text/csv")},
+    )
+    assert response.status_code == 201
+    return response.json()["document_id"]
+
+
+def test_build_page_uses_the_extra_row_only_as_a_marker():
+    rows = [{"id": 3}, {"id": 7}, {"id": 9}]
+
+    assert schemas.build_page(rows, limit=2) == {"items": rows[:2], "next_cursor": 7}
+    assert schemas.build_page(rows[:2], limit=2) == {"items": rows[:2], "next_cursor": None}
+    assert schemas.build_page([], limit=2) == {"items": [], "next_cursor": None}
+
+
+def test_cursor_walks_every_flashcard_once(client, auth_headers):
+    document_id = _import_document(client, auth_headers, 7)
+
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 3} if cursor is None else {"limit": 3, "cursor": cursor}
+        page = client.get(f"/documents/{document_id}/flashcards", headers=auth_headers, params=params).json()
+        ids.extend(item["id"] for item in page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(ids) == 7
+    assert ids == sorted(set(ids))
+
+
+def test_fields_limit_the_returned_columns(client, auth_headers):
+    document_id = _import_document(client, auth_headers, 2)
+
+    page = client.get(
+        f"/documents/{document_id}/flashcards", headers=auth_headers, params={"fields": "front"}
+    ).json()
+
+    # O ID sempre vem, para servir de cursor; os campos não pedidos nem aparecem
+    assert [set(item) for item in page["items"]] == [{"id", "front"}, {"id", "front"}]
+    assert {item["front"] for item in page["items"]} == {"pergunta 0", "pergunta 1"}
+
+
+@pytest.mark.parametrize("fields", ["front,senha", "hashed_password", "front, user_id"])
+def test_invalid_fields_are_rejected(client, auth_headers, fields):
+    document_id = _import_document(client, auth_headers, 1)
+
+    response = client.get(f"/documents/{document_id}/flashcards", headers=auth_headers, params={"fields": fields})
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Campos inválidos:")
+
+
+def test_flashcards_of_another_users_document_are_not_found(client, auth_headers):
+    document_id = _import_document(client, auth_headers, 1)
+    client.post("/users", json={"username": "intruso", "email": "intruso@test.local", "password": "senha"})
+    token = client.post("/token", data={"username": "intruso@test.local", "password": "senha"}).json()["access_token"]
+
+    response = client.get(f"/documents/{document_id}/flashcards", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 404
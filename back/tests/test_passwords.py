@@ -0,0 +1,79 @@
+# tests/test_passwords.py
+import asyncio
+import os
+
+import pytest
+from passlib.context import CryptContext
+
+from app import crud, passwords
+
+
+@pytest.fixture
+def process_pool(monkeypatch):
+    """Liga o pool de processos (desligado no restante dos testes)."""
+    monkeypatch.setattr(passwords, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(passwords, "_pool", None)
+    yield
+    passwords.shutdown_pool()
+
+
+def test_hashing_runs_in_another_process(process_pool):
+    async def scenario():
+        hashed = await passwords.get_password_hash_async("senha")
+        return (
+            hashed,
+            await passwords.verify_password_async("senha", hashed),
+            await passwords.verify_password_async("errada", hashed),
+            await passwords._run(os.getpid),
+        )
+
+    hashed, right, wrong, worker_pid = asyncio.run(scenario())
+
+    assert passwords.verify_password("senha", hashed)
+    assert (right, wrong) == (True, False)
+    assert worker_pid != os.getpid()
+
+
+def test_without_workers_hashing_stays_in_the_threadpool(monkeypatch):
+    monkeypatch.setattr(passwords, "PASSWORD_HASH_WORKERS", 0)
+
+    hashed = asyncio.run(passwords.get_password_hash_async("senha"))
+
+    assert passwords._get_pool() is None
+    assert passwords.verify_password("senha", hashed)
+
+
+def test_register_and_login_through_the_pool(client, process_pool):
+    response = client.post("/users", json={"username": "pool", "email": "pool@test.local", "password": "senha"})
+    assert response.status_code == 201
+
+    assert client.post("/token", data={"username": "pool@test.local", "password": "senha"}).status_code == 200
+    assert client.post("/token", data={"username": "pool@test.local", "password": "errada"}).status_code == 401
+
+
+def test_outdated_hash_is_replaced_on_login(client, session, monkeypatch):
+    client.post("/users", json={"username": "antigo", "email": "antigo@test.local", "password": "senha"})
+    user = crud.get_user_by_email(session, email="antigo@test.local")
+    # Hash gravado com um custo que a configuração atual considera baixo demais
+    crud.update_user_password_hash(session, user, passwords.pwd_context.hash("senha", rounds=4))
+    monkeypatch.setattr(
+        passwords, "pwd_context",
+        CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__min_rounds=5, bcrypt__default_rounds=5),
+    )
+    outdated = user.hashed_password
+
+    # Senha errada não troca o hash
+    assert client.post("/token", data={"username": "antigo@test.local", "password": "errada"}).status_code == 401
+    session.refresh(user)
+    assert user.hashed_password == outdated
+
+    assert client.post("/token", data={"username": "antigo@test.local", "password": "senha"}).status_code == 200
+    session.refresh(user)
+    rehashed = user.hashed_password
+    assert rehashed != outdated and rehashed.startswith("$2b$05$")
+    assert not passwords.needs_rehash(rehashed)
+
+    # Com o hash em dia, o próximo login não grava nada
+    assert client.post("/token", data={"username": "antigo@test.local", "password": "senha"}).status_code == 200
+    session.refresh(user)
+    assert user.hashed_password == rehashed
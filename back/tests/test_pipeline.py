@@ -0,0 +1,172 @@
+# tests/test_pipeline.py
+import time
+
+import pytest
+from sqlmodel import select
+
+from app import events
+from app.testing.synthetic import make_png, make_text_pdf
+
+
+@pytest.fixture
+def statuses(monkeypatch):
+    """Guarda as mudanças de status publicadas, por documento."""
+    published: dict[int, list[str]] = {}
+    publish_status = events.publish_status
+
+    def record(document_id: int, status: str, **data):
+        published.setdefault(document_id, []).append(status)
+        publish_status(document_id, status, **data)
+
+    monkeypatch.setattr(events, "publish_status", record)
+    return published
+
+
+def _upload_pdf(client, headers, tmp_path, seed: int = 0) -> int:
+    path = make_text_pdf(str(tmp_path / f"documento_{seed}.pdf"), pages=2, seed=seed)
+    with open(path, "rb") as pdf:
+        response = client.post(
+            "/documents/upload", headers=headers, files={"file": ("documento.pdf", pdf, "application/pdf")}
+        )
+    assert response.status_code == 202
+    return response.json()["id"]
+
+
+def test_stages_are_routed_to_their_queues():
+    from app.worker import celery_app
+
+    router = celery_app.amqp.router
+    queue_of = lambda name: router.route({}, name)["queue"].name
+
+    assert queue_of("app.tasks.extract_document_text") == "cpu"
+    assert queue_of("app.tasks.extract_batch_images") == "cpu"
+    assert queue_of("app.tasks.generate_document_flashcards") == "io"
+    assert queue_of("app.tasks.finish_document") == "io"
+
+
+def test_document_goes_through_every_stage(client, auth_headers, fake_gemini, statuses, tmp_path):
+    document_id = _upload_pdf(client, auth_headers, tmp_path, seed=1)
+
+    assert statuses[document_id] == ["EXTRACTING", "GENERATING", "COMPLETED"]
+    document = client.get(f"/documents/{document_id}", headers=auth_headers).json()
+    assert document["status"] == "COMPLETED"
+    assert document["extracted_text"]
+    flashcards = client.get(f"/documents/{document_id}/flashcards", headers=auth_headers).json()
+    assert len(flashcards["items"]) == fake_gemini.calls * fake_gemini.cards_per_chunk > 0
+
+
+def test_failed_stage_marks_the_document_as_failed(client, auth_headers, fake_gemini, statuses, tmp_path, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise RuntimeError("Gemini indisponível")
+
+    monkeypatch.setattr(fake_gemini, "generate_content", unavailable)
+    document_id = _upload_pdf(client, auth_headers, tmp_path, seed=2)
+
+    assert statuses[document_id] == ["EXTRACTING", "GENERATING", "FAILED"]
+    document = client.get(f"/documents/{document_id}", headers=auth_headers).json()
+    assert document["status"] == "FAILED"
+    # A extração já concluída fica gravada para uma nova tentativa
+    assert document["extracted_text"]
+
+
+
+def test_transient_errors_are_retried(client, auth_headers, fake_gemini, statuses, tmp_path, monkeypatch):
+    generate_content = fake_gemini.generate_content
+    attempts = []
+
+    def flaky(*args, **kwargs):
+        attempts.append(1)
+        if len(attempts) <= 2:
+            raise ConnectionError("conexão recusada")
+        return generate_content(*args, **kwargs)
+
+    monkeypatch.setattr(fake_gemini, "generate_content", flaky)
+    document_id = _upload_pdf(client, auth_headers, tmp_path, seed=4)
+
+    assert len(attempts) == 3
+    assert statuses[document_id][-1] == "COMPLETED"
+
+
+def test_permanent_errors_are_not_retried(client, auth_headers, fake_gemini, statuses, tmp_path, monkeypatch):
+    attempts = []
+
+    def invalid(*args, **kwargs):
+        attempts.append(1)
+        raise ValueError("resposta inválida")
+
+    monkeypatch.setattr(fake_gemini, "generate_content", invalid)
+    document_id = _upload_pdf(client, auth_headers, tmp_path, seed=5)
+
+    assert len(attempts) == 1
+    assert statuses[document_id] == ["EXTRACTING", "GENERATING", "FAILED"]
+
+def test_batch_images_share_one_ocr_request(client, auth_headers, fake_gemini, fake_vision, statuses, tmp_path):
+    images = []
+    for seed in range(3):
+        path = make_png(str(tmp_path / f"foto_{seed}.png"), 48, 48, seed=seed)
+        images.append(("files", (f"foto_{seed}.png", open(path, "rb").read(), "image/png")))
+    pdf = open(make_text_pdf(str(tmp_path / "texto.pdf"), pages=1, seed=3), "rb").read()
+
+    response = client.post(
+        "/documents/upload/batch",
+        headers=auth_headers,
+        files=[*images, ("files", ("texto.pdf", pdf, "application/pdf"))],
+    )
+
+    assert response.status_code == 202
+    # As três imagens vão juntas em uma chamada ao Vision; o PDF tem camada de texto
+    assert fake_vision.calls == 1
+    for document in response.json()["documents"]:
+        assert statuses[document["id"]][-1] == "COMPLETED"
+        assert client.get(f"/documents/{document['id']}", headers=auth_headers).json()["extracted_text"]
+
+
+def test_retry_keeps_the_cards_written_before_a_mid_stream_failure(session, fake_gemini, statuses):
+    from app import crud, models, tasks
+
+    user = models.User(username=f"stream{time.time_ns()}", email=f"{time.time_ns()}@test.local", hashed_password="")
+    session.add(user)
+    session.commit()
+    document = crud.create_document_for_user(
+        session, user_id=user.id, file_path="stream.pdf", content_hash=f"stream{time.time_ns()}"
+    )
+    document.extracted_text = "A fotossíntese converte luz em energia química nas plantas."
+    session.add(document)
+    session.commit()
+    document_id = document.id
+
+    generate_content = fake_gemini.generate_content
+    fake_gemini.cards_per_chunk = 6
+
+    def interrupted(prompt, stream=False, **kwargs):
+        parts = list(generate_content(prompt, stream=stream, **kwargs))
+
+        def broken_stream():
+            # Metade da resposta chega, e então a conexão cai
+            yield from parts[:len(parts) // 2]
+            raise ConnectionError("conexão interrompida")
+
+        return broken_stream()
+
+    fake_gemini.generate_content = interrupted
+    with pytest.raises(ConnectionError):
+        tasks.generate_document_flashcards.apply(kwargs={"document_id": document_id})
+
+    def fronts() -> list[str]:
+        session.expire_all()
+        return [card.front for card in session.exec(
+            select(models.Flashcard).where(models.Flashcard.document_id == document_id)
+        )]
+
+    written = fronts()
+    assert 0 < len(written) < 6
+    assert statuses[document_id][-1] == "FAILED"
+
+    # A nova tentativa recebe a resposta inteira: só as perguntas que faltavam são gravadas
+    fake_gemini.generate_content = generate_content
+    result = tasks.generate_document_flashcards.apply(kwargs={"document_id": document_id}, retries=1)
+
+    assert result.get() == 6
+    final = fronts()
+    assert len(final) == len(set(final)) == 6
+    assert set(written) <= set(final)
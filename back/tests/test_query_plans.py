@@ -0,0 +1,48 @@
+# tests/test_query_plans.py
+"""
+As consultas mais frequentes por chave estrangeira precisam usar os índices
+criados em `0003_foreign_key_indexes`; sem eles, o SQLite e o Postgres
+varrem a tabela inteira a cada listagem.
+"""
+from sqlalchemy import text
+from sqlalchemy.dialects import sqlite
+
+from app import crud
+
+
+def _query_plan(session, statement) -> str:
+    """Texto do `EXPLAIN QUERY PLAN` do SQLite para uma consulta do SQLAlchemy."""
+    compiled = statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    rows = session.exec(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def _capture(exec_, statements: list):
+    """Envolve `session.exec` para guardar as consultas montadas pelo `crud`."""
+    def wrapper(statement, *args, **kwargs):
+        statements.append(statement)
+        return exec_(statement, *args, **kwargs)
+    return wrapper
+
+
+def test_flashcards_by_document_uses_document_id_index(session, monkeypatch):
+    statements = []
+    monkeypatch.setattr(session, "exec", _capture(session.exec, statements))
+    crud.get_flashcards_by_document(session, document_id=1)
+
+    plan = _query_plan(session, statements[0])
+    assert "ix_flashcard_document_id" in plan
+    assert "SCAN flashcard" not in plan
+
+
+def test_folder_summaries_use_foreign_key_indexes(session, monkeypatch):
+    statements = []
+    monkeypatch.setattr(session, "exec", _capture(session.exec, statements))
+    crud.get_folder_summaries_by_user(session, user_id=1)
+
+    plan = _query_plan(session, statements[0])
+    assert "ix_folder_user_id" in plan
+    assert "ix_document_folder_id" in plan
+    assert "ix_flashcard_document_id" in plan
+    assert "SCAN document" not in plan
+    assert "SCAN flashcard" not in plan
@@ -0,0 +1,181 @@
+# tests/test_rate_limit.py
+import os
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app import ai_generator, rate_limit
+
+
+class FakeClock:
+    """Relógio controlado pelo teste: `sleep` só avança o tempo."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    perf_counter = monotonic
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    monkeypatch.setattr(rate_limit.random, "uniform", lambda low, high: low)
+    return clock
+
+
+@pytest.fixture
+def limiter(clock, monkeypatch):
+    limiter = rate_limit.InMemoryRateLimiter("gemini", requests_per_minute=60, tokens_per_minute=6000)
+    monkeypatch.setitem(rate_limit._limiters, "gemini", limiter)
+    return limiter
+
+
+def test_bucket_refills_at_the_quota_rate(limiter, clock):
+    for _ in range(60):
+        assert limiter.acquire(10) == 0
+
+    # Balde de requisições vazio: a próxima espera 1 s (60 por minuto)
+    waited = limiter.acquire(10)
+
+    assert waited == pytest.approx(1.0)
+    clock.now += 30
+    assert limiter._try_acquire(10, 0.0) == 0
+    assert limiter._requests == pytest.approx(29)
+
+
+def test_bucket_never_holds_more_than_one_minute_of_quota(limiter, clock):
+    clock.now += 3600
+    for _ in range(60):
+        assert limiter._try_acquire(1, 0.0) == 0
+    assert limiter._try_acquire(1, 0.0) > 0
+
+
+def test_bulk_calls_leave_a_reserve_for_interactive_ones(limiter, monkeypatch):
+    monkeypatch.setattr(rate_limit, "GEMINI_BULK_RESERVE", 0.1)
+
+    admitted = 0
+    while limiter._try_acquire(10, rate_limit._reserve_for(rate_limit.PRIORITY_BULK)) == 0:
+        admitted += 1
+
+    # O lote para nos 10% de reserva, e o upload avulso ainda é atendido na hora
+    assert admitted == 54  # 60 requisições menos 10% de reserva
+    assert limiter._try_acquire(10, rate_limit._reserve_for(rate_limit.PRIORITY_INTERACTIVE)) == 0
+
+
+def test_penalize_pauses_every_caller(limiter, clock):
+    limiter.penalize(5)
+
+    assert limiter._try_acquire(1, 0.0) == pytest.approx(5)
+    assert limiter.acquire(1) == pytest.approx(5)
+
+
+def test_settle_returns_unused_tokens(limiter):
+    limiter.acquire(4000)
+    assert limiter._tokens == pytest.approx(2000)
+
+    limiter.settle(estimated_tokens=4000, actual_tokens=1000)
+    assert limiter._tokens == pytest.approx(5000)
+
+    limiter.settle(estimated_tokens=100, actual_tokens=600)
+    assert limiter._tokens == pytest.approx(4500)
+
+
+class FlakyModel:
+    """Falha com `errors` (em ordem) e depois responde normalmente."""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        usage = SimpleNamespace(prompt_token_count=100, candidates_token_count=50)
+        return SimpleNamespace(text='{"flashcards": []}', usage_metadata=usage)
+
+
+@pytest.fixture
+def no_jitter(monkeypatch, clock):
+    monkeypatch.setattr(ai_generator, "_backoff", lambda attempt: 2.0 ** attempt)
+    monkeypatch.setattr(ai_generator, "time", clock)
+
+
+def test_rate_limited_call_pauses_the_limiter_and_retries(limiter, clock, no_jitter):
+    model = FlakyModel(google_exceptions.TooManyRequests("cota"), google_exceptions.TooManyRequests("cota"))
+
+    ai_generator._call_model(model, "prompt", rate_limit.PRIORITY_INTERACTIVE)
+
+    assert model.calls == 3
+    # Cada 429 pausa o balde (1 s e depois 2 s) para todos, não só para esta chamada
+    assert sum(clock.sleeps) == pytest.approx(3.0)
+
+
+def test_unavailable_errors_back_off_and_give_up(limiter, clock, no_jitter, monkeypatch):
+    monkeypatch.setattr(ai_generator, "GEMINI_MAX_RETRIES", 2)
+    model = FlakyModel(*(google_exceptions.ServiceUnavailable("fora") for _ in range(5)))
+
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        ai_generator._call_model(model, "prompt", rate_limit.PRIORITY_INTERACTIVE)
+
+    assert model.calls == 3
+    assert clock.sleeps == [1.0, 2.0]
+
+
+def test_permanent_errors_are_not_retried(limiter, no_jitter):
+    model = FlakyModel(google_exceptions.InvalidArgument("prompt inválido"))
+
+    with pytest.raises(google_exceptions.InvalidArgument):
+        ai_generator._call_model(model, "prompt", rate_limit.PRIORITY_INTERACTIVE)
+    assert model.calls == 1
+
+
+def test_actual_usage_is_settled_against_the_estimate(limiter, no_jitter):
+    prompt = "x" * 400
+    estimated = ai_generator._estimate_tokens(prompt)
+
+    ai_generator._call_model(FlakyModel(), prompt, rate_limit.PRIORITY_INTERACTIVE)
+
+    # Só os 150 tokens informados pela resposta ficam consumidos
+    assert estimated > 150
+    assert limiter._tokens == pytest.approx(6000 - 150)
+
+
+def test_redis_limiter_lets_calls_through_when_redis_is_down(clock):
+    limiter = rate_limit.RedisRateLimiter("teste", "redis://127.0.0.1:1/0", requests_per_minute=1)
+
+    # Sem o Redis não há limite: os 429 continuam tratados pelo retry
+    assert limiter.acquire(10) == 0
+    assert limiter.acquire(10) == 0
+
+
+@pytest.mark.skipif(not os.getenv("REDIS_TEST_URL"), reason="defina REDIS_TEST_URL para testar o script Lua")
+def test_redis_limiter_shares_the_bucket_between_workers():
+    import redis
+
+    url = os.environ["REDIS_TEST_URL"]
+    name = f"teste-{os.getpid()}"
+    first, second = (
+        rate_limit.RedisRateLimiter(name, url, requests_per_minute=60, tokens_per_minute=6000) for _ in range(2)
+    )
+    try:
+        for _ in range(30):
+            assert first._try_acquire(10, 0.0) == 0
+            assert second._try_acquire(10, 0.0) == 0
+        # Os dois "workers" esvaziaram o mesmo balde
+        assert first._try_acquire(10, 0.0) > 0
+
+        second.penalize(30)
+        assert first._try_acquire(10, 0.0) > 29
+    finally:
+        redis.Redis.from_url(url).delete(first.key)
@@ -0,0 +1,43 @@
+# tests/test_reviews.py
+def _import_cards(client, headers, count: int) -> list[int]:
+    rows = "".join(f"pergunta {i},resposta {i}\n" for i in range(count))
+    response = client.post(
+        "/decks/import?format=csv",
+        headers=headers,
+        files={"file": ("baralho.csv", f"front,back\n{rows}".encode(), "text/csv")},
+    )
+    assert response.status_code == 201
+    due = client.get("/reviews/due", headers=headers, params={"limit": count}).json()
+    return [card["flashcard_id"] for card in due]
+
+
+def test_review_batch_accepts_naive_aware_and_missing_dates(client, auth_headers):
+    first, second = _import_cards(client, auth_headers, 2)
+
+    # Datas sem fuso, com fuso e ausentes no mesmo lote, inclusive para o mesmo cartão
+    response = client.post(
+        "/reviews/",
+        headers=auth_headers,
+        json={
+            "reviews": [
+                {"flashcard_id": first, "grade": 4, "reviewed_at": "2026-01-02T10:00:00"},
+                {"flashcard_id": first, "grade": 5, "reviewed_at": "2026-01-01T10:00:00-03:00"},
+                {"flashcard_id": first, "grade": 3},
+                {"flashcard_id": second, "grade": 1, "reviewed_at": "2026-01-01T12:00:00Z"},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"updated": sorted([first, second]), "not_found": []}
+
+
+def test_review_dates_are_normalized_to_utc():
+    from datetime import datetime, timezone
+    from app.schemas import ReviewSubmit
+
+    naive = ReviewSubmit(flashcard_id=1, grade=3, reviewed_at="2026-01-01T10:00:00")
+    aware = ReviewSubmit(flashcard_id=1, grade=3, reviewed_at="2026-01-01T07:00:00-03:00")
+
+    assert naive.reviewed_at == aware.reviewed_at == datetime(2026, 1, 1, 10, tzinfo=timezone.utc)
+    assert aware.reviewed_at.tzinfo == timezone.utc
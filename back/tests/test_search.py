@@ -0,0 +1,74 @@
+# tests/test_search.py
+import time
+
+import pytest
+
+from app import crud, models, search
+
+
+@pytest.fixture
+def user_id(session) -> int:
+    user = models.User(username=f"search{time.time_ns()}", email=f"{time.time_ns()}@test.local", hashed_password="")
+    session.add(user)
+    session.commit()
+    return user.id
+
+
+def _document(session, user_id: int, text: str) -> models.Document:
+    document = crud.create_document_for_user(session, user_id=user_id, file_path="busca.pdf")
+    return crud.update_document_after_processing(session, document, text)
+
+
+def test_more_relevant_results_come_first(session, user_id):
+    once = _document(session, user_id, "A mitocôndria aparece uma vez neste texto longo sobre células e tecidos.")
+    often = _document(session, user_id, "Mitocôndria. A mitocôndria produz energia; mitocôndria é a usina da célula.")
+
+    hits = search.search(session, user_id, "mitocondria", kinds=("document",))
+
+    assert [hit["id"] for hit in hits] == [often.id, once.id]
+    assert hits[0]["rank"] >= hits[1]["rank"]
+
+
+def test_results_are_limited_to_the_user(session, user_id):
+    _document(session, user_id, "Fotossíntese nas folhas.")
+    other = models.User(username=f"outro{time.time_ns()}", email=f"outro{time.time_ns()}@test.local", hashed_password="")
+    session.add(other)
+    session.commit()
+
+    assert search.search(session, other.id, "fotossintese") == []
+
+
+def test_highlights_mark_the_terms_and_escape_the_text(session, user_id):
+    document = _document(session, user_id, 'Teste <script>alert("x")</script> sobre ribossomo & proteínas')
+    crud.create_flashcards_for_document(
+        session, [{"front": "<img src=x onerror=alert(1)> Ribossomo?", "back": "Síntese de proteínas"}], document.id
+    )
+
+    hits = search.search(session, user_id, "ribossomo")
+
+    by_kind = {hit["kind"]: hit["highlight"] for hit in hits}
+    assert "<mark>ribossomo</mark>" in by_kind["document"]
+    assert "&lt;script&gt;" in by_kind["document"] and "<script>" not in by_kind["document"]
+    assert "&amp;" in by_kind["document"]
+    assert by_kind["flashcard"].startswith("&lt;img src=x onerror=alert(1)&gt; <mark>Ribossomo</mark>?")
+    assert "<img" not in by_kind["flashcard"]
+
+
+def test_reprocessing_a_document_updates_the_index(session, user_id):
+    document = _document(session, user_id, "Texto sobre a revolução francesa.")
+    assert [hit["id"] for hit in search.search(session, user_id, "revolucao")] == [document.id]
+
+    crud.update_document_after_processing(session, document, "Texto sobre a tabela periódica.")
+
+    assert search.search(session, user_id, "revolucao") == []
+    assert [hit["id"] for hit in search.search(session, user_id, "periodica")] == [document.id]
+
+
+def test_query_syntax_is_not_interpreted(session, user_id):
+    document = _document(session, user_id, "Equação de segundo grau")
+
+    # Operadores e aspas do FTS5 viram termos comuns, sem erro de sintaxe
+    hits = search.search(session, user_id, 'equação" OR NEAR(grau')
+
+    assert [hit["id"] for hit in hits] == []
+    assert [hit["id"] for hit in search.search(session, user_id, "equacao grau")] == [document.id]
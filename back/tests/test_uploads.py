@@ -0,0 +1,117 @@
+# tests/test_uploads.py
+import os
+
+import pytest
+
+from app.testing.synthetic import make_text_pdf
+
+
+def _pdf(tmp_path, seed: int) -> bytes:
+    return open(make_text_pdf(str(tmp_path / f"documento_{seed}.pdf"), pages=1, seed=seed), "rb").read()
+
+
+def test_malformed_content_length_is_rejected(client, auth_headers):
+    response = client.post(
+        "/documents/upload",
+        headers={**auth_headers, "Content-Length": "abc", "Content-Type": "multipart/form-data; boundary=x"},
+        content=b"x",
+    )
+
+    assert response.status_code == 400
+
+
+def test_failed_batch_keeps_no_new_files(client, auth_headers, fake_gemini, upload_directory, tmp_path):
+    existing = _pdf(tmp_path, seed=10)
+    assert client.post(
+        "/documents/upload", headers=auth_headers, files={"file": ("a.pdf", existing, "application/pdf")}
+    ).status_code == 202
+    before = set(os.listdir(upload_directory))
+
+    response = client.post(
+        "/documents/upload/batch",
+        headers=auth_headers,
+        files=[
+            ("files", ("a.pdf", existing, "application/pdf")),
+            ("files", ("b.pdf", _pdf(tmp_path, seed=11), "application/pdf")),
+            ("files", ("c.txt", b"texto", "text/plain")),
+        ],
+    )
+
+    assert response.status_code == 400
+    # O PDF novo é apagado; o que já pertencia a outro documento fica
+    assert set(os.listdir(upload_directory)) == before
+
+
+def _zip(members: dict[str, bytes]) -> bytes:
+    import io
+    import zipfile
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_unpacked_size_limit_applies_to_the_whole_batch(client, auth_headers, upload_directory, monkeypatch):
+    from app import uploads
+
+    monkeypatch.setattr(uploads, "MAX_BATCH_SIZE", 1_000_000)
+    before = set(os.listdir(upload_directory))
+
+    # Cada ZIP cabe no limite sozinho, mas não os dois juntos
+    response = client.post(
+        "/documents/upload/batch",
+        headers=auth_headers,
+        files=[
+            ("files", ("a.zip", _zip({"a.pdf": b"a" * 600_000}), "application/zip")),
+            ("files", ("b.zip", _zip({"b1.pdf": b"b" * 100_000, "b2.pdf": b"c" * 500_000}), "application/zip")),
+        ],
+    )
+
+    assert response.status_code == 413
+    assert set(os.listdir(upload_directory)) == before
+
+
+def test_upload_to_another_users_folder_is_rejected(client, auth_headers, tmp_path):
+    other = client.post("/users", json={"username": "dono", "email": "dono@test.local", "password": "senha"})
+    assert other.status_code in (200, 201)
+    token = client.post("/token", data={"username": "dono@test.local", "password": "senha"}).json()["access_token"]
+    folder = client.post("/folders/", headers={"Authorization": f"Bearer {token}"}, json={"name": "Privada"}).json()
+
+    response = client.post(
+        f"/documents/upload?folder_id={folder['id']}",
+        headers=auth_headers,
+        files={"file": ("a.pdf", _pdf(tmp_path, seed=20), "application/pdf")},
+    )
+
+    assert response.status_code == 404
+
+
+def test_failed_enqueue_removes_the_document_and_the_file(client, auth_headers, upload_directory, tmp_path, monkeypatch):
+    from app import task_queue
+
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("broker indisponível")
+
+    monkeypatch.setattr(task_queue, "enqueue_document", broker_down)
+    before = set(os.listdir(upload_directory))
+
+    with pytest.raises(ConnectionError):
+        client.post(
+            "/documents/upload",
+            headers=auth_headers,
+            files={"file": ("a.pdf", _pdf(tmp_path, seed=21), "application/pdf")},
+        )
+
+    assert set(os.listdir(upload_directory)) == before
+    assert client.get("/documents/", headers=auth_headers).json()["items"] == []
+
+
+def test_upload_routes_document_the_multipart_body(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    schema_of = lambda path: paths[path]["post"]["requestBody"]["content"]["multipart/form-data"]["schema"]
+
+    assert schema_of("/documents/upload")["properties"] == {"file": {"type": "string", "format": "binary"}}
+    assert schema_of("/decks/import")["required"] == ["file"]
+    assert schema_of("/documents/upload/batch")["properties"]["files"]["type"] == "array"